@@ -53,6 +53,40 @@ DB_INSTANCE_RELATIVE_CONFIG = True
 #   Unix/Mac:   {'DB_DATABASE': 'foo.db', 'DB_INSTANCE_RELATIVE_CONFIG': True}
 #   Windows:    {'DB_DATABASE': 'foo.db', 'DB_INSTANCE_RELATIVE_CONFIG': True}
 
+# Read replica database URI, if specified (i.e. not None) reads are routed to
+# the replica, otherwise all reads use the primary database.
+DB_REPLICA_URI = None
+# Read replica database URI environment variable, if specified (i.e. not None)
+# it is used if DB_REPLICA_URI is not specified.
+DB_REPLICA_URI_ENV_VAR = None
+
+# If set to True, or not set, use a single transaction per request, otherwise
+# use a transaction per database operation.
+DB_UNIT_OF_WORK = True
+
+# Database engine related settings (optional, defaults are used if not set):
+# Number of connections kept open in the pool, and max number of connections
+# opened in addition to the pool size.
+DB_POOL_SIZE = 5
+DB_MAX_OVERFLOW = 10
+# Time in seconds to wait for a connection from the pool.
+DB_POOL_TIMEOUT = 30
+# Time in seconds after which a connection is replaced, -1 to disable.
+DB_POOL_RECYCLE = 1800
+# If set to True, test connections for liveness when taken from the pool.
+DB_POOL_PRE_PING = True
+# Max time in milliseconds a statement may run, 0 to disable (PostgreSQL).
+DB_STATEMENT_TIMEOUT = 0
+# SQLite specific, journal mode and synchronous setting; SQLite's defaults
+# are used if not set. WAL journal mode is opt-in, it allows reads during a
+# write, but leaves '-wal' and '-shm' files beside the database file and does
+# not work on network filesystems. NORMAL synchronous is durable in WAL mode
+# except on power loss.
+# DB_SQLITE_JOURNAL_MODE = 'WAL'
+# DB_SQLITE_SYNCHRONOUS = 'NORMAL'
+# SQLite specific, busy timeout in milliseconds.
+DB_SQLITE_BUSY_TIMEOUT = 5000
+
 
 SQLALCHEMY_TRACK_MODIFICATIONS = False  # disable FSADeprecationWarning
 
@@ -86,6 +120,31 @@ TEAM_MANAGER_ROLE_ID = '<manager role id>'
 # TeamPlayer Role ID from Auth0 roles
 TEAM_PLAYER_ROLE_ID = '<player role id>'
 
+# Auth0 caching related settings (optional, defaults are used if not set):
+# Time in seconds for which the JSON Web Key Set is cached.
+JWKS_CACHE_TTL = 3600
+# Minimum time in seconds between JSON Web Key Set refreshes, e.g. following
+# a request with an unknown key id.
+JWKS_MIN_REFRESH_INTERVAL = 30
+# Max number of verified access tokens cached, 0 to disable.
+TOKEN_CACHE_SIZE = 1024
+# Time in seconds before expiry to refresh the management API token.
+MGMT_TOKEN_REFRESH_MARGIN = 300
+# Time in seconds for which management API user details are cached.
+USER_CACHE_TTL = 300
+# Time in seconds after expiry for which cached user details may be used while
+# they are refreshed.
+USER_CACHE_STALE_TTL = 60
+
+# Outbound HTTP related settings (optional, defaults are used if not set):
+# Connect and read timeouts in seconds.
+HTTP_CONNECT_TIMEOUT = 3
+HTTP_READ_TIMEOUT = 10
+# Max number of retries of failed requests.
+HTTP_RETRIES = 2
+# Max number of pooled connections per host.
+HTTP_POOL_SIZE = 10
+
 # Server-side session type; one of "filesystem" or "sqlalchemy"
 SESSION_TYPE = 'filesystem'
 # The lifetime of a permanent session, an integer representing seconds.
@@ -0,0 +1,36 @@
+"""Selection and user indexes
+
+Revision ID: 3e7b9a41c2d5
+Revises: 8c1f2d7a9b3e
+Create Date: 2026-10-17 15:41:08.532917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e7b9a41c2d5'
+down_revision = '8c1f2d7a9b3e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Indexes are created concurrently on PostgreSQL so the tables aren't
+    # locked against writes, which can't be done inside a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_selections_user_confirmed', 'selections',
+                        ['user_id', 'confirmed', 'match_id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_users_role_team', 'users',
+                        ['role_id', 'team_id'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_role_team', table_name='users',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_selections_user_confirmed', table_name='selections',
+                      postgresql_concurrently=True)
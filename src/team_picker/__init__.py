@@ -18,10 +18,16 @@ from .constants import (UNASSIGNED_TEAM_NAME, PRE_CONFIG_ROLE_NAMES,
                         INIT_DB_ARG, POSTMAN_TEST_ARG, DB_URI, DB_URI_ENV_VAR,
                         DB_DRIVER, DB_USERNAME, DB_PASSWORD, GENERATE_API_ARG,
                         DB_HOST, DB_PORT, PERMANENT_SESSION_LIFETIME,
+                        DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+                        DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT,
+                        DB_SQLITE_JOURNAL_MODE, DB_SQLITE_SYNCHRONOUS,
+                        DB_SQLITE_BUSY_TIMEOUT, DB_REPLICA_URI,
+                        DB_REPLICA_URI_ENV_VAR, DB_UNIT_OF_WORK,
+                        SETUP_COMPLETE,
                         ALGORITHMS, INST_REL_CONFIG, APP_CONFIG_PATH,
                         ALL_CONFIG_VARIABLES, LOG_LEVEL, CMD_LINE_ARGS,
-                        DB_CONFIG_VAR_PREFIX, API_URL,
-                        HOME_URL, GET, PATCH, POST, DELETE,
+                        DB_CONFIG_VAR_PREFIX, API_URL, AUTH_CACHE_CONFIG_KEYS,
+                        HTTP_CONFIG_KEYS, HOME_URL, GET, PATCH, POST, DELETE,
                         DASHBOARD_URL, LOGIN_URL, CALLBACK_URL, LOGOUT_URL,
                         USER_SETUP_URL, USER_BY_ID_TEAM_URL, MATCHES_UI_URL,
                         MATCH_BY_ID_UI_URL, SEARCH_MATCH_URL,
@@ -29,7 +35,7 @@ from .constants import (UNASSIGNED_TEAM_NAME, PRE_CONFIG_ROLE_NAMES,
                         MATCH_USER_CONFIRM_UI_URL, ROLES_URL, ROLE_BY_ID_URL,
                         USERS_URL, USER_BY_ID_URL, TEAMS_URL, TEAM_SETUP_URL,
                         TEAM_BY_ID_URL, MATCHES_URL, MATCH_BY_ID_URL,
-                        TOKEN_LOGIN_URL)
+                        MATCH_SELECTIONS_URL, TOKEN_LOGIN_URL)
 from .controllers import (all_roles, get_role_by_id,
                           all_users, get_user_by_id, create_user,
                           delete_user, update_user, setup_user,
@@ -38,7 +44,7 @@ from .controllers import (all_roles, get_role_by_id,
                           set_user_team,
                           all_matches_api, get_match_by_id_api,
                           create_match_api, delete_match_api,
-                          update_match_api,
+                          update_match_api, match_selections_api,
                           matches_ui, create_match_ui,
                           match_by_id_ui, delete_match_ui,
                           search_match_ui, match_selections,
@@ -47,6 +53,7 @@ from .controllers import (all_roles, get_role_by_id,
                           )
 from .models import setup_db
 from .models.exception import ModelError
+from .services import invalidate_roles, invalidate_teams
 from .util import (eval_environ_var_truthy, http_error_result,
                    set_logger, print_exc_info, logger,
                    eval_environ_var_none, DEFAULT_LOG_LEVEL, fmt_log
@@ -83,14 +90,23 @@ def convert_env_var(k):
              INIT_DB_ARG, POSTMAN_TEST_ARG]:
         # Convert boolean variables.
         value = eval_environ_var_truthy(k)
+    elif k in [DB_POOL_PRE_PING, DB_UNIT_OF_WORK]:
+        # Convert boolean or None variables.
+        value = eval_environ_var_truthy(k, dflt_val=None)
     elif k in [DB_URI, DB_URI_ENV_VAR, DB_DRIVER, DB_USERNAME,
-               DB_PASSWORD, DB_HOST, GENERATE_API_ARG]:
+               DB_PASSWORD, DB_HOST, GENERATE_API_ARG,
+               DB_SQLITE_JOURNAL_MODE, DB_SQLITE_SYNCHRONOUS, DB_REPLICA_URI,
+               DB_REPLICA_URI_ENV_VAR]:
         # Convert str or None variables.
         value = eval_environ_var_none(k)
-        if k == DB_URI_ENV_VAR and value is not None:
+        if k in [DB_URI_ENV_VAR, DB_REPLICA_URI_ENV_VAR] and \
+                value is not None:
             # Read value Database URL environment variable.
             value = eval_environ_var_none(value)
-    elif k in [DB_PORT, PERMANENT_SESSION_LIFETIME]:
+    elif k in [DB_PORT, PERMANENT_SESSION_LIFETIME, DB_POOL_SIZE,
+               DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+               DB_STATEMENT_TIMEOUT, DB_SQLITE_BUSY_TIMEOUT] + \
+            AUTH_CACHE_CONFIG_KEYS + HTTP_CONFIG_KEYS:
         # Convert integer variables.
         value = eval_environ_var_none(k)
         value = int(value) if value is not None else None
@@ -200,6 +216,9 @@ def create_app(args: argparse.Namespace, test_config=None) -> Flask:
             k: v for k, v in app.config.items()
             if k.startswith(DB_CONFIG_VAR_PREFIX)
         }, init=cmd_line_args[INIT_DB_ARG])
+    # Load reference data from the (possibly recreated) database on first use.
+    invalidate_roles()
+    invalidate_teams()
 
     # Setup authentication.
     # (Server-side sessions need to be disabled for Postman tests)
@@ -229,7 +248,7 @@ def create_app(args: argparse.Namespace, test_config=None) -> Flask:
             print(str(message))
 
         return {'logged_in': is_logged_in(),
-                'setup_complete': get_profile_setup_complete(),
+                SETUP_COMPLETE: get_profile_setup_complete(),
                 'role': get_profile_role(), 'userinfo': get_profile(),
                 'mdebug': print_in_console}
 
@@ -264,9 +283,10 @@ def create_app(args: argparse.Namespace, test_config=None) -> Flask:
         ("Search match (UI)",
          "Endpoint to handle match search requests.",
          SEARCH_MATCH_URL, search_match_ui, [POST]),
-        ("Get match selections (UI)",
-         "Endpoint to handle requests to get match selections.",
-         MATCH_SELECTIONS_UI_URL, match_selections, [GET]),
+        ("Get/update match selections (UI)",
+         "Endpoint to handle requests to get match selections, or update the "
+         "selection status of multiple users.",
+         MATCH_SELECTIONS_UI_URL, match_selections, [GET, POST]),
         ("Update user match selection",
          "Endpoint to handle requests to update individual user's match "
          "selection status.",
@@ -320,6 +340,10 @@ def create_app(args: argparse.Namespace, test_config=None) -> Flask:
          MATCH_BY_ID_URL, update_match_api, [PATCH]),
         ("Delete match", "Endpoint to handle requests to DELETE match by id.",
          MATCH_BY_ID_URL, delete_match_api, [DELETE]),
+        ("Update match selections",
+         "Endpoint to handle requests to PATCH the selection status of "
+         "multiple users for a match.",
+         MATCH_SELECTIONS_URL, match_selections_api, [PATCH]),
     ]:
         add_url_rule(app, endpoint_info,
                      generate_api=cmd_line_args[GENERATE_API_ARG],
@@ -10,7 +10,8 @@ from .auth import (setup_auth, callback_handling, login, logout, is_logged_in,
                    set_profile_role_permissions, set_profile_role,
                    set_profile_name,
                    check_auth, AuthErrorMode,
-                   requires_auth, Conjunction, check_setup_complete
+                   requires_auth, Conjunction, check_setup_complete,
+                   get_setup_state, invalidate_setup_state
                    )
 from .server_session import set_profile_value
 from .management import add_user_role, get_role_permissions
@@ -41,6 +42,8 @@ __all__ = all_exception + [
     "requires_auth",
     "Conjunction",
     "check_setup_complete",
+    "get_setup_state",
+    "invalidate_setup_state",
 
     "set_profile_value",
 
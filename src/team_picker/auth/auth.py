@@ -1,19 +1,21 @@
-import json
 from enum import Enum
 from functools import wraps
 from http import HTTPStatus
 from urllib.parse import urlencode
-from urllib.request import urlopen, Request
 
 from authlib.integrations.flask_client import OAuth
 from flask import request, Flask, url_for
 from flask_sqlalchemy import SQLAlchemy
 from jose import jwt
-from typing import Any, Union
+from typing import Any, Optional, Union
 from werkzeug import Response
 from werkzeug.utils import redirect
 
 from .exception import AuthError
+from .http_client import (setup_http_client, get_http_client,
+                          http_client_stats
+                          )
+from .jwks import setup_jwks, get_signing_key
 from .management import setup_mgmt, get_user_by_email
 from .misc import *
 from .server_session import (profile_in_session, session_profile, session_clear,
@@ -21,18 +23,22 @@ from .server_session import (profile_in_session, session_profile, session_clear,
                              get_profile_value, check_profile,
                              get_session_value, setup_session
                              )
+from .token_cache import (setup_token_cache, get_verified_token,
+                          add_verified_token
+                          )
 from ..constants import \
     (PROFILE_KEY, JWT_PAYLOAD, AUTH0_DOMAIN, ALGORITHMS,
      AUTH0_CLIENT_ID, AUTH0_CLIENT_SECRET, AUTH0_CALLBACK_URL, AUTH0_AUDIENCE,
      AUTH_MODE, Mode, DASHBOARD_URL, NEW_USER_QUERY,
      NEW_TEAM_QUERY, SET_TEAM_QUERY,
-     LOGIN_URL, YES_ARG, AUTH_CONFIG_KEYS
+     LOGIN_URL, YES_ARG, AUTH_CONFIG_KEYS, AUTH_CACHE_CONFIG_KEYS,
+     HTTP_CONFIG_KEYS
      )
 from ..models import (M_AUTH0_ID, M_ID, M_TEAM_ID, M_ROLE_ID, M_TEAM, M_NAME,
                       M_SURNAME, M_ROLE
                       )
 from ..services import (get_user_by_auth0_id, is_unassigned_team,
-                        is_manager_role, is_player_role, get_role_by_id,
+                        is_manager_role, is_player_role, get_role_name,
                         get_team_by_id
                         )
 from ..util import logger, fmt_log
@@ -42,7 +48,9 @@ config = {k: "" if k != ALGORITHMS else [] for k in AUTH_CONFIG_KEYS}
 auth0 = None
 
 BEARER = "Bearer"
+
 PERMISSIONS = "permissions"
+SETUP_QUERY = "query"   # Setup state dashboard query key.
 
 
 class Conjunction(Enum):
@@ -84,12 +92,19 @@ def setup_auth(app: Flask, db: SQLAlchemy, no_sessions: bool = False):
         if key not in app.config.keys():
             raise ValueError(f"{key} configuration not found")
         config[key] = app.config[key]
+    for key in AUTH_CACHE_CONFIG_KEYS + HTTP_CONFIG_KEYS:
+        # Optional settings, defaults apply if not configured.
+        config[key] = app.config.get(key, None)
 
     auth0_base_url = f'https://{config[AUTH0_DOMAIN]}'
     set_auth0_base_url(auth0_base_url)
 
     setup_session(app, db, no_sessions=no_sessions)
 
+    setup_http_client(config)
+    setup_jwks(config)
+    setup_token_cache(config)
+
     if AUTH_MODE == Mode.AUTHLIB:
         oauth = OAuth(app)
 
@@ -122,8 +137,11 @@ def role_is(role_id: int):
 
 def check_setup_complete(db_user: dict = None, auth0_user: dict = None):
     """
-    Handle Auth0 callback in AUTHLIB mode
-    :return:
+    Check if the user's setup is complete, and save the setup state in the
+    session.
+    :param db_user: database user details, or None to get from database
+    :param auth0_user: auth0 user details, or None to get from auth0
+    :return: dashboard query to complete setup, or None if complete
     """
     # Get user details from auth0 & database.
     userinfo = get_jwt_payload()
@@ -163,12 +181,44 @@ def check_setup_complete(db_user: dict = None, auth0_user: dict = None):
             else:
                 raise ValueError(f'Unknown role is {role_id}')
 
-    # Set setup complete flag in profile.
-    set_profile_value(SETUP_COMPLETE, query is None)
+    # Set setup state in profile.
+    set_profile_value(SETUP_STATE, {SETUP_QUERY: query})
+
+    return query
+
 
+def _saved_setup_state() -> Optional[dict]:
+    """
+    Get the user's setup state saved in the session.
+    :return: setup state or None if not saved
+    """
+    profile = get_profile_value(PROFILE_KEY) if is_logged_in() else None
+    return profile.get(SETUP_STATE, None) \
+        if isinstance(profile, dict) else None
+
+
+def get_setup_state():
+    """
+    Get the user's setup state, from the session if available, otherwise
+    check if the user's setup is complete.
+    :return: dashboard query to complete setup, or None if complete
+    """
+    state = _saved_setup_state()
+    if state is None:
+        query = check_setup_complete()
+    else:
+        query = state[SETUP_QUERY]
     return query
 
 
+def invalidate_setup_state():
+    """
+    Invalidate the user's setup state saved in the session, following a change
+    to the user's setup.
+    """
+    set_profile_value(SETUP_STATE, None)
+
+
 def handle_login(access_token: str, userinfo: dict):
     """
     Handle Auth0 callback in AUTHLIB mode
@@ -179,8 +229,9 @@ def handle_login(access_token: str, userinfo: dict):
     def pick_if_db_user(db_value, other_value):
         return db_value if db_user[M_ID] is not None else other_value
 
-    # Get user details from auth0 & database.
-    auth0_user = get_user_by_email(userinfo[USERINFO_EMAIL])
+    # Get user details from auth0 & database; latest auth0 details are required
+    # as login count has changed.
+    auth0_user = get_user_by_email(userinfo[USERINFO_EMAIL], refresh=True)
     db_user = get_user_by_auth0_id(userinfo[USERINFO_SUB])
     if db_user is None:
         db_user = {
@@ -211,6 +262,11 @@ def handle_login(access_token: str, userinfo: dict):
     set_profile_role({M_ID: db_user[M_ROLE_ID]})
 
     query = check_setup_complete(db_user, auth0_user)
+
+    # Identity provider latency, to distinguish slow logins due to it.
+    logger().debug(fmt_log(f"Identity provider latency: "
+                           f"{http_client_stats()}"))
+
     location = DASHBOARD_URL \
         if query is None else f'{DASHBOARD_URL}?{query}={YES_ARG}'
 
@@ -342,9 +398,9 @@ def get_profile_setup_complete():
     """
     Get the user's profile setup status.
     :return: complete flag
-    :raise: AuthError
     """
-    return get_profile_value(SETUP_COMPLETE) if is_logged_in() else False
+    state = _saved_setup_state() if is_logged_in() else None
+    return state is not None and state[SETUP_QUERY] is None
 
 
 def get_profile_db_id():
@@ -487,9 +543,8 @@ def set_profile_role(value: Union[int, str, dict]):
             set_profile_value(MANAGER_ROLE, is_manager)
             set_profile_value(PLAYER_ROLE, is_player)
 
-            role = get_role_by_id(value[M_ID])
-            role = '' if role is None else role[M_ROLE]
-            set_profile_value(M_ROLE, role)
+            role = get_role_name(value[M_ID])
+            set_profile_value(M_ROLE, '' if role is None else role)
 
             # ROLE_PERMISSIONS is only used during the initial signup workflow,
             # and is set there as required.
@@ -525,11 +580,10 @@ def get_userinfo(access_token: str):
     :return:
     """
     # https://auth0.com/docs/api/authentication#get-user-info
-    response = urlopen(
-        Request(auth0_url('userinfo'), headers={
+    return get_http_client().get_json(
+        'userinfo', auth0_url('userinfo'), headers={
             'Authorization': f'{BEARER} {access_token}'
-        }))
-    return json.loads(response.read())
+        })
 
 
 def check_permission(permission: str, payload: dict,
@@ -623,8 +677,16 @@ def check_permissions(permissions: list[str], payload: dict,
 
 
 def verify_decode_jwt(token):
-    response = urlopen(auth0_url('/.well-known/jwks.json'))
-    jwks = json.loads(response.read())  # JSON Web Key Set
+    """
+    Verify and decode a JWT.
+    :param token: token to verify
+    :return: token payload
+    :raise: AuthError
+    """
+    # Previously verified tokens don't need to be verified again until expiry.
+    payload = get_verified_token(token)
+    if payload is not None:
+        return payload
 
     try:
         unverified_header = jwt.get_unverified_header(token)
@@ -636,17 +698,8 @@ def verify_decode_jwt(token):
         raise AuthError.auth_error(HTTPStatus.UNAUTHORIZED, 'invalid_header',
                                    'Authorization malformed.')
 
-    rsa_key = None
-    for key in jwks['keys']:
-        if key['kid'] == unverified_header['kid']:
-            rsa_key = {
-                'kty': key['kty'],
-                'kid': key['kid'],
-                'use': key['use'],
-                'n': key['n'],
-                'e': key['e']
-            }
-            break
+    # Signing key from the JSON Web Key Set.
+    rsa_key = get_signing_key(unverified_header['kid'])
 
     if rsa_key is not None:
         try:
@@ -657,6 +710,7 @@ def verify_decode_jwt(token):
                 audience=config[AUTH0_AUDIENCE],
                 issuer=f'{get_auth0_base_url()}/'  # Trailing '/' is necessary.
             )
+            add_verified_token(token, payload)
 
             return payload
 
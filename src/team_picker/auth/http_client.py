@@ -0,0 +1,205 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .misc import config_value
+from ..constants import (
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_RETRIES, HTTP_POOL_SIZE
+)
+
+DEFAULT_HTTP_CONNECT_TIMEOUT = 3    # Default connect timeout in seconds.
+DEFAULT_HTTP_READ_TIMEOUT = 10      # Default read timeout in seconds.
+DEFAULT_HTTP_RETRIES = 2            # Default max number of retries.
+DEFAULT_HTTP_POOL_SIZE = 10         # Default connections per host.
+
+RETRY_BACKOFF_FACTOR = 0.25         # Retry backoff factor in seconds.
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+
+class LatencyStats:
+    """
+    Latency counters for an endpoint.
+    """
+
+    def __init__(self):
+        self.count = 0          # Number of requests.
+        self.errors = 0         # Number of failed requests.
+        self.total = 0.0        # Total time in seconds.
+        self.max = 0.0          # Max time in seconds.
+
+    def record(self, elapsed: float, error: bool):
+        """
+        Record a request.
+        :param elapsed: time in seconds
+        :param error: request failed flag
+        """
+        self.count = self.count + 1
+        if error:
+            self.errors = self.errors + 1
+        self.total = self.total + elapsed
+        self.max = max(self.max, elapsed)
+
+    def to_dict(self) -> dict:
+        """
+        Get a dict representation.
+        :return: dict of counters
+        """
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total': self.total,
+            'avg': self.total / self.count if self.count else 0.0,
+            'max': self.max
+        }
+
+
+class HttpClient:
+    """
+    HTTP client for outbound requests, which pools keep-alive connections
+    per host, applies timeouts, retries failed requests and records the
+    latency of each endpoint.
+    """
+
+    def __init__(self, connect_timeout: float = DEFAULT_HTTP_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_HTTP_READ_TIMEOUT,
+                 retries: int = DEFAULT_HTTP_RETRIES,
+                 pool_size: int = DEFAULT_HTTP_POOL_SIZE):
+        """
+        Constructor
+        :param connect_timeout: connect timeout in seconds
+        :param read_timeout:    read timeout in seconds
+        :param retries:         max number of retries
+        :param pool_size:       max number of connections per host
+        """
+        self.timeout = (connect_timeout, read_timeout)
+
+        # Only idempotent requests are retried following a response.
+        retry = Retry(total=retries, backoff_factor=RETRY_BACKOFF_FACTOR,
+                      status_forcelist=RETRY_STATUS_CODES,
+                      allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._stats = {}        # Latency stats by endpoint.
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timed(self, endpoint: str):
+        """
+        Context manager to record the latency of a request.
+        :param endpoint: name of endpoint
+        """
+        start = time.perf_counter()
+        error = True
+        try:
+            yield
+            error = False
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats = self._stats.get(endpoint, None)
+                if stats is None:
+                    stats = LatencyStats()
+                    self._stats[endpoint] = stats
+                stats.record(elapsed, error)
+
+    def request(self, endpoint: str, method: str, url: str,
+                **kwargs) -> requests.Response:
+        """
+        Make a request.
+        :param endpoint: name of endpoint for latency stats
+        :param method:   request method
+        :param url:      url
+        :param kwargs:   additional request arguments
+        :return: response
+        :raise: requests.RequestException
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        with self.timed(endpoint):
+            response = self.session.request(method, url, **kwargs)
+            response.raise_for_status()
+        return response
+
+    def get_json(self, endpoint: str, url: str, **kwargs) -> Any:
+        """
+        Make a GET request.
+        :param endpoint: name of endpoint for latency stats
+        :param url:      url
+        :param kwargs:   additional request arguments
+        :return: decoded json response
+        :raise: requests.RequestException
+        """
+        return self.request(endpoint, 'GET', url, **kwargs).json()
+
+    def post_json(self, endpoint: str, url: str, data: Any,
+                  **kwargs) -> Optional[Any]:
+        """
+        Make a POST request.
+        :param endpoint: name of endpoint for latency stats
+        :param url:      url
+        :param data:     json body
+        :param kwargs:   additional request arguments
+        :return: decoded json response or None if no content
+        :raise: requests.RequestException
+        """
+        response = self.request(endpoint, 'POST', url, json=data, **kwargs)
+        return response.json() if response.content else None
+
+    def stats(self) -> dict:
+        """
+        Get the latency stats.
+        :return: dict of stats by endpoint
+        """
+        with self._lock:
+            return {k: v.to_dict() for k, v in self._stats.items()}
+
+    def close(self):
+        """
+        Close all pooled connections.
+        """
+        self.session.close()
+
+
+http_client: HttpClient = HttpClient()
+
+
+def setup_http_client(cfg: dict):
+    """
+    Initialise the HTTP client.
+    :param cfg: configuration
+    """
+    global http_client
+    http_client.close()
+    http_client = HttpClient(
+        connect_timeout=config_value(cfg, HTTP_CONNECT_TIMEOUT,
+                                     DEFAULT_HTTP_CONNECT_TIMEOUT),
+        read_timeout=config_value(cfg, HTTP_READ_TIMEOUT,
+                                  DEFAULT_HTTP_READ_TIMEOUT),
+        retries=config_value(cfg, HTTP_RETRIES, DEFAULT_HTTP_RETRIES),
+        pool_size=config_value(cfg, HTTP_POOL_SIZE, DEFAULT_HTTP_POOL_SIZE)
+    )
+
+
+def get_http_client() -> HttpClient:
+    """
+    Get the HTTP client.
+    :return: client
+    """
+    return http_client
+
+
+def http_client_stats() -> dict:
+    """
+    Get the HTTP client latency stats.
+    :return: dict of stats by endpoint
+    """
+    return http_client.stats()
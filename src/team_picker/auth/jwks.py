@@ -0,0 +1,196 @@
+import threading
+import time
+from typing import Callable, Optional
+
+from jose import jwk
+from jose.backends.base import Key
+
+from .http_client import get_http_client
+from .misc import auth0_url, config_value
+from ..constants import ALGORITHMS, JWKS_CACHE_TTL, JWKS_MIN_REFRESH_INTERVAL
+from ..util import logger, fmt_log
+
+DEFAULT_JWKS_CACHE_TTL = 3600   # Default JWKS cache time in seconds.
+DEFAULT_JWKS_MIN_REFRESH_INTERVAL = 30  # Default min refresh time in seconds.
+
+JWKS_PATH = '/.well-known/jwks.json'
+
+# Fields from the JSON Web Key Set response
+# https://auth0.com/docs/secure/tokens/json-web-tokens/json-web-key-set-properties
+JWKS_KEYS = 'keys'
+JWK_KID = 'kid'
+JWK_KTY = 'kty'
+JWK_USE = 'use'
+JWK_ALG = 'alg'
+JWK_N = 'n'
+JWK_E = 'e'
+
+
+class JwksKeyStore:
+    """
+    In-process store of the signing keys from a JSON Web Key Set, keyed by
+    'kid'.
+    The key set is refetched when it has expired or when an unknown 'kid' is
+    requested. Refetches are throttled by a minimum refresh interval, so an
+    unknown (e.g. forged) 'kid' can't cause a fetch storm, and only one
+    thread performs a refetch while any other threads requiring it wait.
+    While the store has no keys fetches are not throttled.
+    """
+
+    def __init__(self, fetch: Callable[[], dict], algorithm: str,
+                 ttl: int = DEFAULT_JWKS_CACHE_TTL,
+                 min_refresh_interval: int = DEFAULT_JWKS_MIN_REFRESH_INTERVAL):
+        """
+        Constructor
+        :param fetch:       function to fetch the JSON Web Key Set
+        :param algorithm:   default algorithm for keys
+        :param ttl:         time in seconds for which the key set is valid
+        :param min_refresh_interval: minimum time in seconds between fetches
+        """
+        self._fetch = fetch
+        self._algorithm = algorithm
+        self._ttl = ttl
+        self._min_refresh_interval = min_refresh_interval
+
+        self._keys = {}             # Parsed keys by kid.
+        self._expires = 0.0         # Monotonic time key set expires.
+        self._last_attempt = None   # Monotonic time of last fetch attempt.
+        self._generation = 0        # Incremented on every completed fetch.
+        self._fetching = False      # Fetch in progress flag.
+
+        self._lock = threading.Lock()   # Guards the key set.
+        self._fetch_lock = threading.Lock()  # Single-flight fetch lock.
+
+    def _fetch_required(self, kid: str, now: float) -> bool:
+        """
+        Check if a fetch is required to resolve the specified key.
+        Note: must be called while holding the key set lock.
+        :param kid: id of key
+        :param now: current monotonic time
+        :return: True if fetch required
+        """
+        required = now >= self._expires or kid not in self._keys
+        if required and self._last_attempt is not None and \
+                len(self._keys) > 0:
+            # Throttle fetches; not while there are no keys, e.g. following
+            # a failed initial fetch, as no token can be verified.
+            required = \
+                now - self._last_attempt >= self._min_refresh_interval
+        return required
+
+    def _parse(self, jwks: dict) -> dict:
+        """
+        Parse the keys in a JSON Web Key Set.
+        :param jwks: JSON Web Key Set
+        :return: dict of parsed keys by kid
+        """
+        keys = {}
+        for key in jwks.get(JWKS_KEYS, []):
+            try:
+                rsa_key = {
+                    k: key[k] for k in [JWK_KTY, JWK_KID, JWK_USE, JWK_N, JWK_E]
+                }
+                keys[key[JWK_KID]] = jwk.construct(
+                    rsa_key, algorithm=key.get(JWK_ALG, self._algorithm))
+            except Exception as e:
+                logger().warning(fmt_log(
+                    f"Ignoring unusable JWKS key {key.get(JWK_KID)}: {e}"))
+        return keys
+
+    def refresh(self, generation: int = None):
+        """
+        Refetch the key set.
+        :param generation: key set generation which requires replacement;
+                           if a fetch has completed since, no fetch is
+                           performed
+        """
+        with self._fetch_lock:
+            with self._lock:
+                if generation is not None and generation != self._generation:
+                    return  # Another thread refreshed in the meantime.
+                self._last_attempt = time.monotonic()
+                self._fetching = True
+
+            try:
+                keys = self._parse(self._fetch())
+                error = None
+            except Exception as e:
+                keys = None
+                error = e
+
+            with self._lock:
+                self._fetching = False
+                self._generation = self._generation + 1
+                if keys is not None:
+                    self._keys = keys
+                    self._expires = time.monotonic() + self._ttl
+                have_keys = len(self._keys) > 0
+
+            if error is not None:
+                if not have_keys:
+                    raise error
+                # Continue to use the existing keys.
+                logger().warning(fmt_log(f"JWKS fetch failed: {error}"))
+
+    def get_key(self, kid: str) -> Optional[Key]:
+        """
+        Get the key with the specified id.
+        :param kid: id of key
+        :return: key or None if not found
+        """
+        with self._lock:
+            key = self._keys.get(kid, None)
+            fetch = self._fetch_required(kid, time.monotonic()) or \
+                (key is None and self._fetching)
+            generation = self._generation
+
+        if fetch:
+            # Fetch, or wait for the fetch in progress to complete.
+            self.refresh(generation=generation)
+            with self._lock:
+                key = self._keys.get(kid, None)
+
+        return key
+
+    def clear(self):
+        """
+        Clear the key set.
+        """
+        with self._lock:
+            self._keys = {}
+            self._expires = 0.0
+            self._last_attempt = None
+
+
+jwks_store: JwksKeyStore = None
+
+
+def fetch_jwks() -> dict:
+    """
+    Fetch the JSON Web Key Set from Auth0.
+    :return: JSON Web Key Set
+    """
+    return get_http_client().get_json('jwks', auth0_url(JWKS_PATH))
+
+
+def setup_jwks(cfg: dict):
+    """
+    Initialise the JSON Web Key Set store.
+    :param cfg: configuration
+    """
+    global jwks_store
+    jwks_store = JwksKeyStore(
+        fetch_jwks, cfg[ALGORITHMS][0] if len(cfg[ALGORITHMS]) else None,
+        ttl=config_value(cfg, JWKS_CACHE_TTL, DEFAULT_JWKS_CACHE_TTL),
+        min_refresh_interval=config_value(
+            cfg, JWKS_MIN_REFRESH_INTERVAL, DEFAULT_JWKS_MIN_REFRESH_INTERVAL)
+    )
+
+
+def get_signing_key(kid: str) -> Optional[Key]:
+    """
+    Get a token signing key.
+    :param kid: id of key
+    :return: key or None if not found
+    """
+    return jwks_store.get_key(kid)
@@ -1,19 +1,276 @@
-from typing import Optional, Any
-
-from auth0.authentication import GetToken
-from auth0.management import Auth0
+import threading
+import time
+from typing import Optional, Any, Callable
+from urllib.parse import quote
 
 from ..constants import (
-    AUTH0_DOMAIN, NON_INTERACTIVE_CLIENT_ID, NON_INTERACTIVE_CLIENT_SECRET,
-    TEAM_MANAGER_ROLE_ID, TEAM_PLAYER_ROLE_ID, MANAGER_ROLE, PLAYER_ROLE
+    NON_INTERACTIVE_CLIENT_ID, NON_INTERACTIVE_CLIENT_SECRET,
+    TEAM_MANAGER_ROLE_ID, TEAM_PLAYER_ROLE_ID, MANAGER_ROLE, PLAYER_ROLE,
+    MGMT_TOKEN_REFRESH_MARGIN, USER_CACHE_TTL, USER_CACHE_STALE_TTL
     )
-from .misc import auth0_url
-from ..models import M_ID, M_ROLE
-from ..services import get_role_by_role
+from .http_client import get_http_client
+from .misc import auth0_url, config_value
+from .user_cache import (CoalescingTtlCache, DEFAULT_USER_CACHE_TTL,
+                         DEFAULT_USER_CACHE_STALE_TTL
+                         )
+from ..models import M_ROLE
+from ..services import get_role_id
+from ..util import logger, fmt_log
+
+DEFAULT_MGMT_TOKEN_REFRESH_MARGIN = 300  # Default refresh margin in seconds.
+MGMT_TOKEN_RETRY_INTERVAL = 30  # Background refresh retry time in seconds.
+# Token lifetime in seconds if not specified in the client credentials
+# response; the Auth0 default management API token lifetime.
+DEFAULT_MGMT_TOKEN_LIFETIME = 86400
+
+# Fields from the client credentials response
+# https://auth0.com/docs/api/authentication#client-credentials-flow
+ACCESS_TOKEN_FIELD = 'access_token'
+EXPIRES_IN_FIELD = 'expires_in'
+
+# Fields of user details required from the management api
+# https://auth0.com/docs/manage-users/user-accounts/user-profiles/user-profile-structure
+USER_FIELDS = ['user_id', 'email', 'logins_count']
+
+MGMT_API_PATH = '/api/v2/'
+MAX_PER_PAGE = 100      # Max number of results per page.
+
+
+class MgmtApiClient:
+    """
+    Client for the Auth0 management API.
+    """
+
+    def __init__(self, token: str):
+        """
+        Constructor
+        :param token: management API token
+        """
+        self._headers = {'Authorization': f'Bearer {token}'}
+
+    def _get(self, endpoint: str, path: str, params: dict = None) -> Any:
+        return get_http_client().get_json(
+            f'mgmt:{endpoint}', auth0_url(f'{MGMT_API_PATH}{path}'),
+            params=params, headers=self._headers)
+
+    def _post(self, endpoint: str, path: str, data: Any) -> Any:
+        return get_http_client().post_json(
+            f'mgmt:{endpoint}', auth0_url(f'{MGMT_API_PATH}{path}'), data,
+            headers=self._headers)
+
+    def search_users_by_email(self, email: str,
+                              fields: list[str] = None) -> list[dict]:
+        """
+        Search for users by email.
+        :param email: email of user to search for
+        :param fields: fields to include in result
+        :return: list of users
+        """
+        # https://auth0.com/docs/api/management/v2/#!/Users_By_Email/get_users_by_email
+        return self._get('users-by-email', 'users-by-email',
+                         params=_fields_params(fields) | {'email': email})
+
+    def add_role_users(self, role_id: str, users: list[str]):
+        """
+        Assign users to a role.
+        :param role_id: auth0 role id
+        :param users: list of auth0 user ids
+        """
+        # https://auth0.com/docs/api/management/v2#!/Roles/post_role_users
+        self._post('roles-users', f'roles/{quote(role_id, safe="")}/users',
+                   {'users': users})
+
+    def list_role_permissions(self, role_id: str) -> list[dict]:
+        """
+        Get the permissions of a role.
+        :param role_id: auth0 role id
+        :return: list of permissions
+        """
+        # https://auth0.com/docs/api/management/v2#!/Roles/get_role_permission
+        return self._get(
+            'roles-permissions',
+            f'roles/{quote(role_id, safe="")}/permissions',
+            params={'per_page': MAX_PER_PAGE})
+
+
+def _fields_params(fields: Optional[list[str]]) -> dict:
+    """
+    Generate the query parameters to select result fields.
+    :param fields: fields to include in result
+    :return: query parameters
+    """
+    return {
+        'fields': ','.join(fields),
+        'include_fields': 'true'
+    } if fields else {}
+
+
+class MgmtTokenManager:
+    """
+    Manager for the Auth0 management API token and client.
+    The token is fetched on first use, and refreshed in the background before
+    it expires. A single client is shared until the token is replaced.
+    Only one thread fetches a token at a time, and the current token continues
+    to be served while a refresh is in progress.
+    """
+
+    def __init__(self, fetch: Callable[[], dict],
+                 client_factory: Callable[[str], Any],
+                 refresh_margin: int = DEFAULT_MGMT_TOKEN_REFRESH_MARGIN):
+        """
+        Constructor
+        :param fetch:           function to fetch a client credentials token
+        :param client_factory:  function to create a client for a token
+        :param refresh_margin:  time in seconds before expiry to refresh token
+        """
+        self._fetch = fetch
+        self._client_factory = client_factory
+        self._refresh_margin = refresh_margin
+
+        self._token = None      # Current token.
+        self._expires = 0.0     # Monotonic time token expires.
+        self._client = None     # Client for current token.
+        self._timer = None      # Background refresh timer.
+        self._generation = 0    # Incremented on every token installed.
+
+        self._lock = threading.Lock()   # Guards the token.
+        self._fetch_lock = threading.Lock()  # Single-flight fetch lock.
+
+    def _valid(self, now: float) -> bool:
+        """
+        Check if the current token is valid.
+        Note: must be called while holding the lock.
+        :param now: current monotonic time
+        :return: True if valid
+        """
+        return self._token is not None and now < self._expires
+
+    def _schedule(self, delay: float):
+        """
+        Schedule a background refresh.
+        Note: must be called while holding the lock.
+        :param delay: time in seconds until refresh
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(max(delay, 0), self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _install(self, response: dict):
+        """
+        Install a new token.
+        Note: must be called while holding the lock.
+        :param response: client credentials response
+        """
+        expires_in = response.get(EXPIRES_IN_FIELD, None)
+        if expires_in is None:
+            expires_in = DEFAULT_MGMT_TOKEN_LIFETIME
+
+        self._token = response[ACCESS_TOKEN_FIELD]
+        self._expires = time.monotonic() + expires_in
+        self._client = None     # Client is created on demand.
+        self._generation = self._generation + 1
 
-mgmt_api_token: str = None
+        if expires_in > self._refresh_margin:
+            self._schedule(expires_in - self._refresh_margin)
 
-auth0_mgmt: Auth0 = None
+    def _refresh(self, generation: int) -> str:
+        """
+        Fetch and install a new token, or wait for the fetch in progress to
+        complete.
+        :param generation: token generation which requires replacement; if a
+                           valid token has been installed since, no fetch is
+                           performed
+        :return: token
+        """
+        with self._fetch_lock:
+            with self._lock:
+                if generation != self._generation and \
+                        self._valid(time.monotonic()):
+                    # Another thread refreshed in the meantime.
+                    return self._token
+
+            response = self._fetch()
+
+            with self._lock:
+                self._install(response)
+                return self._token
+
+    def _background_refresh(self):
+        """
+        Refresh the token in the background. The current token remains in use
+        while the new token is fetched.
+        """
+        if not self._fetch_lock.acquire(blocking=False):
+            return  # Fetch already in progress.
+        try:
+            try:
+                response = self._fetch()
+            except Exception as e:
+                response = None
+                logger().warning(
+                    fmt_log(f"Management API token refresh failed: {e}"))
+
+            with self._lock:
+                if response is not None:
+                    self._install(response)
+                elif self._valid(time.monotonic()):
+                    # Retry while the current token is valid, otherwise the
+                    # next request will fetch a new token.
+                    self._schedule(MGMT_TOKEN_RETRY_INTERVAL)
+        finally:
+            self._fetch_lock.release()
+
+    def _current(self) -> tuple[Optional[str], int]:
+        """
+        Get the current token.
+        :return: tuple of token, or None if not valid, and token generation
+        """
+        with self._lock:
+            token = self._token if self._valid(time.monotonic()) else None
+            return token, self._generation
+
+    def get_token(self) -> str:
+        """
+        Get the management API token, fetching a new token if required.
+        :return: token
+        """
+        token, generation = self._current()
+        if token is None:
+            token = self._refresh(generation)
+        return token
+
+    def get_client(self) -> Any:
+        """
+        Get the management API client, fetching a new token if required.
+        :return: client
+        """
+        token = self.get_token()
+        with self._lock:
+            if token != self._token:
+                # Token replaced in the meantime; it's still valid, so use it.
+                return self._client_factory(token)
+            if self._client is None:
+                self._client = self._client_factory(token)
+            return self._client
+
+    def invalidate(self):
+        """
+        Invalidate the current token and client.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._token = None
+            self._expires = 0.0
+            self._client = None
+
+
+mgmt_token_manager: MgmtTokenManager = None
+
+user_cache: CoalescingTtlCache = CoalescingTtlCache()
 
 config: dict = None
 
@@ -33,21 +290,53 @@ def setup_mgmt(cfg: dict):
     global config
     config = cfg
 
-    global mgmt_api_token
-    mgmt_api_token = get_mgmt_api_token()
+    # The token is fetched on first use, so startup doesn't wait on Auth0.
+    global mgmt_token_manager
+    if mgmt_token_manager is not None:
+        mgmt_token_manager.invalidate()
+    mgmt_token_manager = MgmtTokenManager(
+        request_mgmt_api_token,
+        MgmtApiClient,
+        refresh_margin=config_value(cfg, MGMT_TOKEN_REFRESH_MARGIN,
+                                    DEFAULT_MGMT_TOKEN_REFRESH_MARGIN)
+    )
 
-    global auth0_mgmt
-    auth0_mgmt = Auth0(config[AUTH0_DOMAIN], mgmt_api_token)
+    global user_cache
+    user_cache = CoalescingTtlCache(
+        ttl=config_value(cfg, USER_CACHE_TTL, DEFAULT_USER_CACHE_TTL),
+        stale_ttl=config_value(cfg, USER_CACHE_STALE_TTL,
+                               DEFAULT_USER_CACHE_STALE_TTL)
+    )
 
 
-def get_user_by_email(email: str) -> Optional[dict]:
+def get_mgmt_client() -> MgmtApiClient:
+    """
+    Get the Auth0 management API client.
+    :return: client
+    """
+    return mgmt_token_manager.get_client()
+
+
+def get_user_by_email(email: str, refresh: bool = False) -> Optional[dict]:
     """
     Get user details from the management api
     :param email: email of user to search for
+    :param refresh: bypass the cache and fetch the latest details
+    :return:
+    """
+    return user_cache.get(('email', email),
+                          lambda: _search_user_by_email(email),
+                          refresh=refresh)
+
+
+def _search_user_by_email(email: str) -> Optional[dict]:
+    """
+    Search for a user in the management api
+    :param email: email of user to search for
     :return:
     """
-    # https://auth0.com/docs/api/management/v2/#!/Users/get_users
-    response = auth0_mgmt.users_by_email.search_users_by_email(email)
+    response = get_mgmt_client().search_users_by_email(
+        email, fields=USER_FIELDS)
 
     # [{'created_at': '2021-05-25T15:53:25.531Z',
     # 'email': 'player1@teampicker.com', 'email_verified': False,
@@ -70,19 +359,27 @@ def get_user_by_email(email: str) -> Optional[dict]:
     return user
 
 
+def request_mgmt_api_token() -> dict:
+    """
+    Request a management API token from Auth0.
+    :return: client credentials response
+    """
+    # https://auth0.com/docs/api/authentication#client-credentials-flow
+    return get_http_client().post_json(
+        'oauth/token', auth0_url('/oauth/token'), {
+            'grant_type': 'client_credentials',
+            'client_id': config[NON_INTERACTIVE_CLIENT_ID],
+            'client_secret': config[NON_INTERACTIVE_CLIENT_SECRET],
+            'audience': auth0_url(MGMT_API_PATH)
+        })
+
+
 def get_mgmt_api_token() -> str:
     """
-    Handle Auth0 callback in AUTHLIB mode
-    :return:
+    Get the management API token.
+    :return: token
     """
-    # https://github.com/auth0/auth0-python#management-sdk
-    get_token = GetToken(
-        config[AUTH0_DOMAIN], config[NON_INTERACTIVE_CLIENT_ID],
-        client_secret=config[NON_INTERACTIVE_CLIENT_SECRET])
-    token = get_token.client_credentials(
-        auth0_url('/api/v2/')
-    )
-    return token['access_token']
+    return mgmt_token_manager.get_token()
 
 
 def _get_auth0_role_id(role_id: str) -> tuple[Any, Any]:
@@ -92,8 +389,7 @@ def _get_auth0_role_id(role_id: str) -> tuple[Any, Any]:
     :return:
     """
     for role_title in _ROLE_TITLES_:
-        role = get_role_by_role(role_title)
-        if role[M_ID] == role_id:
+        if get_role_id(role_title) == role_id:
             role_auth0_id = config[_ROLES_[role_title]]
             break
     else:
@@ -111,10 +407,9 @@ def add_user_role(role_id: str, user_id: str) -> Optional[dict]:
     """
     role_auth0_id, role_title = _get_auth0_role_id(role_id)
 
-    # https://auth0.com/docs/api/management/v2#!/Users/post_user_roles
-    response = auth0_mgmt.roles.add_users(role_auth0_id, [user_id])
+    get_mgmt_client().add_role_users(role_auth0_id, [user_id])
     # No response content on success.
-    response[M_ROLE] = role_title
+    response = {M_ROLE: role_title}
 
     return response
 
@@ -127,7 +422,6 @@ def get_role_permissions(role_id: str) -> list[str]:
     """
     role_auth0_id, role_title = _get_auth0_role_id(role_id)
 
-    # https://auth0.com/docs/api/management/v2#!/Roles/get_role_permission
-    response = auth0_mgmt.roles.list_permissions(role_auth0_id)
+    response = get_mgmt_client().list_role_permissions(role_auth0_id)
 
-    return [n["permission_name"] for n in response["permissions"]]
+    return [n["permission_name"] for n in response]
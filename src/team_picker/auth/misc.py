@@ -1,7 +1,8 @@
 from ..constants import (ACCESS_TOKEN, DB_ID, ROLE_PERMISSIONS, PLAYER_ROLE,
-                         MANAGER_ROLE, FULLNAME, SETUP_COMPLETE
+                         MANAGER_ROLE, FULLNAME, SETUP_STATE
                          )
 from ..models import M_AUTH0_ID, M_NAME, M_TEAM, M_TEAM_ID, M_ROLE_ID, M_ROLE
+from ..util import config_value
 
 AUTH0_BASE_URL = ''
 
@@ -15,7 +16,7 @@ USERINFO_UPDATED_AT = 'updated_at'
 
 # Session profile keys
 PROFILE_KEYS = [M_AUTH0_ID, M_NAME, USERINFO_PICTURE, FULLNAME,
-                ACCESS_TOKEN, DB_ID, SETUP_COMPLETE,
+                ACCESS_TOKEN, DB_ID, SETUP_STATE,
                 M_TEAM_ID, M_TEAM,
                 M_ROLE_ID, M_ROLE, MANAGER_ROLE, PLAYER_ROLE, ROLE_PERMISSIONS,
                 ]
@@ -32,5 +33,3 @@ def get_auth0_base_url():
 
 def auth0_url(path: str):
     return f'{AUTH0_BASE_URL}{"" if path.startswith("/") else "/"}{path}'
-
-
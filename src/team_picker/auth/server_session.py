@@ -7,8 +7,10 @@ from typing import Any
 
 from .exception import AuthError
 from .misc import PROFILE_KEYS
+from .token_cache import evict_verified_token
 from ..constants import PROFILE_KEY, MANAGER_ROLE, PLAYER_ROLE, SESSION_TYPE, \
-    FILESYSTEM_SESSION_TYPE, SQLALCHEMY_SESSION_TYPE, SESSION_TYPES
+    FILESYSTEM_SESSION_TYPE, SQLALCHEMY_SESSION_TYPE, SESSION_TYPES, \
+    ACCESS_TOKEN
 from ..util import logger, fmt_log
 
 session = {}    # Default, server-side sessions disabled.
@@ -77,8 +79,12 @@ def session_profile():
 
 def session_clear():
     """
-    Clear the session.
+    Clear the session, and remove the session's access token from the verified
+    token cache.
     """
+    profile = get_session_value(PROFILE_KEY)
+    if isinstance(profile, dict):
+        evict_verified_token(profile.get(ACCESS_TOKEN, None))
     session.clear()
 
 
@@ -0,0 +1,154 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from .misc import config_value
+from ..constants import TOKEN_CACHE_SIZE
+
+DEFAULT_TOKEN_CACHE_SIZE = 1024    # Default max number of cached tokens.
+
+# Claim from the JWT payload
+# https://datatracker.ietf.org/doc/html/rfc7519#section-4.1.4
+JWT_EXP = 'exp'
+
+
+def token_digest(token: str) -> str:
+    """
+    Generate the cache key for a token.
+    :param token: token
+    :return: digest of token
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class VerifiedTokenCache:
+    """
+    Bounded least recently used cache of verified token payloads, keyed by
+    token digest. Entries are valid until the token expires.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_TOKEN_CACHE_SIZE):
+        """
+        Constructor
+        :param max_size: max number of cached tokens
+        """
+        self._max_size = max_size
+        self._entries = OrderedDict()   # Tuples of expiry and payload.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[dict]:
+        """
+        Get the verified payload for a token.
+        :param token: token
+        :return: payload or None if not cached
+        """
+        key = token_digest(token)
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None:
+                expires, payload = entry
+                if time.time() < expires:
+                    self._entries.move_to_end(key)
+                    self.hits = self.hits + 1
+                    return payload
+                # Token has expired.
+                del self._entries[key]
+            self.misses = self.misses + 1
+        return None
+
+    def put(self, token: str, payload: dict):
+        """
+        Add the verified payload for a token.
+        :param token: token
+        :param payload: verified payload
+        """
+        expires = payload.get(JWT_EXP, None)
+        if self._max_size <= 0 or not isinstance(expires, (int, float)):
+            return  # Caching disabled or no expiry to bound entry.
+
+        key = token_digest(token)
+        with self._lock:
+            self._entries[key] = (expires, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, token: str):
+        """
+        Remove a token from the cache.
+        :param token: token
+        """
+        key = token_digest(token)
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Clear the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Get the cache statistics.
+        :return: dict of size, hits and misses
+        """
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+token_cache: VerifiedTokenCache = VerifiedTokenCache()
+
+
+def setup_token_cache(cfg: dict):
+    """
+    Initialise the verified token cache.
+    :param cfg: configuration
+    """
+    global token_cache
+    token_cache = VerifiedTokenCache(
+        max_size=config_value(cfg, TOKEN_CACHE_SIZE, DEFAULT_TOKEN_CACHE_SIZE))
+
+
+def get_verified_token(token: str) -> Optional[dict]:
+    """
+    Get the verified payload for a token.
+    :param token: token
+    :return: payload or None if not cached
+    """
+    return token_cache.get(token)
+
+
+def add_verified_token(token: str, payload: dict):
+    """
+    Add the verified payload for a token.
+    :param token: token
+    :param payload: verified payload
+    """
+    token_cache.put(token, payload)
+
+
+def evict_verified_token(token: Optional[str]):
+    """
+    Remove a token from the verified token cache.
+    :param token: token
+    """
+    if isinstance(token, str):
+        token_cache.evict(token)
+
+
+def token_cache_stats() -> dict:
+    """
+    Get the verified token cache statistics.
+    :return: dict of size, hits and misses
+    """
+    return token_cache.stats()
@@ -0,0 +1,138 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+from ..util import logger, fmt_log
+
+DEFAULT_USER_CACHE_TTL = 300        # Default user cache time in seconds.
+DEFAULT_USER_CACHE_STALE_TTL = 60   # Default stale window in seconds.
+DEFAULT_USER_CACHE_SIZE = 1024      # Default max number of cached users.
+
+
+class CoalescingTtlCache:
+    """
+    Time to live cache of remotely loaded records.
+    Concurrent loads of the same key are coalesced into a single load.
+    Once an entry has expired it may still be returned for a further stale
+    window, while it is reloaded in the background.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_USER_CACHE_TTL,
+                 stale_ttl: float = DEFAULT_USER_CACHE_STALE_TTL,
+                 max_size: int = DEFAULT_USER_CACHE_SIZE):
+        """
+        Constructor
+        :param ttl:         time in seconds for which an entry is fresh
+        :param stale_ttl:   time in seconds after expiry for which an entry
+                            may be returned while it is reloaded
+        :param max_size:    max number of cached entries
+        """
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._max_size = max_size
+
+        self._entries = {}      # Tuples of load time and value by key.
+        self._loading = {}      # Futures of loads in progress by key.
+        self._lock = threading.Lock()
+
+    def _store(self, key: Hashable, value: Any):
+        """
+        Store an entry.
+        Note: must be called while holding the lock.
+        :param key: key
+        :param value: value
+        """
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic(), value)
+        while len(self._entries) > self._max_size:
+            # Discard oldest entry.
+            del self._entries[next(iter(self._entries))]
+
+    def _load(self, key: Hashable, loader: Callable[[], Any],
+              future: Future):
+        """
+        Load an entry, and complete the future for the load.
+        :param key: key
+        :param loader: function to load value
+        :param future: future for load
+        """
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                self._loading.pop(key, None)
+            future.set_exception(e)
+        else:
+            with self._lock:
+                self._loading.pop(key, None)
+                if self._max_size > 0:
+                    self._store(key, value)
+            future.set_result(value)
+
+    def _revalidate(self, key: Hashable, loader: Callable[[], Any],
+                    future: Future):
+        """
+        Reload a stale entry in the background.
+        :param key: key
+        :param loader: function to load value
+        :param future: future for load
+        """
+        self._load(key, loader, future)
+        error = future.exception()
+        if error is not None:
+            logger().warning(fmt_log(f"Revalidation of {key} failed: {error}"))
+
+    def get(self, key: Hashable, loader: Callable[[], Any],
+            refresh: bool = False) -> Any:
+        """
+        Get a value.
+        :param key: key
+        :param loader: function to load value if required
+        :param refresh: load value even if cached
+        :return: value
+        """
+        now = time.monotonic()
+        owner = False
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None and not refresh:
+                loaded, value = entry
+                age = now - loaded
+                if age < self._ttl:
+                    return value
+                if age < self._ttl + self._stale_ttl:
+                    # Stale, return cached value and reload in background.
+                    if key not in self._loading:
+                        future = Future()
+                        self._loading[key] = future
+                        threading.Thread(
+                            target=self._revalidate,
+                            args=(key, loader, future), daemon=True).start()
+                    return value
+
+            future = self._loading.get(key, None)
+            if future is None:
+                future = Future()
+                self._loading[key] = future
+                owner = True
+
+        if owner:
+            self._load(key, loader, future)
+        # Wait for the load in progress.
+        return future.result()
+
+    def evict(self, key: Hashable):
+        """
+        Remove an entry.
+        :param key: key
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Clear the cache.
+        """
+        with self._lock:
+            self._entries.clear()
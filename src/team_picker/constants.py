@@ -28,10 +28,41 @@ DB_HOST = f'{DB_CONFIG_VAR_PREFIX}HOST'
 DB_PORT = f'{DB_CONFIG_VAR_PREFIX}PORT'
 DB_DATABASE = f'{DB_CONFIG_VAR_PREFIX}DATABASE'
 DB_INSTANCE_RELATIVE_CONFIG = f'{DB_CONFIG_VAR_PREFIX}INSTANCE_RELATIVE_CONFIG'
+# Read replica related (optional, all reads use the primary if not configured)
+DB_REPLICA_URI = f'{DB_CONFIG_VAR_PREFIX}REPLICA_URI'
+DB_REPLICA_URI_ENV_VAR = f'{DB_CONFIG_VAR_PREFIX}REPLICA_URI_ENV_VAR'
+# Use a single transaction per request, rather than per database operation
+# (optional, enabled if not configured).
+DB_UNIT_OF_WORK = f'{DB_CONFIG_VAR_PREFIX}UNIT_OF_WORK'
+
+# Database engine related (optional, defaults are used if not configured)
+# Number of connections kept open in the pool.
+DB_POOL_SIZE = f'{DB_CONFIG_VAR_PREFIX}POOL_SIZE'
+# Max number of connections opened in addition to the pool size.
+DB_MAX_OVERFLOW = f'{DB_CONFIG_VAR_PREFIX}MAX_OVERFLOW'
+# Time in seconds to wait for a connection from the pool.
+DB_POOL_TIMEOUT = f'{DB_CONFIG_VAR_PREFIX}POOL_TIMEOUT'
+# Time in seconds after which a connection is replaced, -1 to disable.
+DB_POOL_RECYCLE = f'{DB_CONFIG_VAR_PREFIX}POOL_RECYCLE'
+# Test connections for liveness when they are taken from the pool.
+DB_POOL_PRE_PING = f'{DB_CONFIG_VAR_PREFIX}POOL_PRE_PING'
+# Max time in milliseconds a statement may run, 0 to disable (PostgreSQL).
+DB_STATEMENT_TIMEOUT = f'{DB_CONFIG_VAR_PREFIX}STATEMENT_TIMEOUT'
+# SQLite journal mode, synchronous setting and busy timeout in milliseconds.
+DB_SQLITE_JOURNAL_MODE = f'{DB_CONFIG_VAR_PREFIX}SQLITE_JOURNAL_MODE'
+DB_SQLITE_SYNCHRONOUS = f'{DB_CONFIG_VAR_PREFIX}SQLITE_SYNCHRONOUS'
+DB_SQLITE_BUSY_TIMEOUT = f'{DB_CONFIG_VAR_PREFIX}SQLITE_BUSY_TIMEOUT'
+
+DB_ENGINE_CONFIG_KEYS = [DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+                         DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+                         DB_STATEMENT_TIMEOUT, DB_SQLITE_JOURNAL_MODE,
+                         DB_SQLITE_SYNCHRONOUS, DB_SQLITE_BUSY_TIMEOUT]
 
 DB_CONFIG_VARIABLES = [DB_URI, DB_URI_ENV_VAR, DB_DIALECT, DB_DRIVER,
                        DB_USERNAME, DB_PASSWORD, DB_HOST, DB_PORT, DB_DATABASE,
-                       DB_INSTANCE_RELATIVE_CONFIG]
+                       DB_INSTANCE_RELATIVE_CONFIG, DB_REPLICA_URI,
+                       DB_REPLICA_URI_ENV_VAR, DB_UNIT_OF_WORK] + \
+    DB_ENGINE_CONFIG_KEYS
 
 # Auth0 related
 AUTH0_CLIENT_ID = 'AUTH0_CLIENT_ID'
@@ -56,6 +87,38 @@ AUTH_CONFIG_KEYS = [AUTH0_DOMAIN, ALGORITHMS, AUTH0_CLIENT_ID,
                     TEAM_PLAYER_ROLE_ID, TEAM_MANAGER_ROLE_ID
                     ]
 
+# Auth0 caching related (optional, defaults are used if not configured)
+# Time in seconds for which the JSON Web Key Set is cached.
+JWKS_CACHE_TTL = 'JWKS_CACHE_TTL'
+# Minimum time in seconds between JSON Web Key Set refreshes.
+JWKS_MIN_REFRESH_INTERVAL = 'JWKS_MIN_REFRESH_INTERVAL'
+# Max number of verified tokens cached, 0 to disable.
+TOKEN_CACHE_SIZE = 'TOKEN_CACHE_SIZE'
+# Time in seconds before expiry to refresh the management API token.
+MGMT_TOKEN_REFRESH_MARGIN = 'MGMT_TOKEN_REFRESH_MARGIN'
+# Time in seconds for which management API user details are cached.
+USER_CACHE_TTL = 'USER_CACHE_TTL'
+# Time in seconds after expiry for which cached user details may be used
+# while they are refreshed.
+USER_CACHE_STALE_TTL = 'USER_CACHE_STALE_TTL'
+
+AUTH_CACHE_CONFIG_KEYS = [JWKS_CACHE_TTL, JWKS_MIN_REFRESH_INTERVAL,
+                          TOKEN_CACHE_SIZE, MGMT_TOKEN_REFRESH_MARGIN,
+                          USER_CACHE_TTL, USER_CACHE_STALE_TTL]
+
+# Outbound HTTP related (optional, defaults are used if not configured)
+# Connect timeout in seconds.
+HTTP_CONNECT_TIMEOUT = 'HTTP_CONNECT_TIMEOUT'
+# Read timeout in seconds.
+HTTP_READ_TIMEOUT = 'HTTP_READ_TIMEOUT'
+# Max number of retries of failed requests.
+HTTP_RETRIES = 'HTTP_RETRIES'
+# Max number of pooled connections per host.
+HTTP_POOL_SIZE = 'HTTP_POOL_SIZE'
+
+HTTP_CONFIG_KEYS = [HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_RETRIES,
+                    HTTP_POOL_SIZE]
+
 
 # Session related.
 SESSION_TYPE = 'SESSION_TYPE'
@@ -70,7 +133,8 @@ SESSION_TYPES = [FILESYSTEM_SESSION_TYPE, SQLALCHEMY_SESSION_TYPE]
 ALL_CONFIG_VARIABLES = [
     APP_CONFIG_PATH, INST_REL_CONFIG, DEBUG, TESTING, LOG_LEVEL,
     SECRET_KEY,
-] + CMD_LINE_ARGS + DB_CONFIG_VARIABLES + AUTH_CONFIG_KEYS + SESSION_CONFIG_KEYS
+] + CMD_LINE_ARGS + DB_CONFIG_VARIABLES + AUTH_CONFIG_KEYS + \
+    AUTH_CACHE_CONFIG_KEYS + HTTP_CONFIG_KEYS + SESSION_CONFIG_KEYS
 
 
 # Request methods
@@ -79,6 +143,10 @@ PATCH = 'PATCH'
 POST = 'POST'
 DELETE = 'DELETE'
 
+TEXT_HTML = 'text/html'
+APPLICATION_JSON = 'application/json'
+APPLICATION_NDJSON = 'application/x-ndjson'
+
 
 # API routes related
 API_URL = "/api"
@@ -97,6 +165,7 @@ TEAM_BY_ID_URL = f"{TEAMS_URL}/<int:{TEAM_ID_PARAM}>"
 MATCHES_URL = f"{API_URL}/matches"
 NEW_MATCH_URL = f"{MATCHES_URL}/new"
 MATCH_BY_ID_URL = f"{MATCHES_URL}/<int:{MATCH_ID_PARAM}>"
+MATCH_SELECTIONS_URL = f"{MATCH_BY_ID_URL}/selections"
 
 # UI routes related
 HOME_URL = "/"
@@ -124,6 +193,9 @@ UPDATE_QUERY = "update"
 SELECTIONS_QUERY = "selections"
 SEARCH_QUERY = "search"
 ORDER_QUERY = "order"
+LIMIT_QUERY = "limit"
+CURSOR_QUERY = "cursor"
+STREAM_QUERY = "stream"
 ORDER_DATE_ASC = "date_asc"
 ORDER_DATE_DESC = "date_desc"
 
@@ -156,9 +228,11 @@ RESULT_ONE_TEAM = "team"                # Single team result.
 RESULT_LIST_TEAMS = "teams"             # List of teams result.
 RESULT_ONE_MATCH = "match"              # Single match result.
 RESULT_LIST_MATCHES = "matches"         # List of matches result.
+RESULT_LIST_SELECTIONS = "selections"   # List of selections result.
 RESULT_CREATED_COUNT = "created"        # Created count result.
 RESULT_UPDATED_COUNT = "updated"        # Updated count result.
 RESULT_DELETED_COUNT = "deleted"        # Deleted count result.
+RESULT_NEXT_CURSOR = "next_cursor"      # Next page cursor result.
 
 
 # Permissions related.
@@ -188,6 +262,10 @@ ACCESS_TOKEN = 'access_token'
 DB_ID = 'db_id'
 ROLE_PERMISSIONS = 'role_permissions'
 FULLNAME = 'fullname'
+SETUP_STATE = 'setup_state'
+
+# Template context variables.
+# User setup complete flag, derived from the session setup state.
 SETUP_COMPLETE = 'setup_complete'
 
 
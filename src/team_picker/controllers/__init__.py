@@ -8,7 +8,7 @@ from .team_controller import (all_teams, get_team_by_id, create_team,
                               )
 from .match_controller_api import (all_matches_api, get_match_by_id_api,
                                    create_match_api, delete_match_api, 
-                                   update_match_api
+                                   update_match_api, match_selections_api
                                    )
 from .match_controller_ui import (matches_ui, create_match_ui, match_by_id_ui,
                                   delete_match_ui, search_match_ui,
@@ -41,6 +41,7 @@ __all__ = [
     "create_match_api",
     "delete_match_api",
     "update_match_api",
+    "match_selections_api",
 
     "matches_ui",
     "create_match_ui",
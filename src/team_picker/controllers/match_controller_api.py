@@ -6,15 +6,20 @@ from flask import (abort, request, make_response
 from ..auth.auth import requires_auth, AuthErrorMode
 from ..constants import (POST_MATCH_PERMISSION, DELETE_MATCH_PERMISSION,
                          PATCH_MATCH_PERMISSION, GET_MATCH_PERMISSION,
-                         RESULT_ONE_MATCH, ORDER_QUERY
+                         RESULT_ONE_MATCH, ORDER_QUERY, RESULT_UPDATED_COUNT,
+                         RESULT_LIST_SELECTIONS, RESULT_LIST_MATCHES,
+                         RESULT_NEXT_CURSOR
                          )
 from ..models import (M_START_TIME
                       )
 from ..services import (get_all_matches, get_match_by_id as get_match_by_id_svc,
+                        get_matches_page, page_args, stream_matches,
                         create_match as create_match_svc, delete_match_by_id,
-                        update_match as update_match_svc, match_exists
+                        update_match as update_match_svc, match_exists,
+                        selection_choices, set_selections,
+                        get_match_selections
                         )
-from ..util import success_result
+from ..util import success_result, stream_type, stream_result
 from ..util.exception import AbortError
 
 POST_PATCH_PERMISSION = [POST_MATCH_PERMISSION, PATCH_MATCH_PERMISSION]
@@ -52,8 +57,25 @@ def all_matches_api(payload: dict):
     :param payload: JWT payload
     :return:
     """
-    match_list = get_all_matches(
-        order_by=request.args.get(ORDER_QUERY, None, type=str))
+    order_by = request.args.get(ORDER_QUERY, None, type=str)
+    page = page_args(request.args)
+    if page is not None:
+        limit, cursor = page
+        match_list, next_cursor = get_matches_page(
+            limit, cursor=cursor, order_by=order_by)
+        return success_result(**{
+            RESULT_LIST_MATCHES: standardise_match_list(match_list),
+            RESULT_NEXT_CURSOR: next_cursor
+        })
+
+    mimetype = stream_type()
+    if mimetype is not None:
+        return stream_result(
+            RESULT_LIST_MATCHES,
+            map(standardise_match, stream_matches(order_by=order_by)),
+            mimetype)
+
+    match_list = get_all_matches(order_by=order_by)
 
     return success_result(
         matches=standardise_match_list(match_list)
@@ -141,3 +163,26 @@ def update_match_api(payload: dict, match_id: int):
         success_result(**updated), HTTPStatus.OK)
 
 
+@requires_auth(PATCH_MATCH_PERMISSION, mode=AuthErrorMode.EXCEPTION)
+def match_selections_api(payload: dict, match_id: int):
+    """
+    Update the selection status of multiple users for a match via API
+    endpoint.
+    :param payload: JWT payload
+    :param match_id: id of match to update
+    :return:
+    """
+    if not match_exists(match_id):
+        abort(HTTPStatus.NOT_FOUND)
+    if not request.json:
+        raise AbortError(HTTPStatus.BAD_REQUEST,
+                         "Malformed request, expecting JSON.")
+
+    removed, added = set_selections(
+        match_id, selection_choices(request.get_json()))
+
+    return make_response(
+        success_result(**{
+            RESULT_UPDATED_COUNT: removed + added,
+            RESULT_LIST_SELECTIONS: get_match_selections(match_id)
+        }), HTTPStatus.OK)
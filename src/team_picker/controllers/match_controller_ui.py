@@ -3,9 +3,11 @@ from http import HTTPStatus
 from typing import Optional, Any, Union
 
 from flask import (abort, request, make_response, url_for,
-                   render_template, redirect, Response
+                   render_template, redirect, Response, current_app
                    )
+from flask_wtf.csrf import generate_csrf, validate_csrf
 from werkzeug.datastructures import MultiDict
+from wtforms import ValidationError
 
 from .match_controller_api import delete_match_impl
 from ..auth import get_profile_team_id
@@ -17,10 +19,12 @@ from ..constants import (POST_MATCH_PERMISSION, DELETE_MATCH_PERMISSION,
                          PATCH_MATCH_PERMISSION, GET_MATCH_PERMISSION,
                          NEW_QUERY, UPDATE_QUERY,
                          DASHBOARD_URL, ORDER_QUERY, GET, RESULT_UPDATED_COUNT,
+                         RESULT_LIST_SELECTIONS,
                          APP_DATETIME_FMT, SEARCH_QUERY,
                          OPPOSITION, DATE_RANGE, ORDER_DATE_DESC, APP_DATE_FMT,
                          SELECTIONS_QUERY, PLAYER_ROLE, POST, YES_ARG, NO_ARG,
-                         PATCH_OWN_MATCH_PERMISSION, TEAM, VENUE, PATCH
+                         PATCH_OWN_MATCH_PERMISSION, TEAM, VENUE, PATCH,
+                         TEXT_HTML, APPLICATION_JSON
                          )
 from ..forms import (
     MatchForm, set_match_form_choices_validators, MatchSearchForm,
@@ -28,20 +32,22 @@ from ..forms import (
 )
 from ..models import (M_START_TIME, M_HOME_ID, M_AWAY_ID, Match, M_ID,
                       M_SCORE_HOME, M_SCORE_AWAY, M_RESULT, M_NAME, M_SURNAME,
-                      M_SELECTIONS, entity_to_dict
+                      M_SELECTIONS, entity_to_dict, M_HOME_NAME, M_AWAY_NAME,
+                      M_SELECTED, M_CONFIRMED, Loading
                       )
 from ..models.exception import ModelError
-from ..services import (get_all_matches, get_match_by_id as get_match_by_id_svc,
+from ..services import (get_match_list, get_match_by_id as get_match_by_id_svc,
                         create_match as create_match_svc,
                         update_match as update_match_svc, get_team_name,
-                        get_users_by_role_and_team,
-                        get_role_by_role, set_selection,
-                        is_selected_and_confirmed, SelectChoice,
-                        set_confirmation, get_match_by_id_and_team, is_selected
+                        get_selection_roster,
+                        get_role_id, set_selection, set_selections,
+                        selection_choices,
+                        SelectChoice,
+                        set_confirmation, get_match_by_id_and_team
                         )
 from ..util import (
     FormArgs, VENUE_CHOICES, NO_OPTION_SELECTED, HOME_VENUE, AWAY_VENUE,
-    DateRange, DATE_RANGE_CHOICES
+    DateRange, DATE_RANGE_CHOICES, success_result
 )
 from ..util.exception import AbortError
 from ..util.misc import choose_by_ls_eq_gr, choose_by_home_venue, choose_by_eq
@@ -168,8 +174,7 @@ def matches_for_ui(order: str = None, criteria: dict = None):
         M_ID: match[M_ID],
         M_START_TIME: match[M_START_TIME].strftime(APP_DATETIME_FMT),
         VENUE: choose_by_home_id(match, "Home", "Away"),
-        OPPOSITION: get_team_name(
-            pick_by_home_id(match, M_AWAY_ID, M_HOME_ID)),
+        OPPOSITION: pick_by_home_id(match, M_AWAY_NAME, M_HOME_NAME),
         "result": choose_by_ls_eq_gr(
             # Test value is opposition team score.
             pick_by_home_id(match, M_SCORE_AWAY, M_SCORE_HOME),
@@ -188,12 +193,12 @@ def matches_for_ui(order: str = None, criteria: dict = None):
             "Draw",
             "Win"
         ) if match[M_RESULT] else "Result not final",
-        "score_tip": f"{get_team_name(match[M_HOME_ID])} {match[M_SCORE_HOME]}"
+        "score_tip": f"{match[M_HOME_NAME]} {match[M_SCORE_HOME]}"
                      f" - "
-                     f"{get_team_name(match[M_AWAY_ID])} {match[M_SCORE_AWAY]}",
+                     f"{match[M_AWAY_NAME]} {match[M_SCORE_AWAY]}",
         "score": f"{match[M_SCORE_HOME]} - {match[M_SCORE_AWAY]}"
                  if match[M_RESULT] else ""
-    } for match in get_all_matches(order_by=order, criteria=criteria)]
+    } for match in get_match_list(order_by=order, criteria=criteria)]
 
 
 def matches_render_args(action: ReqAction = ReqAction.LIST, match_id: int = 0):
@@ -384,7 +389,9 @@ def get_team_id_and_match(match_id: int):
             involved.
     """
     profile_team_id = get_profile_team_id()
-    match = get_match_by_id_and_team(match_id, profile_team_id)
+    # Selections are not required, as the selection views use the roster.
+    match = get_match_by_id_and_team(match_id, profile_team_id,
+                                     selections=Loading.NONE)
     if match is None:
         # None existent match or not user's team match.
         abort(HTTPStatus.NOT_FOUND)
@@ -450,22 +457,40 @@ def match_by_id_ui(payload: dict, match_id: int):
 
 
 def player_list_entry(match_id: int, player: dict):
-    selected, confirmed = is_selected_and_confirmed(match_id, player[M_ID])
+    """
+    Generate a selection list entry.
+    :param match_id: id of match
+    :param player: selection roster entry for player
+    :return:
+    """
     return {
         M_ID: player[M_ID],
         M_NAME: f"{player[M_NAME]} {player[M_SURNAME]}",
         'is_self': (player[M_ID] == get_profile_db_id()),
-        "selected": selected,
+        "selected": player[M_SELECTED],
         "toggle_select_url":
             url_for('match_user_selection',
                     match_id=match_id, user_id=player[M_ID]),
-        "confirmed": confirmed,
+        "confirmed": player[M_CONFIRMED],
         "confirm_select_url":
             url_for('match_user_confirm',
                     match_id=match_id, user_id=player[M_ID])
     }
 
 
+def check_csrf():
+    """
+    Check the CSRF token of a request which is not validated by a form. The
+    token is read from the 'X-CSRFToken' header or the 'csrf_token' field.
+    """
+    if current_app.config.get('WTF_CSRF_ENABLED', True):
+        try:
+            validate_csrf(request.headers.get('X-CSRFToken') or
+                          request.form.get('csrf_token'))
+        except ValidationError as e:
+            raise AbortError(HTTPStatus.BAD_REQUEST, str(e)) from e
+
+
 @requires_auth(permission=GET_MATCH_PERMISSION)
 def match_selections(payload: dict, match_id: int):
     """
@@ -475,10 +500,47 @@ def match_selections(payload: dict, match_id: int):
     :return:
 
     A GET returns the match selections
-    A POST persists the updates
+    A POST persists the updates, where the request body is a form or JSON
+    object of selection choices ('y', 'n' or 't') by user id, and returns
+    the selection roster for JSON, otherwise a redirect to the selections
     """
     profile_team_id, match = get_team_id_and_match(match_id)
 
+    if request.method == POST:
+        # Need patch/post for update.
+        auth_result = check_auth(permissions=POST_PATCH_PERMISSION,
+                                 join=Conjunction.OR)
+        if isinstance(auth_result, Response):
+            # Failed auth check, return redirect response.
+            return auth_result
+        check_csrf()
+
+        if request.is_json:
+            choices = request.get_json()
+        else:
+            # Only the per-user fields, named by user id, are choices; the
+            # last value is used, so a field may follow a default value.
+            choices = {
+                k: request.form.getlist(k)[-1]
+                for k in request.form.keys() if k.isdigit()
+            }
+        set_selections(match_id, selection_choices(choices),
+                       team_id=profile_team_id)
+
+        if not request.is_json:
+            # Redirect, so a refresh doesn't repeat the update.
+            return redirect(url_for('match_selections', match_id=match_id))
+
+    players = get_selection_roster(
+        match_id, get_role_id(PLAYER_ROLE), profile_team_id)
+
+    player_list = [
+        player_list_entry(match_id, player) for player in players
+    ]
+
+    if request.method == POST:
+        return success_result(**{RESULT_LIST_SELECTIONS: player_list})
+
     # Match data
     match_info = {
         VENUE: VENUE_CHOICES[
@@ -486,16 +548,11 @@ def match_selections(payload: dict, match_id: int):
         OPPOSITION: get_team_name(
             pick_by_home_id(match, M_AWAY_ID, M_HOME_ID)),
         M_START_TIME: match[M_START_TIME].strftime(APP_DATETIME_FMT),
-        M_ID: match[M_ID]
+        M_ID: match[M_ID],
+        "selections_url": url_for('match_selections', match_id=match_id),
+        "csrf_token": generate_csrf()
     }
 
-    players = get_users_by_role_and_team(
-        get_role_by_role(PLAYER_ROLE)[M_ID], profile_team_id)
-
-    player_list = [
-        player_list_entry(match_id, player) for player in players
-    ]
-
     return make_response(
         render_matches(action=ReqAction.SELECTIONS,
                        match=match_info,
@@ -505,6 +562,21 @@ def match_selections(payload: dict, match_id: int):
     )
 
 
+def selection_response(match_id: int, **kwargs) -> Response:
+    """
+    Generate the response to a selection or confirmation update.
+    :param match_id: id of match
+    :param kwargs:   updated state as key/value pairs
+    :return: the updated state if the request accepts json, otherwise a
+             redirect to the match selections
+    """
+    if request.accept_mimetypes.best_match(
+            [TEXT_HTML, APPLICATION_JSON]) == APPLICATION_JSON:
+        return success_result(**kwargs)
+    return redirect(
+        url_for('match_selections', match_id=match_id))
+
+
 @requires_auth(permissions=POST_PATCH_PERMISSION, join=Conjunction.OR)
 def match_user_selection(payload: dict, match_id: int, user_id: int):
     """
@@ -516,12 +588,11 @@ def match_user_selection(payload: dict, match_id: int, user_id: int):
     """
     profile_team_id, match = get_team_id_and_match(match_id)
 
-    set_selection(
+    selected = set_selection(
         match_id, user_id,
         SelectChoice.from_request(dflt_value=SelectChoice.TOGGLE))
 
-    return redirect(
-        url_for('match_selections', match_id=match_id))
+    return selection_response(match_id, **{M_SELECTED: selected})
 
 
 @requires_auth(permission=PATCH_OWN_MATCH_PERMISSION)
@@ -539,16 +610,14 @@ def match_user_confirm(payload: dict, match_id: int, user_id: int):
         # Managers don't play.
         abort(HTTPStatus.NOT_FOUND)
 
-    if not is_selected(match_id, user_id):
+    confirmed = set_confirmation(
+        match_id, user_id,
+        SelectChoice.from_request(dflt_value=SelectChoice.MAYBE))
+    if confirmed is None:
         # User not selected.
         abort(HTTPStatus.NOT_FOUND)
 
-    confirmed = SelectChoice.from_request(dflt_value=SelectChoice.MAYBE)
-
-    set_confirmation(match_id, user_id, confirmed)
-
-    return redirect(
-        url_for('match_selections', match_id=match_id))
+    return selection_response(match_id, **{M_CONFIRMED: confirmed})
 
 
 @requires_auth(DELETE_MATCH_PERMISSION)
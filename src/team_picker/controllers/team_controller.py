@@ -4,19 +4,21 @@ from flask import abort, request, make_response, redirect
 
 from .ui_controller import render_dashboard
 from ..auth.auth import (requires_auth, get_profile_db_id, AuthErrorMode,
-                         set_profile_team
+                         set_profile_team, invalidate_setup_state
                          )
 from ..constants import (POST_TEAM_PERMISSION, DELETE_TEAM_PERMISSION,
                          PATCH_TEAM_PERMISSION, GET_TEAM_PERMISSION,
-                         RESULT_CREATED_COUNT, DASHBOARD_URL, )
+                         RESULT_CREATED_COUNT, DASHBOARD_URL,
+                         RESULT_LIST_TEAMS, RESULT_NEXT_CURSOR)
 from ..forms import NewTeamForm
 from ..models import M_NAME, M_TEAM_ID, M_ID
 from ..services import (get_all_teams, get_team_by_id as get_team_by_id_svc,
+                        get_teams_page, page_args, stream_teams,
                         create_team as create_team_svc, delete_team_by_id,
                         update_team as update_team_svc, team_exists,
                         update_user
                         )
-from ..util import success_result
+from ..util import success_result, stream_type, stream_result
 from ..util.exception import AbortError
 
 
@@ -27,6 +29,19 @@ def all_teams(payload: dict):
     :param payload: JWT payload
     :return:
     """
+    page = page_args(request.args)
+    if page is not None:
+        limit, cursor = page
+        teams, next_cursor = get_teams_page(limit, cursor=cursor)
+        return success_result(**{
+            RESULT_LIST_TEAMS: teams,
+            RESULT_NEXT_CURSOR: next_cursor
+        })
+
+    mimetype = stream_type()
+    if mimetype is not None:
+        return stream_result(RESULT_LIST_TEAMS, stream_teams(), mimetype)
+
     teams = get_all_teams()
 
     return success_result(
@@ -130,6 +145,7 @@ def setup_team_ui(payload: dict):
             })
             # Update profile with new team info
             set_profile_team({M_ID: created[M_ID]})
+            invalidate_setup_state()
 
             response = redirect(location)
 
@@ -7,7 +7,7 @@ from werkzeug.exceptions import abort
 from .match_controller_ui import choose_by_home_id, pick_by_home_id
 from ..auth.auth import (requires_auth, get_profile_db_id,
                          get_jwt_payload, get_jwt_payload_updated_at,
-                         token_login_handling, check_setup_complete
+                         token_login_handling, get_setup_state
                          )
 from ..constants import (NEW_USER_QUERY,
                          NEW_TEAM_QUERY, SET_TEAM_QUERY, YES_ARG, NO_ARG,
@@ -16,8 +16,8 @@ from ..constants import (NEW_USER_QUERY,
 from ..forms import (RoleForm, set_role_form_choices_validators, NewTeamForm,
                      SetTeamForm, set_team_form_choices_validators
                      )
-from ..models import M_HOME_ID, M_AWAY_ID
-from ..services import get_selected_and_unconfirmed, get_team_name
+from ..models import M_HOME_NAME, M_AWAY_NAME
+from ..services import get_selected_and_unconfirmed
 from ..util import local_datetime
 
 
@@ -65,8 +65,7 @@ def render_dashboard(new_user=False,
         db_id = get_profile_db_id()
         for match in get_selected_and_unconfirmed(db_id):
             url = url_for('match_selections', match_id=match.id)
-            opposition = get_team_name(
-                pick_by_home_id(match, M_AWAY_ID, M_HOME_ID))
+            opposition = pick_by_home_id(match, M_AWAY_NAME, M_HOME_NAME)
 
             flash(
                 Markup(
@@ -100,7 +99,7 @@ def dashboard(payload: dict):
     Dashboard screen.
     :return:
     """
-    query = check_setup_complete()
+    query = get_setup_state()
     if query is not None:
         new_user = (NEW_USER_QUERY == query)
         new_team = (NEW_TEAM_QUERY == query)
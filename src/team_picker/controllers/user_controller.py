@@ -8,7 +8,8 @@ from ..auth import (add_user_role, get_role_permissions, get_profile_auth0_id,
                     set_profile_db_id, set_profile_team,
                     set_profile_role_permissions, set_profile_role,
                     set_profile_value, set_profile_name,
-                    requires_auth, Conjunction, AuthErrorMode
+                    requires_auth, Conjunction, AuthErrorMode,
+                    invalidate_setup_state
                     )
 
 from ..constants import (POST_USER_PERMISSION, DELETE_USER_PERMISSION,
@@ -18,7 +19,7 @@ from ..constants import (POST_USER_PERMISSION, DELETE_USER_PERMISSION,
                          UNASSIGNED_TEAM_NAME, DB_ID, MANAGER_ROLE,
                          NEW_TEAM_QUERY, ROLE_PERMISSIONS, PLAYER_ROLE,
                          SET_TEAM_QUERY, RESULT_UPDATED_COUNT, YES_ARG,
-                         RESULT_ONE_USER
+                         RESULT_ONE_USER, RESULT_LIST_USERS, RESULT_NEXT_CURSOR
                          )
 from ..forms import RoleForm, set_role_form_choices_validators, SetTeamForm, \
     set_team_form_choices_validators
@@ -26,11 +27,12 @@ from ..models import (M_ID, M_NAME, M_SURNAME, M_ROLE, M_ROLE_ID, M_AUTH0_ID,
                       M_TEAM_ID, M_TEAM
                       )
 from ..services import (get_all_users, get_user_by_id as get_user_by_id_svc,
+                        get_users_page, page_args, stream_users,
                         create_user as create_user_svc, delete_user_by_id,
                         update_user as update_user_svc, user_exists,
                         get_team_by_name, get_team_name
                         )
-from ..util import success_result
+from ..util import success_result, stream_type, stream_result
 from ..util.exception import AbortError
 
 
@@ -41,6 +43,19 @@ def all_users(payload: dict):
     :param payload: JWT payload
     :return:
     """
+    page = page_args(request.args)
+    if page is not None:
+        limit, cursor = page
+        users, next_cursor = get_users_page(limit, cursor=cursor)
+        return success_result(**{
+            RESULT_LIST_USERS: users,
+            RESULT_NEXT_CURSOR: next_cursor
+        })
+
+    mimetype = stream_type()
+    if mimetype is not None:
+        return stream_result(RESULT_LIST_USERS, stream_users(), mimetype)
+
     users = get_all_users()
 
     return success_result(
@@ -122,6 +137,7 @@ def setup_user(payload: dict):
         # free tier as far as I can tell.
         # So, get the permissions associated with the role of the new user.
         set_profile_role_permissions(get_role_permissions(form.role_id.data))
+        invalidate_setup_state()
 
         if result[M_ROLE] == MANAGER_ROLE:
             # Setup new team for manager.
@@ -213,6 +229,7 @@ def set_user_team(payload: dict, user_id: int):
 
         if updated[RESULT_UPDATED_COUNT] > 0:
             set_profile_value(M_TEAM, get_team_name(form.team_id.data))
+            invalidate_setup_state()
 
             response = redirect(DASHBOARD_URL)
 
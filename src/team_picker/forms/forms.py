@@ -12,10 +12,10 @@ from wtforms.validators import (
 from .validators import ValidateDateTime
 from ..models.exception import ModelError
 from ..constants import APP_DATETIME_FMT, APP_DATE_FMT
-from ..services import (get_all_roles, get_all_teams, get_unassigned_team_id,
-                        verify_match, get_all_team_names
+from ..services import (get_all_roles, get_team_choices,
+                        get_unassigned_team_id, verify_match, get_all_team_names
                         )
-from ..models import M_ID, M_ROLE, M_NAME, M_START_TIME, M_HOME_ID, M_AWAY_ID
+from ..models import M_ID, M_ROLE, M_START_TIME, M_HOME_ID, M_AWAY_ID
 from ..util import (
     current_datetime, FormArgs, NO_OPTION_SELECTED, HOME_VENUE, VENUE_CHOICES,
     VENUES, DateRange, DATE_RANGE_CHOICES, DATE_RANGES
@@ -85,14 +85,13 @@ def _team_choices_validators(exclude: Union[int, list[int]]) -> (list, list):
     :param exclude: id(s) of team(s) to exclude
     :return: tuple of choices, and valid options
     """
-    all_teams = get_all_teams()
+    all_teams = get_team_choices()
     if isinstance(exclude, list):
-        all_teams = [t for t in all_teams if t[M_ID] not in exclude]
+        all_teams = [t for t in all_teams if t[0] not in exclude]
     elif isinstance(exclude, int):
-        all_teams = [t for t in all_teams if t[M_ID] != exclude]
-    teams = [(t[M_ID], t[M_NAME]) for t in all_teams]
-    teams.insert(0, (NO_OPTION_SELECTED, 'Select team'))
-    team_options = [t[M_ID] for t in all_teams]
+        all_teams = [t for t in all_teams if t[0] != exclude]
+    teams = [(NO_OPTION_SELECTED, 'Select team')] + all_teams
+    team_options = [t[0] for t in all_teams]
 
     return teams, team_options
 
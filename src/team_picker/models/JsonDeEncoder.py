@@ -20,6 +20,14 @@ __ISO8601_REGEX__ = re.compile(
     r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}[\.\d{3,6}[\w]?]?',
     re.IGNORECASE)
 
+# Fields which are decoded as date/times.
+DATETIME_FIELDS = frozenset([
+    # Match
+    'start_time',
+    # Auth0 user profile
+    'created_at', 'updated_at', 'last_login', 'last_password_reset',
+])
+
 
 def _default(o: t.Any) -> t.Any:
     """
@@ -65,6 +73,42 @@ def _custom_decode(dct: dict, obj_hook: t.Callable = None):
     return obj_hook(dct) if obj_hook else dct
 
 
+def parse_datetime(value: str) -> t.Optional[datetime]:
+    """
+    Parse an ISO 8601 date/time.
+    :param value: string to parse
+    :return: date/time or None if not a date/time
+    """
+    if not __ISO8601_REGEX__.match(value):
+        return None
+    try:
+        # Fast path for the application & Auth0 patterns.
+        return datetime.fromisoformat(
+            f'{value[:-1]}+00:00' if value[-1] in 'Zz' else value)
+    except ValueError:
+        # Slower general-purpose parser for other variants.
+        return parse(value)
+
+
+def _datetime_fields_decode(fields: t.Collection[str]) -> t.Callable:
+    """
+    Generate an object_hook to decode only the specified date/time fields.
+    :param fields: names of date/time fields
+    :return: object_hook function
+    """
+    fields = frozenset(fields)
+
+    def decode(dct: dict):
+        for k, v in dct.items():
+            if k in fields and isinstance(v, str):
+                value = parse_datetime(v)
+                if value is not None:
+                    dct[k] = value
+        return dct
+
+    return decode
+
+
 class TPDefaultJSONProvider(DefaultJSONProvider):
     """Provide JSON operations using Python's built-in :mod:`json`
     library. Serializes the following additional data types:
@@ -87,6 +131,17 @@ class TPDefaultJSONProvider(DefaultJSONProvider):
     raise a ``TypeError``.
     """
 
+    datetime_fields: t.Optional[t.Collection[str]] = DATETIME_FIELDS
+    """Names of fields which are decoded as date/times. If ``None``, all
+    string values matching the ISO 8601 pattern are decoded.
+    """
+
+    def __init__(self, app) -> None:
+        super().__init__(app)
+        self._object_hook = _custom_decode \
+            if self.datetime_fields is None \
+            else _datetime_fields_decode(self.datetime_fields)
+
     def dumps(self, obj: t.Any, **kwargs: t.Any) -> str:
         """Serialize data as JSON to a string.
 
@@ -108,5 +163,5 @@ class TPDefaultJSONProvider(DefaultJSONProvider):
         :param s: Text or UTF-8 bytes.
         :param kwargs: Passed to :func:`json.loads`.
         """
-        kwargs.setdefault("object_hook", _custom_decode)
+        kwargs.setdefault("object_hook", self._object_hook)
         return json.loads(s, **kwargs)
@@ -1,13 +1,18 @@
-from .database import setup_db
-from .db_session import db_session, db
+from .database import setup_db, db_pool_stats
+from .db_session import db_session, db_read_session, pin_primary, db
 from .models import *
-from .models_misc import ResultType, MultiDictMixin, entity_to_dict
+from .models_misc import (ResultType, Loading, MultiDictMixin,
+                          entity_to_dict, Serialiser, serialiser
+                          )
 
 
 __all__ = [
     "setup_db",
+    "db_pool_stats",
 
     "db_session",
+    "db_read_session",
+    "pin_primary",
     "db",
 
     "Role",
@@ -34,8 +39,14 @@ __all__ = [
     "M_MATCH_ID",
     "M_USER_ID",
     "M_CONFIRMED",
+    "M_HOME_NAME",
+    "M_AWAY_NAME",
+    "M_SELECTED",
 
     "ResultType",
+    "Loading",
     "MultiDictMixin",
     "entity_to_dict",
+    "Serialiser",
+    "serialiser",
 ]
@@ -1,16 +1,103 @@
 import logging
 import os
+import threading
 import urllib.parse
+from typing import Optional
 
 from flask import Flask
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, URL, make_url
+from sqlalchemy.pool import QueuePool
 
 from .JsonDeEncoder import TPDefaultJSONProvider
-from .db_session import db
+from .db_session import (db, REPLICA_BIND, setup_unit_of_work,
+                         setup_read_your_writes
+                         )
 from .models import add_pre_configured
 from ..constants import *
-from ..util import logger, is_enabled_for, fmt_log
+from ..util import logger, is_enabled_for, fmt_log, config_value
+
+DEFAULT_DB_POOL_SIZE = 5            # Default number of pooled connections.
+DEFAULT_DB_MAX_OVERFLOW = 10        # Default max number of extra connections.
+DEFAULT_DB_POOL_TIMEOUT = 30        # Default pool wait in seconds.
+DEFAULT_DB_POOL_RECYCLE = 1800      # Default connection lifetime in seconds.
+DEFAULT_DB_POOL_PRE_PING = True     # Default test connections on checkout.
+DEFAULT_DB_STATEMENT_TIMEOUT = 0    # Default statement timeout, disabled.
+DEFAULT_DB_SQLITE_JOURNAL_MODE = None  # Default SQLite's journal mode.
+DEFAULT_DB_SQLITE_SYNCHRONOUS = None    # Default SQLite's synchronous.
+DEFAULT_DB_SQLITE_BUSY_TIMEOUT = 5000   # Default busy timeout in msec.
+DEFAULT_DB_UNIT_OF_WORK = True      # Default transaction per request.
+
+SQLITE_JOURNAL_MODES = ['DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL',
+                        'OFF']
+SQLITE_SYNCHRONOUS = ['OFF', 'NORMAL', 'FULL', 'EXTRA']
+
+
+class PoolStats:
+    """
+    Connection pool counters, recorded from the pool events of an engine.
+    """
+
+    def __init__(self, engine: Engine = None):
+        """
+        Constructor
+        :param engine: engine to record events of
+        """
+        self.engine = engine
+        self.connects = 0       # Number of new connections.
+        self.checkouts = 0      # Number of connections taken from the pool.
+        self.invalidated = 0    # Number of connections invalidated.
+        self.peak_overflow = 0  # Max number of overflow connections in use.
+        self._lock = threading.Lock()
+
+        if engine is not None:
+            event.listen(engine, 'connect', self._on_connect)
+            event.listen(engine, 'checkout', self._on_checkout)
+            event.listen(engine, 'invalidate', self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects = self.connects + 1
+
+    def _on_checkout(self, dbapi_connection, connection_record,
+                     connection_proxy):
+        pool = self.engine.pool
+        with self._lock:
+            self.checkouts = self.checkouts + 1
+            if isinstance(pool, QueuePool):
+                self.peak_overflow = max(self.peak_overflow, pool.overflow())
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidated = self.invalidated + 1
+
+    def to_dict(self) -> dict:
+        """
+        Get a dict representation.
+        :return: dict of counters and, for a queue pool, the current usage
+        """
+        with self._lock:
+            stats = {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'invalidated': self.invalidated,
+                'peak_overflow': self.peak_overflow,
+            }
+        pool = self.engine.pool if self.engine is not None else None
+        if isinstance(pool, QueuePool):
+            stats.update({
+                'size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                # Overflow counts up from -size as the pool fills.
+                'overflow': max(pool.overflow(), 0),
+            })
+        return stats
+
+
+pool_stats: dict[Optional[str], PoolStats] = {}     # Stats by bind key.
 
 
 def make_connection_uri(app: Flask, config: dict) -> str:
@@ -51,6 +138,115 @@ def make_connection_uri(app: Flask, config: dict) -> str:
     return uri
 
 
+def engine_options(url: URL, config: dict) -> dict:
+    """
+    Make the engine options.
+    See https://docs.sqlalchemy.org/en/20/core/pooling.html.
+    :param url:     database URL
+    :param config:  configuration
+    :return: dict of options
+    """
+    options = {
+        # Replace stale connections, e.g. following a database failover.
+        'pool_pre_ping': config_value(config, DB_POOL_PRE_PING,
+                                      DEFAULT_DB_POOL_PRE_PING),
+        'pool_recycle': config_value(config, DB_POOL_RECYCLE,
+                                     DEFAULT_DB_POOL_RECYCLE),
+    }
+    if url.get_backend_name() != 'sqlite' or \
+            url.database not in [None, '', ':memory:']:
+        # In-memory SQLite uses a single static connection.
+        options.update({
+            'pool_size': config_value(config, DB_POOL_SIZE,
+                                      DEFAULT_DB_POOL_SIZE),
+            'max_overflow': config_value(config, DB_MAX_OVERFLOW,
+                                         DEFAULT_DB_MAX_OVERFLOW),
+            'pool_timeout': config_value(config, DB_POOL_TIMEOUT,
+                                         DEFAULT_DB_POOL_TIMEOUT),
+        })
+
+    statement_timeout = config_value(config, DB_STATEMENT_TIMEOUT,
+                                     DEFAULT_DB_STATEMENT_TIMEOUT)
+    if url.get_backend_name() == 'postgresql' and statement_timeout:
+        options['connect_args'] = {
+            'options': f'-c statement_timeout={int(statement_timeout)}'
+        }
+    return options
+
+
+def sqlite_pragmas(config: dict) -> list[str]:
+    """
+    Make the SQLite pragmas to apply to new connections. The journal mode
+    and synchronous setting are only applied if configured.
+    :param config:  configuration
+    :return: list of pragmas
+    """
+    pragmas = []
+    for key, dflt_val, allowed in [
+        (DB_SQLITE_JOURNAL_MODE, DEFAULT_DB_SQLITE_JOURNAL_MODE,
+         SQLITE_JOURNAL_MODES),
+        (DB_SQLITE_SYNCHRONOUS, DEFAULT_DB_SQLITE_SYNCHRONOUS,
+         SQLITE_SYNCHRONOUS),
+    ]:
+        value = config_value(config, key, dflt_val)
+        if value is None:
+            continue
+        value = value.upper()
+        if value not in allowed:
+            raise ValueError(f"{key} configuration not valid: {value}")
+        pragma = key[len(f'{DB_CONFIG_VAR_PREFIX}SQLITE_'):].lower()
+        pragmas.append(f"{pragma}={value}")
+
+    busy_timeout = config_value(config, DB_SQLITE_BUSY_TIMEOUT,
+                                DEFAULT_DB_SQLITE_BUSY_TIMEOUT)
+    pragmas.append(f"busy_timeout={int(busy_timeout)}")
+    return pragmas
+
+
+def setup_engine(engine: Engine, config: dict, bind_key: str = None):
+    """
+    Setup an engine; apply SQLite pragmas to new connections and record pool
+    statistics.
+    :param engine:   engine
+    :param config:   configuration
+    :param bind_key: bind key of engine, None for the primary database
+    """
+    if engine.dialect.name == 'sqlite':
+        pragmas = sqlite_pragmas(config)
+
+        @event.listens_for(engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(f"PRAGMA {pragma}")
+            cursor.close()
+
+    pool_stats[bind_key] = PoolStats(engine)
+
+
+def db_pool_stats(bind_key: str = None) -> dict:
+    """
+    Get the database connection pool statistics.
+    :param bind_key: bind key of engine, None for the primary database
+    :return: dict of stats
+    """
+    return pool_stats.get(bind_key, PoolStats()).to_dict()
+
+
+def standardise_uri(uri: str) -> str:
+    """
+    Standardise a database connection URI.
+    :param uri: uri string
+    :return: uri string
+    """
+    # SQLAlchemy 1.4.x has removed support for the postgres:// URI scheme,
+    # which is used by Heroku Postgres
+    # (https://github.com/sqlalchemy/sqlalchemy/issues/6083)
+    if uri.startswith("postgres://"):
+        uri = uri.replace("postgres://", "postgresql://", 1)
+    return uri
+
+
 def setup_db(app: Flask, config: dict, init: bool = False) -> SQLAlchemy:
     """
     Initialise the app for the database, binding a flask application and a
@@ -65,26 +261,46 @@ def setup_db(app: Flask, config: dict, init: bool = False) -> SQLAlchemy:
     # 1. DB_URI
     # 2. DB_URI_ENV_VAR
     # 3. make uri from DB_DIALECT etc.
-    connection_uri = config.get(DB_URI, None) or \
-        config.get(DB_URI_ENV_VAR, None) or make_connection_uri(app, config)
-
-    # SQLAlchemy 1.4.x has removed support for the postgres:// URI scheme,
-    # which is used by Heroku Postgres
-    # (https://github.com/sqlalchemy/sqlalchemy/issues/6083)
-    if connection_uri.startswith("postgres://"):
-        connection_uri = connection_uri.replace(
-            "postgres://", "postgresql://", 1)
+    connection_uri = standardise_uri(
+        config.get(DB_URI, None) or config.get(DB_URI_ENV_VAR, None) or
+        make_connection_uri(app, config))
+    # Optional read replica URI precedence is:
+    # 1. DB_REPLICA_URI
+    # 2. DB_REPLICA_URI_ENV_VAR
+    replica_uri = config.get(DB_REPLICA_URI, None) or \
+        config.get(DB_REPLICA_URI_ENV_VAR, None)
 
     app.config["SQLALCHEMY_DATABASE_URI"] = connection_uri
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = \
+        engine_options(make_url(connection_uri), config)
+    binds = {}
+    if replica_uri is not None:
+        replica_uri = standardise_uri(replica_uri)
+        binds[REPLICA_BIND] = {
+            'url': replica_uri,
+            **engine_options(make_url(replica_uri), config)
+        }
+    app.config["SQLALCHEMY_BINDS"] = binds
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     db.app = app
     db.init_app(app)
+    pool_stats.clear()
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            setup_engine(engine, config, bind_key=bind_key)
+    if replica_uri is not None:
+        # Registered first so its response processing follows the commit.
+        setup_read_your_writes(app)
+    if config_value(config, DB_UNIT_OF_WORK, DEFAULT_DB_UNIT_OF_WORK):
+        setup_unit_of_work(app)
 
     app.json_provider_class = TPDefaultJSONProvider
     app.json = app.json_provider_class(app)
 
     if is_enabled_for(logging.DEBUG):
         logger().debug(fmt_log(f"Initialised database: {connection_uri}"))
+        if replica_uri is not None:
+            logger().debug(fmt_log(f"Read replica database: {replica_uri}"))
     else:
         logger().info(fmt_log(f"Initialised database"))
 
@@ -99,9 +315,11 @@ def setup_db(app: Flask, config: dict, init: bool = False) -> SQLAlchemy:
 def db_drop_and_create_all():
     """
     Drop the database tables and start fresh.
+    Note: only the primary database is recreated, a read replica receives
+          its changes from the primary.
     """
-    db.drop_all()
-    db.create_all()
+    db.drop_all(bind_key=None)
+    db.create_all(bind_key=None)
 
     # pre-populate roles & teams
     add_pre_configured()
@@ -1,26 +1,106 @@
 from contextlib import contextmanager
 from http import HTTPStatus
 
+from flask import (Flask, Response, g, has_app_context, make_response,
+                   session
+                   )
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from sqlalchemy.orm import scoped_session
+from sqlalchemy.sql.dml import UpdateBase
 from werkzeug.exceptions import ServiceUnavailable
 
-from ..util import print_exc_info
+from ..util import print_exc_info, http_error_result
 from ..util.exception import AbortError
 
-db = SQLAlchemy()
+REPLICA_BIND = 'replica'    # Bind key of the read replica database.
+
+# Request unit of work flag in 'g'; True while the unit of work may be
+# committed, False once it must be rolled back.
+_UNIT_OF_WORK_ = 'unit_of_work'
+
+# Session info keys.
+_REPLICA_READS_ = 'replica_reads'   # Reads may be routed to the replica.
+_PRIMARY_PINNED_ = 'primary_pinned'     # Writes made, use the primary.
+_WRITES_MADE_ = 'writes_made'       # Writes made in the current request.
+
+# Flask session flag; the request following a redirect after a write reads
+# from the primary.
+_PIN_PRIMARY_ = 'pin_primary'
+
+
+class RoutingSession(Session):
+    """
+    Session which routes reads made within a db_read_session() to the read
+    replica database, if one is configured.
+    Once a write has been made all following reads are routed to the primary
+    database, so a request reads its own writes. As the session is scoped to
+    the application context, this lasts for the remainder of the request.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, UpdateBase):
+                self.info[_PRIMARY_PINNED_] = True
+                self.info[_WRITES_MADE_] = True
+            elif self.info.get(_REPLICA_READS_, False) and \
+                    not self.info.get(_PRIMARY_PINNED_, False):
+                replica = self._db.engines.get(REPLICA_BIND, None)
+                if replica is not None:
+                    return replica
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind,
+                                **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+def in_unit_of_work() -> bool:
+    """
+    Check if there is a request unit of work in progress.
+    :return: True if in progress
+    """
+    return has_app_context() and _UNIT_OF_WORK_ in g
+
+
+def _rollback():
+    """ Rollback the session, and any request unit of work in progress. """
+    db.session.rollback()
+    if in_unit_of_work():
+        setattr(g, _UNIT_OF_WORK_, False)
 
 
 @contextmanager
 def db_session() -> scoped_session:
-    """Provide a transactional scope around a series of operations."""
+    """
+    Provide a transactional scope around a series of operations.
+    Within a request unit of work the scope joins the request transaction,
+    which is committed once at the end of the request, otherwise the scope
+    is committed on exit.
+    A database error rolls back the request transaction. Any other error
+    rolls back the writes of the scope, using a savepoint if writes have
+    been made before it, so an error handled by the caller leaves the rest
+    of the request to be committed.
+    """
+    unit_of_work = in_unit_of_work()
+    savepoint = None
+    if unit_of_work and db.session.info.get(_WRITES_MADE_, False):
+        savepoint = db.session.begin_nested()
     try:
         yield db.session
-        db.session.commit()
+        if unit_of_work:
+            # Flush so errors are raised here rather than at the end of the
+            # request.
+            db.session.flush()
+            if savepoint is not None:
+                savepoint.commit()
+        else:
+            db.session.commit()
 
     except SQLAlchemyError as e:
-        db.session.rollback()
+        _rollback()
         print_exc_info()
         if isinstance(e, IntegrityError):
             raise AbortError(HTTPStatus.UNPROCESSABLE_ENTITY,
@@ -28,5 +108,102 @@ def db_session() -> scoped_session:
                              "constraint condition not met") from e
         raise ServiceUnavailable() from e
 
+    except Exception:
+        if savepoint is not None:
+            savepoint.rollback()
+        elif unit_of_work:
+            # No writes preceded the scope, so only its writes are undone.
+            db.session.rollback()
+            db.session.info[_WRITES_MADE_] = False
+        raise
+
     finally:
-        db.session.close()
+        if unit_of_work:
+            # Detach entities, as closing the session would.
+            db.session.expunge_all()
+        else:
+            db.session.close()
+
+
+@contextmanager
+def db_read_session() -> scoped_session:
+    """
+    Provide a transactional scope around a series of read operations, which
+    are routed to the read replica database if one is configured and no
+    writes have been made in the current request.
+    """
+    info = db.session.info
+    replica_reads = info.get(_REPLICA_READS_, False)
+    info[_REPLICA_READS_] = True
+    try:
+        with db_session() as session:
+            yield session
+    finally:
+        info[_REPLICA_READS_] = replica_reads
+
+
+def pin_primary():
+    """
+    Route all following reads in the current request to the primary
+    database, e.g. to read writes made by a previous request.
+    """
+    db.session.info[_PRIMARY_PINNED_] = True
+
+
+def setup_read_your_writes(app: Flask):
+    """
+    Initialise reading your writes across redirects. The request following
+    a redirect from a request which made writes reads from the primary
+    database, as the replica may not have the writes yet.
+    :param app: Flask application
+    """
+    @app.before_request
+    def pin_after_redirect():
+        if session.get(_PIN_PRIMARY_, False):
+            session.pop(_PIN_PRIMARY_)
+            pin_primary()
+
+    @app.after_request
+    def pin_next_request(response: Response) -> Response:
+        if HTTPStatus.MULTIPLE_CHOICES <= response.status_code < \
+                HTTPStatus.BAD_REQUEST and \
+                db.session.info.get(_WRITES_MADE_, False):
+            session[_PIN_PRIMARY_] = True
+        return response
+
+
+def setup_unit_of_work(app: Flask):
+    """
+    Initialise request-scoped units of work. All the db_session() scopes in a
+    request join a single transaction, which is begun on first use and
+    committed once the request has been handled successfully, or rolled back
+    on error.
+    :param app: Flask application
+    """
+    @app.before_request
+    def begin_unit_of_work():
+        setattr(g, _UNIT_OF_WORK_, True)
+
+    @app.after_request
+    def end_unit_of_work(response: Response) -> Response:
+        commit = g.pop(_UNIT_OF_WORK_, None)
+        if commit is not None:
+            if commit and response.status_code < HTTPStatus.BAD_REQUEST:
+                try:
+                    db.session.commit()
+                except SQLAlchemyError:
+                    db.session.rollback()
+                    print_exc_info()
+                    response = make_response(http_error_result(
+                        HTTPStatus.SERVICE_UNAVAILABLE, ServiceUnavailable()))
+            else:
+                db.session.rollback()
+            db.session.close()
+        return response
+
+    @app.teardown_request
+    def abort_unit_of_work(exception):
+        # Unit of work is still in progress if response processing failed.
+        if g.pop(_UNIT_OF_WORK_, None) is not None:
+            db.session.rollback()
+            db.session.close()
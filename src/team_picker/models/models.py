@@ -3,7 +3,7 @@ from http import HTTPStatus
 from typing import Any, NewType, Union
 
 from sqlalchemy import (Column, Integer, String, UniqueConstraint,
-                        CheckConstraint
+                        CheckConstraint, Index
                         )
 
 from .models_misc import *
@@ -43,6 +43,11 @@ M_MATCH_ID = 'match_id'
 M_USER_ID = 'user_id'
 M_CONFIRMED = 'confirmed'
 
+# Query result labels.
+M_HOME_NAME = "home_name"
+M_AWAY_NAME = "away_name"
+M_SELECTED = "selected"
+
 
 def _check_correct_type(obj: Any, name: str, obj_type: Any):
     """
@@ -71,7 +76,10 @@ MatchSelections = db.Table(SELECTIONS_TABLE, db.Model.metadata,
                            db.Column(M_CONFIRMED, db.Integer,
                                      CheckConstraint(
                                          f'{M_CONFIRMED}<={CONFIRMED_STATUS}'),
-                                     nullable=False, default=NO_STATUS)
+                                     nullable=False, default=NO_STATUS),
+                           # Covers the selected & unconfirmed lookup by user.
+                           Index('ix_selections_user_confirmed', M_USER_ID,
+                                 M_CONFIRMED, M_MATCH_ID)
                            )
 
 
@@ -86,6 +94,48 @@ class Role(MultiDictMixin, db.Model):
     def __init__(self, role: str = None):
         self.role = role
 
+    @staticmethod
+    def is_valid_entity(entity: dict, attribs: list = None) -> dict:
+        """
+        Validate and sanitise a role dict
+        :param entity:      entity to check
+        :param attribs:     attributes to check
+        :return: Sanitised dict
+        """
+        if attribs is None:
+            attribs = [M_ROLE]
+
+        # Check all data is valid
+        _check_correct_type(entity, 'role', dict)
+        valid_entity = {}
+        for name, obj_type in [(M_ROLE, str)]:
+            if name in attribs:
+                obj = entity.get(name, None)
+                _check_correct_type(obj, name, obj_type)
+
+                if obj_type == str:
+                    obj = obj.strip()
+                    if len(obj) == 0:
+                        raise ModelError(HTTPStatus.UNPROCESSABLE_ENTITY,
+                                         f"Empty {name} value")
+
+                valid_entity[name] = obj
+
+        return valid_entity
+
+    @staticmethod
+    def from_dict(entity: dict):
+        """
+        Create a Role model from a dict.
+        :param entity: dict to create from
+        :return: new model
+        """
+        valid_role = Role.is_valid_entity(entity)
+
+        role = Role(role=valid_role[M_ROLE])
+
+        return role
+
     def __repr__(self):
         return f"<Role(id={self.id}, role={self.role})>"
 
@@ -110,6 +160,9 @@ class User(MultiDictMixin, db.Model):
                         nullable=True, default=0)
     team = db.relationship('Team')
 
+    __table_args__ = (Index('ix_users_role_team', 'role_id', 'team_id'),
+                      )
+
     def __init__(self, name: str = None, surname: str = None,
                  auth0_id: str = None, role_id: int = None,
                  team_id: int = None):
@@ -271,7 +324,9 @@ class Match(MultiDictMixin, db.Model):
                       UniqueConstraint('away_id', 'start_time',
                                        name='uq_away_fixture'),
                       CheckConstraint('home_id != away_id',
-                                      name='different_teams_check')
+                                      name='different_teams_check'),
+                      Index('ix_match_fixture', 'start_time', 'home_id',
+                            'away_id')
                       )
 
     def __init__(self, home_id: int = None, away_id: int = None,
@@ -1,5 +1,6 @@
+import threading
 from enum import Enum
-from typing import Union
+from typing import Union, Optional, Iterable, Callable
 
 from sqlalchemy import inspect, Row
 
@@ -77,6 +78,23 @@ class MultiDictMixin():
                        e.g. with Parent.Child, children='name' will return
                        Child.name as the value for Parent.Child
         """
+        if len(kwargs) == 0:
+            # The compiled serialisers apply 'ignore', but don't support
+            # the property attribute mappings, which use reflection.
+            to_dict = serialiser(type(self), exclude=ignore)
+            if to_dict is not None:
+                return to_dict(self)
+        return self.reflect_dict(ignore=ignore, **kwargs)
+
+    def reflect_dict(self, ignore=None, **kwargs):
+        """
+        Generate a dict by reflection of the object's attributes
+        :param ignore: fields to ignore
+        :param kwargs: keyword args where 'key' is the object property and
+                       'value' is the required attribute of the property.
+                       e.g. with Parent.Child, children='name' will return
+                       Child.name as the value for Parent.Child
+        """
         if ignore is None:
             ignore = []
         # TODO Method of passing ignores for sub elements.
@@ -104,12 +122,150 @@ class MultiDictMixin():
         return eq
 
 
+def _split_fields(fields: Optional[frozenset]) \
+        -> tuple[Optional[frozenset], dict]:
+    """
+    Split a set of field names into top level names and nested names.
+    :param fields: field names, where nested fields are specified as
+                   'relationship.field', or None
+    :return: tuple of set of top level names or None, and dict of sets of
+             nested names by relationship
+    """
+    if fields is None:
+        return None, {}
+    top = set()
+    nested = {}
+    for field in fields:
+        key, _, nested_field = field.partition('.')
+        if nested_field:
+            nested.setdefault(key, set()).add(nested_field)
+        else:
+            top.add(key)
+    return frozenset(top), {k: frozenset(v) for k, v in nested.items()}
+
+
+Serialiser = Callable[[object], dict]
+
+_SERIALISERS_ = {}      # Compiled serialisers by (class, include, exclude).
+_SERIALISERS_LOCK_ = threading.RLock()
+
+
+class _Related(Enum):
+    """ Enum of serialised relationship kinds """
+    SCALAR = 1      # Related entity.
+    LIST = 2        # List of related entities.
+
+
+def _compile_serialiser(model_cls, include: Optional[frozenset],
+                        exclude: Optional[frozenset],
+                        compiling: dict) -> Optional[Serialiser]:
+    """
+    Compile a serialiser for a model class, from the mapper's column and
+    relationship metadata.
+    As with MultiDictMixin.reflect_dict(), only loaded attributes are
+    included in the dict.
+    Note: must be called while holding the lock.
+    :param model_cls: model class
+    :param include:   fields to include, or None for all fields
+    :param exclude:   fields to exclude, or None
+    :param compiling: serialisers being compiled, as relationships may be
+                      circular
+    :return: serialiser or None if class is not a mapped model
+    """
+    key = (model_cls, include, exclude)
+    to_dict = _SERIALISERS_.get(key, None) or compiling.get(key, None)
+    if to_dict is not None:
+        return to_dict
+
+    mapper = inspect(model_cls, raiseerr=False)
+    if mapper is None:
+        return None
+
+    top_include, nested_include = _split_fields(include)
+    top_exclude, nested_exclude = _split_fields(exclude)
+    if top_exclude is None:
+        top_exclude = frozenset()
+
+    def is_included(k):
+        return is_public(k) and k not in top_exclude and \
+            (top_include is None or k in top_include or k in nested_include)
+
+    # Tuples of column keys, and of relationship key, kind and serialiser;
+    # set once the related serialisers are resolved.
+    columns = ()
+    relationships = ()
+
+    def to_dict(entity):
+        values = entity.__dict__
+        result = {k: values[k] for k in columns if k in values}
+        for rel_key, kind, related in relationships:
+            if rel_key in values:
+                value = values[rel_key]
+                if value is None:
+                    result[rel_key] = None
+                elif kind is _Related.LIST:
+                    result[rel_key] = [related(v) for v in value]
+                else:
+                    result[rel_key] = related(value)
+        return result
+
+    compiling[key] = to_dict
+
+    columns = tuple(
+        attr.key for attr in mapper.column_attrs if is_included(attr.key)
+    )
+    relationships = tuple(
+        (rel.key,
+         _Related.LIST if rel.uselist else _Related.SCALAR,
+         _compile_serialiser(
+             rel.mapper.class_,
+             None if top_include is None or rel.key in top_include
+             else nested_include.get(rel.key, None),
+             nested_exclude.get(rel.key, None),
+             compiling))
+        for rel in mapper.relationships if is_included(rel.key)
+    )
+    return to_dict
+
+
+def serialiser(model_cls, include: Iterable[str] = None,
+               exclude: Iterable[str] = None) -> Optional[Serialiser]:
+    """
+    Get the serialiser for a model class, which is compiled on first use.
+    :param model_cls: model class
+    :param include:   fields to include, or None for all fields; nested
+                      fields are specified as 'relationship.field'
+    :param exclude:   fields to exclude; nested fields are specified as
+                      'relationship.field'
+    :return: serialiser or None if class is not a mapped model
+    """
+    key = (model_cls,
+           None if include is None else frozenset(include),
+           None if not exclude else frozenset(exclude))
+    to_dict = _SERIALISERS_.get(key, None)
+    if to_dict is None and key not in _SERIALISERS_:
+        with _SERIALISERS_LOCK_:
+            compiling = {}
+            to_dict = _compile_serialiser(*key, compiling)
+            # Publish once all related serialisers are resolved.
+            _SERIALISERS_.update(compiling)
+            _SERIALISERS_[key] = to_dict
+    return to_dict
+
+
 class ResultType(Enum):
     """ Enum of result types """
     DICT = 1    # Return type dictionary.
     MODEL = 2   # Return type SQLAlchemy model.
 
 
+class Loading(Enum):
+    """ Enum of relationship loading strategies """
+    NONE = 1        # Not loaded; omitted from dict results.
+    SELECTIN = 2    # Loaded by a separate SELECT ... IN query.
+    JOINED = 3      # Loaded by a LEFT OUTER JOIN in the same query.
+
+
 def entity_to_dict(entity: Union[MultiDictMixin, Row, db.Model]) -> dict:
     """
     Convert a model entity to a dict if possible
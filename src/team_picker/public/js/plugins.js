@@ -73,14 +73,48 @@ $(function () {
     $("button[id^='toggle-select-']").click(function (event) {
         // Extract info from data-bs-* attributes
         var href = $(this).attr('data-bs-href');
-        var success_href = $(this).attr('data-bs-success_href');
+        // Extract end of id to find status icon.
+        var index = $(this).attr('id').split('-')[2];
 
         $.ajax({
             url: href,
             method: 'POST',
             contentType: false,
+            dataType: 'json',
+            success: function(result) {
+                // Update status icon in place.
+                var status = $("i#select-status-" + index);
+                if (result.selected) {
+                    status.attr('class', 'far fa-check-square').attr('title', 'Selected');
+                } else {
+                    status.attr('class', 'far fa-square').attr('title', 'Not Selected');
+                }
+            }
+        });
+    })
+});
+
+// Select or deselect all players
+$(function () {
+    $("button[id^='select-all-']").click(function (event) {
+        // Extract info from data-bs-* attributes
+        var href = $(this).attr('data-bs-href');
+        // Extract end of id to send as the choice for every player.
+        var choice = $(this).attr('id').split('-')[2];
+
+        var choices = {};
+        $("button[id^='toggle-select-']").each(function () {
+            choices[$(this).attr('data-bs-player')] = choice;
+        });
+
+        $.ajax({
+            url: href,
+            method: 'POST',
+            contentType: 'application/json',
+            data: JSON.stringify(choices),
+            dataType: 'json',
             success: function(result) {
-                window.location.replace(success_href);
+                window.location.reload();
             }
         });
     })
@@ -91,7 +125,6 @@ $(function () {
     $("input[id^='toggle-confirm-']").click(function (event) {
         // Extract info from data-bs-* attributes
         var href = $(this).attr('data-bs-href');
-        var success_href = $(this).attr('data-bs-success_href');
 
         // Extract end of id to send as query param to server.
         var query = $(this).attr('id').split('-')[2];
@@ -100,8 +133,11 @@ $(function () {
             url: href + '?select=' + query,
             method: 'POST',
             contentType: false,
+            dataType: 'json',
             success: function(result) {
-                window.location.replace(success_href);
+                // Only the selected confirmation option is checked.
+                $("input[id^='toggle-confirm-']").prop('checked', false);
+                $("input#toggle-confirm-" + query).prop('checked', true);
             }
         });
     })
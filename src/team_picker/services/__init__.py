@@ -1,24 +1,35 @@
 from .role_service import (get_all_roles, get_role_by_id, get_role_by_role,
-                           is_manager_role, is_player_role, create_role
+                           is_manager_role, is_player_role, create_role,
+                           get_role_id, get_role_name, invalidate_roles,
+                           reload_roles
                            )
-from .user_service import (get_all_users, get_user_by_id, create_user,
-                           delete_user_by_id, update_user, user_exists,
-                           get_user_by_auth0_id, get_users_by_role_and_team
+from .user_service import (get_all_users, get_users_page, stream_users,
+                           get_user_by_id, create_user, delete_user_by_id,
+                           update_user, user_exists, get_user_by_auth0_id,
+                           get_users_by_role_and_team
                            )
-from .team_service import (get_all_teams, get_team_by_id, create_team,
-                           delete_team_by_id, update_team, team_exists,
-                           get_team_by_name, is_unassigned_team,
+from .team_service import (get_all_teams, get_teams_page, stream_teams,
+                           get_team_by_id, create_team, delete_team_by_id,
+                           update_team, team_exists, get_team_by_name,
+                           is_unassigned_team,
                            get_unassigned_team_id, get_team_name,
-                           get_all_team_names
+                           get_all_team_names, get_team_choices,
+                           invalidate_teams, reload_teams
                            )
-from .match_service import (get_all_matches, get_match_by_id,
+from .match_service import (get_all_matches, get_matches_page,
+                            stream_matches,
+                            get_match_list, get_match_by_id,
                             get_match_by_id_and_team, create_match,
                             delete_match_by_id, update_match, match_exists,
-                            verify_match, is_selected, set_selection,
+                            verify_match, get_fixture_conflicts,
+                            is_selected, set_selection,
                             is_selected_and_confirmed, set_confirmation,
                             get_selected_and_unconfirmed,
-                            SelectChoice
+                            get_selection_roster, sync_selections,
+                            selection_choices, set_selections,
+                            get_match_selections, SelectChoice
                             )
+from .base_service import page_args
 
 
 __all__ = [
@@ -28,8 +39,14 @@ __all__ = [
     "is_manager_role",
     "is_player_role",
     "create_role",
+    "get_role_id",
+    "get_role_name",
+    "invalidate_roles",
+    "reload_roles",
 
     "get_all_users",
+    "get_users_page",
+    "stream_users",
     "get_user_by_id",
     "create_user",
     "delete_user_by_id",
@@ -39,6 +56,8 @@ __all__ = [
     "get_users_by_role_and_team",
 
     "get_all_teams",
+    "get_teams_page",
+    "stream_teams",
     "get_team_by_id",
     "create_team",
     "delete_team_by_id",
@@ -49,8 +68,14 @@ __all__ = [
     "get_unassigned_team_id",
     "get_team_name",
     "get_all_team_names",
+    "get_team_choices",
+    "invalidate_teams",
+    "reload_teams",
 
     "get_all_matches",
+    "get_matches_page",
+    "stream_matches",
+    "get_match_list",
     "get_match_by_id",
     "get_match_by_id_and_team",
     "create_match",
@@ -58,10 +83,18 @@ __all__ = [
     "update_match",
     "match_exists",
     "verify_match",
+    "get_fixture_conflicts",
     "is_selected",
     "set_selection",
     "is_selected_and_confirmed",
     "set_confirmation",
     "get_selected_and_unconfirmed",
+    "get_selection_roster",
+    "sync_selections",
+    "selection_choices",
+    "set_selections",
+    "get_match_selections",
     "SelectChoice",
+
+    "page_args",
 ]
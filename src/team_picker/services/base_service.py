@@ -1,28 +1,63 @@
-from typing import Callable
+import base64
+import binascii
+import json
+from datetime import datetime
+from http import HTTPStatus
+from typing import Callable, Optional, Iterator
 
-from sqlalchemy import Row
-from sqlalchemy.orm import scoped_session
+from sqlalchemy import Row, delete, update, and_, or_, asc, desc
+from sqlalchemy.orm import (scoped_session, lazyload, selectinload,
+                            joinedload
+                            )
 from flask_sqlalchemy.query import Query
 
 from ..constants import (RESULT_CREATED_COUNT, RESULT_DELETED_COUNT,
-                         RESULT_UPDATED_COUNT
+                         RESULT_UPDATED_COUNT, LIMIT_QUERY, CURSOR_QUERY
                          )
-from ..models import db_session, ResultType, M_ID, AnyModel, entity_to_dict
+from ..models import (db_session, db_read_session, ResultType, M_ID, AnyModel,
+                      entity_to_dict, Loading
+                      )
+from ..models.exception import ModelError
+
+DEFAULT_PAGE_LIMIT = 50     # Default number of entities in a page.
+MAX_PAGE_LIMIT = 1000       # Max number of entities in a page.
+STREAM_BATCH_SIZE = 500     # Number of entities read at a time when streaming.
+
+_LOADERS_ = {
+    Loading.NONE: lazyload,
+    Loading.SELECTIN: selectinload,
+    Loading.JOINED: joinedload,
+}
+
+
+def loading_options(relationship, loading: Optional[Loading]) \
+        -> Optional[list]:
+    """
+    Generate the query options to load a relationship.
+    :param relationship: relationship attribute, e.g. Match.selections
+    :param loading:      loading strategy, one of Loading, or None for the
+                         strategy configured for the relationship
+    :return: list of query options or None
+    """
+    return None if loading is None else [_LOADERS_[loading](relationship)]
 
 
 def build_query(base_query, with_entities=None, criteria=None,
-                order_by=None) -> Query:
+                order_by=None, options=None) -> Query:
     """
     Get an entity.
     :param base_query:    base query
     :param with_entities: model entities to return
     :param criteria:      entity filter criteria
     :param order_by:      order results by
+    :param options:       list of query options
     :return: entity
     """
     query = base_query
     if with_entities is not None:
         query = query.with_entities(with_entities)
+    if options is not None:
+        query = query.options(*options)
     if criteria is not None:
         query = query.filter(criteria)
     if order_by is not None:
@@ -32,7 +67,7 @@ def build_query(base_query, with_entities=None, criteria=None,
 
 
 def get_all(model: AnyModel,
-            with_entities=None, criteria=None, order_by=None,
+            with_entities=None, criteria=None, order_by=None, options=None,
             result_type: ResultType = ResultType.DICT):
     """
     Get all teams.
@@ -40,14 +75,16 @@ def get_all(model: AnyModel,
     :param with_entities: model entities to return
     :param criteria:      entity filter criteria
     :param order_by:      order results by
+    :param options:       list of query options
     :param result_type: type of result required, one of ResultType
     :return: list of all entities.
     """
-    with db_session() as session:
+    with db_read_session() as session:
         entities = build_query(session.query(model),
                                with_entities=with_entities,
                                criteria=criteria,
-                               order_by=order_by)\
+                               order_by=order_by,
+                               options=options)\
             .all()
         if result_type == ResultType.DICT:
             entities = [e.get_dict() for e in entities]
@@ -55,6 +92,152 @@ def get_all(model: AnyModel,
     return entities
 
 
+def stream_all(model: AnyModel, criteria=None, order_by=None, options=None,
+               result_type: ResultType = ResultType.DICT,
+               batch_size: int = STREAM_BATCH_SIZE) -> Iterator:
+    """
+    Stream all entities, reading them from the database in batches.
+    Note: joined eager loading of collections can't be used when streaming,
+          so collections must be loaded via 'options', e.g. selectinload().
+    :param model:       model to query
+    :param criteria:    entity filter criteria
+    :param order_by:    order results by
+    :param options:     list of query options
+    :param result_type: type of result required, one of ResultType
+    :param batch_size:  number of entities to read at a time
+    :return: iterator of entities.
+    """
+    with db_read_session() as session:
+        query = build_query(session.query(model), criteria=criteria,
+                            order_by=order_by, options=options)
+        for entity in query.yield_per(batch_size):
+            yield entity.get_dict() \
+                if result_type == ResultType.DICT else entity
+
+
+def page_args(args) -> Optional[tuple[int, Optional[str]]]:
+    """
+    Get the pagination arguments from request query arguments.
+    :param args: request query arguments
+    :return: tuple of page limit and cursor, or None if pagination not
+             requested
+    """
+    limit = args.get(LIMIT_QUERY, None, type=str)
+    cursor = args.get(CURSOR_QUERY, None, type=str)
+    if limit is None and cursor is None:
+        return None
+
+    if limit is None:
+        limit = DEFAULT_PAGE_LIMIT
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            raise ModelError(HTTPStatus.BAD_REQUEST,
+                             f"Invalid '{LIMIT_QUERY}' argument")
+    return min(limit, MAX_PAGE_LIMIT), cursor if cursor else None
+
+
+def encode_cursor(values: list) -> str:
+    """
+    Encode the key values of the last entity in a page as an opaque cursor.
+    :param values: key values
+    :return: cursor
+    """
+    values = [v.isoformat() if isinstance(v, datetime) else v
+              for v in values]
+    return base64.urlsafe_b64encode(
+        json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, keys: list) -> list:
+    """
+    Decode a cursor.
+    :param cursor: cursor
+    :param keys:   key columns
+    :return: key values
+    """
+    try:
+        values = json.loads(
+            base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError
+        values = [
+            datetime.fromisoformat(v)
+            if key.type.python_type == datetime else key.type.python_type(v)
+            for key, v in zip(keys, values)
+        ]
+    except (binascii.Error, ValueError, TypeError):
+        raise ModelError(HTTPStatus.BAD_REQUEST,
+                         f"Invalid '{CURSOR_QUERY}' argument")
+    return values
+
+
+def keyset_criteria(keys: list, values: list, descending: bool = False):
+    """
+    Generate the criteria to select the entities following a keyset position.
+    :param keys:       key columns
+    :param values:     key values of position
+    :param descending: keys are in descending order
+    :return: filter clause
+    """
+    criteria = []
+    for index, key in enumerate(keys):
+        after = key < values[index] if descending else key > values[index]
+        criteria.append(
+            and_(*[keys[i] == values[i] for i in range(index)], after)
+            if index > 0 else after
+        )
+    return or_(*criteria) if len(criteria) > 1 else criteria[0]
+
+
+def get_page(model: AnyModel, keys: list, limit: int,
+             cursor: Optional[str] = None, criteria=None,
+             descending: bool = False, options=None,
+             result_type: ResultType = ResultType.DICT) \
+        -> tuple[list, Optional[str]]:
+    """
+    Get a page of entities, using keyset pagination.
+    :param model:       model to query
+    :param keys:        key columns, which must uniquely order entities
+    :param limit:       max number of entities in page
+    :param cursor:      cursor from previous page, or None for first page
+    :param criteria:    entity filter criteria
+    :param descending:  order keys in descending order
+    :param options:     list of query options
+    :param result_type: type of result required, one of ResultType
+    :return: tuple of list of entities and cursor for next page, or None if
+             no more entities
+    """
+    query_criteria = [] if criteria is None else [criteria]
+    if cursor is not None:
+        query_criteria.append(
+            keyset_criteria(keys, decode_cursor(cursor, keys),
+                            descending=descending))
+    direction = desc if descending else asc
+
+    with db_read_session() as session:
+        query = build_query(session.query(model), options=options)
+        if len(query_criteria) > 0:
+            query = query.filter(and_(*query_criteria))
+        # Fetch an extra entity to determine if there is a following page.
+        entities = query.order_by(*[direction(key) for key in keys]) \
+            .limit(limit + 1) \
+            .all()
+
+        next_cursor = None
+        if len(entities) > limit:
+            entities = entities[:limit]
+            next_cursor = encode_cursor(
+                [getattr(entities[-1], key.key) for key in keys])
+        if result_type == ResultType.DICT:
+            entities = [e.get_dict() for e in entities]
+
+    return entities, next_cursor
+
+
 def get_by_id_raw(session: scoped_session, model: AnyModel, entity_id: int):
     """
     Get an entity.
@@ -67,42 +250,46 @@ def get_by_id_raw(session: scoped_session, model: AnyModel, entity_id: int):
 
 
 def get_one(model: AnyModel,
-            with_entities=None, criteria=None,
+            with_entities=None, criteria=None, options=None,
             result_type: ResultType = ResultType.DICT) -> dict | None:
     """
     Get an entity.
     :param model:       model to query
     :param with_entities: model entities to return
     :param criteria:      entity filter criteria
+    :param options:       list of query options
     :param result_type: type of result required, one of ResultType
     :return: entity
     """
-    with db_session() as session:
+    with db_read_session() as session:
         entity = build_query(
-            session.query(model),
-            with_entities=with_entities, criteria=criteria).first()
+            session.query(model), with_entities=with_entities,
+            criteria=criteria, options=options).first()
         if entity is not None and result_type == ResultType.DICT:
             entity = entity_to_dict(entity)
 
     return entity
 
 
-def get_by_id(model: AnyModel, entity_id: int,
+def get_by_id(model: AnyModel, entity_id: int, options=None,
               result_type: ResultType = ResultType.DICT):
     """
     Get an entity by id.
     :param model:       model to query
     :param entity_id:   id of entity to get
+    :param options:     list of query options
     :param result_type: type of result required, one of ResultType
     :return: entity
     """
-    return get_one(model, criteria=model.id == entity_id,
+    return get_one(model, criteria=model.id == entity_id, options=options,
                    result_type=result_type)
 
 
 def exists_by_id(model: AnyModel, entity_id: int):
     """
     Check if an entity exists by id.
+    The check is made on the primary database, as it generally precedes a
+    write to the entity.
     :param model:       model to query
     :param entity_id:   id of entity to check
     :return: True if exists otherwise False
@@ -159,13 +346,13 @@ def delete_entity(model: AnyModel, criteria=None):
     }
     """
     with db_session() as session:
-        delete_query = session.query(model)
+        query = delete(model)
         if criteria is not None:
-            delete_query = delete_query.filter(criteria)
+            query = query.where(criteria)
 
-        count = delete_query.count()  # Number of rows that will be affected.
-        if count > 0:
-            delete_query.delete()
+        count = session.execute(
+            query, execution_options={"synchronize_session": False}
+        ).rowcount
 
     return {
         RESULT_DELETED_COUNT: count
@@ -182,25 +369,49 @@ def delete_by_id(model: AnyModel, entity_id: int):
     return delete_entity(model, criteria=model.id == entity_id)
 
 
-def update_entity(model: AnyModel, updates: dict, criteria=None):
+def update_entity(model: AnyModel, updates: dict, criteria=None,
+                  key: str = None, result_type: ResultType = ResultType.DICT):
     """
     Update an entity.
     :param model:       SQLAlchemy model
     :param updates:     updates to apply
     :param criteria:    entity filter criteria
+    :param key:         key for updated entity in result, if required; if
+                        multiple entities are updated the first is returned
+    :param result_type: type of result required, one of ResultType
     :return: updated result {
         "updated": <number of affected entities>
+        key: <updated entity>
     }
     """
+    result = {}
     with db_session() as session:
-        update_query = session.query(model)
+        query = update(model).values(updates)
         if criteria is not None:
-            update_query = update_query.filter(criteria)
+            query = query.where(criteria)
 
-        count = update_query.count()  # Number of rows that will be affected.
-        if count > 0:
-            update_query.update(updates, synchronize_session="fetch")
+        returning = key is not None and \
+            session.get_bind().dialect.update_returning
+        if returning:
+            query = query.returning(model)
 
-    return {
-        RESULT_UPDATED_COUNT: count
-    }
+        updated = session.execute(
+            query, execution_options={"synchronize_session": False})
+        if returning:
+            entities = updated.unique().scalars().all()
+            count = len(entities)
+            entity = entities[0] if count > 0 else None
+        else:
+            count = updated.rowcount
+            entity = None
+            if key is not None and count > 0:
+                # Dialect doesn't support RETURNING, so need to query.
+                entity = build_query(session.query(model),
+                                     criteria=criteria).first()
+
+        result[RESULT_UPDATED_COUNT] = count
+        if entity is not None:
+            result[key] = entity.get_dict() \
+                if result_type == ResultType.DICT else entity
+
+    return result
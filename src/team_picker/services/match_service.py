@@ -1,28 +1,37 @@
+from datetime import datetime, date, time, timedelta
 from enum import IntEnum, auto
 from http import HTTPStatus
-from typing import Union
+from typing import Union, Optional, Iterator
 
-from flask import request
-from sqlalchemy import and_, desc, asc, or_, select, func
-from sqlalchemy.orm import scoped_session
+from flask import request, g, has_app_context
+from sqlalchemy import (and_, desc, asc, or_, select, func, case, literal,
+                        exists
+                        )
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import scoped_session, aliased
+from sqlalchemy.orm.attributes import set_committed_value
 
+from .role_service import get_role_id
 from .user_service import get_user_by_id_raw
 from ..constants import (RESULT_UPDATED_COUNT, RESULT_ONE_MATCH,
                          ORDER_DATE_DESC, ORDER_DATE_ASC, OPPOSITION,
                          DATE_RANGE, NO_ARG, YES_ARG, SELECT_QUERY, MAYBE_ARG,
-                         TOGGLE_ARG, TEAM
+                         TOGGLE_ARG, TEAM, PLAYER_ROLE
                          )
 from ..util import (
     NO_OPTION_SELECTED, DateRange, NO_STATUS, CONFIRMED_STATUS,
     NOT_AVAILABLE_STATUS, MAYBE_STATUS
 )
 from ..models import (ResultType, Match, M_SELECTIONS, M_ID, M_START_TIME,
-                      db_session, M_AWAY_ID, M_HOME_ID, MatchSelections,
-                      M_CONFIRMED
+                      db_session, db_read_session, M_AWAY_ID, M_HOME_ID,
+                      MatchSelections, M_CONFIRMED, Team, M_HOME_NAME,
+                      M_AWAY_NAME, User, M_SELECTED, M_MATCH_ID, M_USER_ID,
+                      Loading
                       )
 from ..models.exception import ModelError
 from .base_service import (get_all, get_by_id, exists_by_id, create_entity,
-                           delete_by_id, update_entity, get_one
+                           delete_by_id, update_entity, get_one, get_page,
+                           stream_all, loading_options
                            )
 
 
@@ -41,14 +50,11 @@ def standardise_match(match: Union[Match, dict]) -> Union[Match, dict]:
     return match
 
 
-def get_all_matches(order_by: str = None, criteria: dict = None,
-                    result_type: ResultType = ResultType.DICT):
+def _match_order(order_by: Optional[str]):
     """
-    Get all matches.
-    :param order_by:    order results by
-    :param criteria:    filter criteria
-    :param result_type: type of result required, one of ResultType
-    :return: list of all matches.
+    Generate the order for a match query.
+    :param order_by: order results by
+    :return: order clause or None
     """
     if order_by is None:
         order_by = ''
@@ -58,7 +64,27 @@ def get_all_matches(order_by: str = None, criteria: dict = None,
         order = asc(Match.start_time)
     else:
         order = None
+    return order
+
+
+def _day_range(day: Union[datetime, date]) -> tuple[datetime, datetime]:
+    """
+    Get the range of date/times of a day.
+    :param day: date/time or date of day
+    :return: tuple of start of day and start of next day
+    """
+    if isinstance(day, datetime):
+        day = day.date()
+    day_start = datetime.combine(day, time.min)
+    return day_start, day_start + timedelta(days=1)
 
+
+def _match_criteria(criteria: Optional[dict]):
+    """
+    Generate the filter criteria for a match query.
+    :param criteria: filter criteria
+    :return: filter clause or None
+    """
     if criteria is not None:
         search_criteria = []
 
@@ -81,17 +107,20 @@ def get_all_matches(order_by: str = None, criteria: dict = None,
         if DATE_RANGE in criteria.keys() and M_START_TIME in criteria.keys():
             date_criteria = None
             date_range = criteria[DATE_RANGE]
-            start_time = func.date(criteria[M_START_TIME])
+            # Compare the raw column against the half-open range of the day,
+            # [day_start, next_day), so an index on start_time can be used.
+            day_start, next_day = _day_range(criteria[M_START_TIME])
             if date_range == DateRange.BEFORE_DATE:
-                date_criteria = func.date(Match.start_time) < start_time
+                date_criteria = Match.start_time < day_start
             elif date_range == DateRange.BEFORE_OR_EQUAL_DATE:
-                date_criteria = func.date(Match.start_time) <= start_time
+                date_criteria = Match.start_time < next_day
             elif date_range == DateRange.EQUAL_DATE:
-                date_criteria = func.date(Match.start_time) == start_time
+                date_criteria = and_(Match.start_time >= day_start,
+                                     Match.start_time < next_day)
             elif date_range == DateRange.AFTER_OR_EQUAL_DATE:
-                date_criteria = func.date(Match.start_time) >= start_time
+                date_criteria = Match.start_time >= day_start
             elif date_range == DateRange.AFTER_DATE:
-                date_criteria = func.date(Match.start_time) > start_time
+                date_criteria = Match.start_time >= next_day
 
             if date_criteria is not None:
                 search_criteria.append(date_criteria)
@@ -103,35 +132,145 @@ def get_all_matches(order_by: str = None, criteria: dict = None,
         else:
             criteria = None
 
+    return criteria
+
+
+def _selections_options(selections: Loading) -> Optional[list]:
+    """
+    Generate the query options to load match selections.
+    :param selections: selections loading strategy, one of Loading
+    :return: list of query options
+    """
+    return loading_options(Match.selections, selections)
+
+
+def get_all_matches(order_by: str = None, criteria: dict = None,
+                    selections: Loading = Loading.SELECTIN,
+                    result_type: ResultType = ResultType.DICT):
+    """
+    Get all matches.
+    :param order_by:    order results by
+    :param criteria:    filter criteria
+    :param selections:  selections loading strategy, one of Loading
+    :param result_type: type of result required, one of ResultType
+    :return: list of all matches.
+    """
     return [standardise_match(match)
-            for match in get_all(Match, criteria=criteria, order_by=order,
+            for match in get_all(Match, criteria=_match_criteria(criteria),
+                                 order_by=_match_order(order_by),
+                                 options=_selections_options(selections),
                                  result_type=result_type)
             ]
 
 
-def get_match_by_id(match_id: int, result_type: ResultType = ResultType.DICT):
+def stream_matches(order_by: str = None, criteria: dict = None,
+                   selections: Loading = Loading.SELECTIN,
+                   result_type: ResultType = ResultType.DICT) -> Iterator:
+    """
+    Stream all matches.
+    :param order_by:    order results by
+    :param criteria:    filter criteria
+    :param selections:  selections loading strategy, one of Loading;
+                        Loading.JOINED is treated as Loading.SELECTIN
+    :param result_type: type of result required, one of ResultType
+    :return: iterator of all matches.
+    """
+    # Selections are loaded per batch, as joined loading can't be streamed.
+    if selections == Loading.JOINED:
+        selections = Loading.SELECTIN
+    for match in stream_all(Match, criteria=_match_criteria(criteria),
+                            order_by=_match_order(order_by),
+                            options=_selections_options(selections),
+                            result_type=result_type):
+        yield standardise_match(match)
+
+
+def get_matches_page(limit: int, cursor: Optional[str] = None,
+                     order_by: str = None, criteria: dict = None,
+                     selections: Loading = Loading.SELECTIN,
+                     result_type: ResultType = ResultType.DICT) \
+        -> tuple[list, Optional[str]]:
+    """
+    Get a page of matches, in start time order.
+    :param limit:       max number of matches in page
+    :param cursor:      cursor from previous page, or None for first page
+    :param order_by:    order results by
+    :param criteria:    filter criteria
+    :param selections:  selections loading strategy, one of Loading
+    :param result_type: type of result required, one of ResultType
+    :return: tuple of list of matches and cursor for next page or None
+    """
+    # Matches are keyed by start time, with id to order matches at the
+    # same time.
+    descending = order_by is not None and order_by.lower() == ORDER_DATE_DESC
+    matches, next_cursor = get_page(
+        Match, [Match.start_time, Match.id], limit, cursor=cursor,
+        criteria=_match_criteria(criteria), descending=descending,
+        options=_selections_options(selections), result_type=result_type)
+
+    return [standardise_match(match) for match in matches], next_cursor
+
+
+def get_match_list(order_by: str = None, criteria: dict = None) -> list[dict]:
+    """
+    Get a list of matches, without selections, including the home and away
+    team names, in a single query.
+    :param order_by:    order results by
+    :param criteria:    filter criteria
+    :return: list of match dicts.
+    """
+    home = aliased(Team)
+    away = aliased(Team)
+    query = select(Match.id, Match.home_id, Match.away_id, Match.start_time,
+                   Match.result, Match.score_home, Match.score_away,
+                   home.name.label(M_HOME_NAME),
+                   away.name.label(M_AWAY_NAME)) \
+        .join(home, Match.home_id == home.id) \
+        .join(away, Match.away_id == away.id)
+
+    criteria = _match_criteria(criteria)
+    if criteria is not None:
+        query = query.filter(criteria)
+    order = _match_order(order_by)
+    if order is not None:
+        query = query.order_by(order)
+
+    with db_read_session() as session:
+        matches = [row._asdict() for row in session.execute(query).all()]
+
+    return matches
+
+
+def get_match_by_id(match_id: int, selections: Loading = Loading.JOINED,
+                    result_type: ResultType = ResultType.DICT):
     """
     Get a match.
     :param match_id: id of match to get
+    :param selections:  selections loading strategy, one of Loading
     :param result_type: type of result required, one of ResultType
     :return: match
     """
-    match = get_by_id(Match, match_id, result_type=result_type)
+    match = get_by_id(Match, match_id,
+                      options=_selections_options(selections),
+                      result_type=result_type)
     return standardise_match(match) if match is not None else match
 
 
 def get_match_by_id_and_team(match_id: int, team_id: int,
+                             selections: Loading = Loading.JOINED,
                              result_type: ResultType = ResultType.DICT):
     """
     Get a match.
     :param match_id: id of match to get
     :param team_id: id of match team
+    :param selections:  selections loading strategy, one of Loading
     :param result_type: type of result required, one of ResultType
     :return: match
     """
     match = get_one(Match, criteria=and_(
         Match.id == match_id, or_(
             Match.home_id == team_id, Match.away_id == team_id)),
+                    options=_selections_options(selections),
                     result_type=result_type)
     return standardise_match(match) if match is not None else match
 
@@ -160,83 +299,132 @@ def preprocess_match(session: scoped_session, model: Match):
 _HOME_AWAY_START_ = [M_START_TIME, M_HOME_ID, M_AWAY_ID]
 
 
+# Fixture conflicts in order of precedence, as tuples of conflict name, error
+# message and function to generate the criteria from the home & away team ids.
+_FIXTURE_CONFLICTS_ = [
+    ("home_away", "Away fixture conflict for Home team",
+     lambda home_id, away_id: Match.away_id == home_id),
+    ("away_home", "Home fixture conflict for Away team",
+     lambda home_id, away_id: Match.home_id == away_id),
+    ("duplicate", "Duplicate fixture exists",
+     lambda home_id, away_id: and_(Match.home_id == away_id,
+                                   Match.away_id == home_id)),
+    ("home_home", "Home fixture conflict for Home team",
+     lambda home_id, away_id: Match.home_id == home_id),
+    ("away_away", "Away fixture conflict for Away team",
+     lambda home_id, away_id: Match.away_id == away_id),
+]
+_CONFLICT_MSGS_ = {name: msg for name, msg, _ in _FIXTURE_CONFLICTS_}
+
+# Keys of per-request caches in app context; match verification results and
+# current match fixtures.
+_VERIFIED_MATCHES_ = "verified_matches"
+_MATCH_FIXTURES_ = "match_fixtures"
+
+
+def get_fixture_conflicts(start_time: datetime, home_id: int, away_id: int,
+                          match_id: int = None) -> list[str]:
+    """
+    Get the fixture conflicts for a match, in a single query.
+    :param start_time: match start time
+    :param home_id: id of home team
+    :param away_id: id of away team
+    :param match_id: id of match to exclude if update operation
+    :return: list of names of conflicts, in order of precedence
+    """
+    teams = [home_id, away_id]
+    criteria = [
+        Match.start_time == start_time,
+        or_(Match.home_id.in_(teams), Match.away_id.in_(teams))
+    ]
+    if match_id is not None:
+        criteria.append(Match.id != match_id)
+
+    query = select(*[
+        func.count(case((generator(home_id, away_id), 1))).label(name)
+        for name, _, generator in _FIXTURE_CONFLICTS_
+    ]).select_from(Match).filter(and_(*criteria))
+
+    with db_session() as session:
+        counts = session.execute(query).one()._asdict()
+
+    return [name for name, _, _ in _FIXTURE_CONFLICTS_ if counts[name] > 0]
+
+
+def _request_cache(key: str) -> Optional[dict]:
+    """
+    Get a per-request cache.
+    :param key: key of cache in app context
+    :return: cache dict, or None if not available
+    """
+    return g.setdefault(key, {}) if has_app_context() else None
+
+
+def _clear_match_caches():
+    """
+    Clear the per-request caches of match verification results and fixtures.
+    """
+    if has_app_context():
+        for key in [_VERIFIED_MATCHES_, _MATCH_FIXTURES_]:
+            g.pop(key, None)
+
+
+def _get_fixture(match_id: int) -> Optional[dict]:
+    """
+    Get the start time, and home and away team ids of a match.
+    :param match_id: id of match
+    :return: dict of fixture values, or None if not found
+    """
+    fixtures = _request_cache(_MATCH_FIXTURES_)
+    fixture = fixtures.get(match_id, None) if fixtures is not None else None
+    if fixture is None:
+        with db_session() as session:
+            current = session.execute(
+                select(Match.start_time, Match.home_id, Match.away_id)
+                .filter(Match.id == match_id)
+            ).first()
+        if current is not None:
+            fixture = current._asdict()
+            if fixtures is not None:
+                fixtures[match_id] = fixture
+    return fixture
+
+
 def verify_match(entity: dict, match_id: int = None):
     """
     Verify a match is valid.
     :param entity: Entity to check
     :param match_id: id of match if update operation
     """
-    if match_id is not None:
-        match = get_match_by_id(match_id, result_type=ResultType.DICT)
-        old = {
-            M_START_TIME: match.start_time,
-            M_HOME_ID: match.home_id,
-            M_AWAY_ID: match.away_id
-        }
-    else:
-        old = {k: None for k in _HOME_AWAY_START_}
-
-    with db_session() as session:
-        new = {
-            k: entity[k] if entity[k] is not None else None
-            for k in _HOME_AWAY_START_
-        }
-        # Verify conditions the database constraints can't check.
-        # Ensure no home/away/time conflict
-        check = {
-            k: new[k] if new[k] is not None else old[k]
-            for k in _HOME_AWAY_START_
-        }
-        if check[M_START_TIME] is not None and check[M_HOME_ID] is not None \
-                and check[M_AWAY_ID] is not None:
-            # Ensure no home team away/time conflict
-            count = session.query(Match) \
-                .filter(and_(
-                    Match.start_time == check[M_START_TIME],
-                    Match.away_id == check[M_HOME_ID]
-                )).count()
-            if count > 0:
-                raise ModelError(HTTPStatus.UNPROCESSABLE_ENTITY,
-                                 f"Away fixture conflict for Home team")
-            # Ensure no away team home/time conflict
-            count = session.query(Match) \
-                .filter(and_(
-                    Match.start_time == check[M_START_TIME],
-                    Match.home_id == check[M_AWAY_ID],
-                )).count()
-            if count > 0:
-                raise ModelError(HTTPStatus.UNPROCESSABLE_ENTITY,
-                                 f"Home fixture conflict for Away team")
-
-            # Verify database constraints.
-            # Ensure no duplicate fixture.
-            count = session.query(Match) \
-                .filter(and_(
-                    Match.start_time == check[M_START_TIME],
-                    Match.home_id == check[M_AWAY_ID],
-                    Match.away_id == check[M_HOME_ID]
-                )).count()
-            if count > 0:
-                raise ModelError(HTTPStatus.UNPROCESSABLE_ENTITY,
-                                 f"Duplicate fixture exists")
-            # Ensure no home team home/time conflict
-            count = session.query(Match) \
-                .filter(and_(
-                    Match.start_time == check[M_START_TIME],
-                    Match.home_id == check[M_HOME_ID],
-                )).count()
-            if count > 0:
-                raise ModelError(HTTPStatus.UNPROCESSABLE_ENTITY,
-                                 f"Home fixture conflict for Home team")
-            # Ensure no away team away/time conflict
-            count = session.query(Match) \
-                .filter(and_(
-                    Match.start_time == check[M_START_TIME],
-                    Match.away_id == check[M_AWAY_ID],
-                )).count()
-            if count > 0:
-                raise ModelError(HTTPStatus.UNPROCESSABLE_ENTITY,
-                                 f"Away fixture conflict for Away team")
+    check = {k: entity.get(k, None) for k in _HOME_AWAY_START_}
+
+    if match_id is not None and None in check.values():
+        # Use current values for anything not being updated.
+        current = _get_fixture(match_id)
+        if current is not None:
+            check = {
+                k: v if v is not None else current[k]
+                for k, v in check.items()
+            }
+
+    if None in check.values():
+        return
+
+    key = (match_id, check[M_START_TIME], check[M_HOME_ID], check[M_AWAY_ID])
+    verified = _request_cache(_VERIFIED_MATCHES_)
+    conflicts = verified.get(key, None) if verified is not None else None
+    if conflicts is None:
+        # Verify conditions the database constraints can't check, and the
+        # database constraints, in a single query.
+        conflicts = get_fixture_conflicts(
+            check[M_START_TIME], check[M_HOME_ID], check[M_AWAY_ID],
+            match_id=match_id)
+        if verified is not None:
+            verified[key] = conflicts
+
+    if len(conflicts) > 0:
+        raise ModelError(HTTPStatus.UNPROCESSABLE_ENTITY,
+                         _CONFLICT_MSGS_[conflicts[0]])
 
 
 def create_match(entity: dict, result_type: ResultType = ResultType.DICT):
@@ -254,6 +442,7 @@ def create_match(entity: dict, result_type: ResultType = ResultType.DICT):
     created = create_entity(Match.from_dict, entity, RESULT_ONE_MATCH,
                             result_type=result_type,
                             preprocess=preprocess_match)
+    _clear_match_caches()
     standardise_match(created[RESULT_ONE_MATCH])
     return created
 
@@ -266,50 +455,62 @@ def delete_match_by_id(match_id: int):
         "deleted": <number of affected entities>
     }
     """
-    return delete_by_id(Match, match_id)
+    deleted = delete_by_id(Match, match_id)
+    _clear_match_caches()
+    return deleted
 
 
-def remove_selections(criteria) -> int:
+def _apply_selections(session: scoped_session, match_id: int,
+                      removed: set, added: set):
     """
-    Remove match selections.
-    :param criteria: criteria to filter by
-    :return:
+    Remove and add match selections, using a single statement for each.
+    :param session:  current session
+    :param match_id: id of match to update
+    :param removed:  ids of players to remove
+    :param added:    ids of players to add
     """
-    with db_session() as session:
-        # Remove selections.
-        query = MatchSelections.select().filter(criteria)
-        delete = session.execute(query).scalar()
-        if delete is not None and delete > 0:
-            session.execute(
-                MatchSelections.delete().filter(criteria)
-            )
-        else:
-            delete = 0
+    if len(removed) > 0:
+        session.execute(
+            MatchSelections.delete().filter(
+                and_(MatchSelections.c.match_id == match_id,
+                     MatchSelections.c.user_id.in_(removed)))
+        )
 
-    return delete
+    if len(added) > 0:
+        session.execute(
+            MatchSelections.insert(), [{
+                M_MATCH_ID: match_id,
+                M_USER_ID: uid,
+                M_CONFIRMED: NO_STATUS
+            } for uid in sorted(added)]
+        )
 
 
-def add_selections(match_id: int, selections: Union[list, int]):
+def sync_selections(match_id: int,
+                    selections: Union[list, int]) -> tuple[int, int]:
     """
-    Add match selections.
+    Synchronise match selections with a list of selected players. Only the
+    players who are no longer selected are removed and only newly selected
+    players are added, so players who remain selected keep their confirmation
+    status.
     :param match_id:   id of match to update
-    :param selections: id(s) of
-    :return: updated result {
-        "updated": <number of affected entities>,
-        "match": <updated entity>
-    }
+    :param selections: id(s) of selected players
+    :return: tuple of number of removed and number of added selections
     """
+    selections = set(
+        selections if isinstance(selections, list) else [selections])
+
     with db_session() as session:
-        # Add new selections.
-        added = 0
-        for uid in selections if isinstance(selections, list) else [selections]:
-            session.execute(
-                MatchSelections.insert().values(
-                    match_id=match_id, user_id=uid, confirmed=NO_STATUS)
-            )
-            added = added + 1
+        current = set(session.execute(
+            select(MatchSelections.c.user_id)
+            .filter(MatchSelections.c.match_id == match_id)
+        ).scalars().all())
 
-    return added
+        removed = current - selections
+        added = selections - current
+        _apply_selections(session, match_id, removed, added)
+
+    return len(removed), len(added)
 
 
 def update_match(match_id: int, updates: dict,
@@ -325,33 +526,61 @@ def update_match(match_id: int, updates: dict,
     }
     """
     valid_updates = Match.is_valid_entity(updates, attribs=updates.keys())
-    result = {}
+    if any(k in valid_updates.keys() for k in _HOME_AWAY_START_):
+        verify_match(valid_updates, match_id=match_id)
+    result = {RESULT_UPDATED_COUNT: 0}
 
     # Process selection changes
     selections = valid_updates.pop(M_SELECTIONS, None)
     if selections is not None:
-        with db_session() as session:
-            # Remove old selections.
-            delete = remove_selections(MatchSelections.c.match_id == match_id)
-
-            # Add new selections.
-            added = add_selections(match_id, selections)
-
-            if delete > 0 or added > 0:
-                result[RESULT_UPDATED_COUNT] = 1
+        removed, added = sync_selections(match_id, selections)
+        if removed > 0 or added > 0:
+            result[RESULT_UPDATED_COUNT] = 1
 
     if len(valid_updates.keys()) > 0:
         result.update(update_entity(Match, valid_updates,
-                                    criteria=Match.id == match_id))
+                                    criteria=Match.id == match_id,
+                                    key=RESULT_ONE_MATCH,
+                                    result_type=result_type))
 
     if result[RESULT_UPDATED_COUNT] > 0:
-        result[RESULT_ONE_MATCH] = standardise_match(
-            get_match_by_id(match_id, result_type=result_type)
-        )
+        _clear_match_caches()
+        match = result.get(RESULT_ONE_MATCH, None)
+        if match is None:
+            match = get_match_by_id(match_id, result_type=result_type)
+        else:
+            # Updated match was returned, so just need its selections.
+            players = _get_selected_players(match_id, result_type=result_type)
+            if isinstance(match, dict):
+                match[M_SELECTIONS] = players
+            else:
+                set_committed_value(match, M_SELECTIONS, players)
+        result[RESULT_ONE_MATCH] = standardise_match(match)
 
     return result
 
 
+def _get_selected_players(match_id: int,
+                          result_type: ResultType = ResultType.DICT) -> list:
+    """
+    Get the players selected for a match.
+    :param match_id: id of match
+    :param result_type: type of result required, one of ResultType
+    :return: list of players
+    """
+    with db_read_session() as session:
+        players = session.execute(
+            select(User)
+            .join(MatchSelections, MatchSelections.c.user_id == User.id)
+            .filter(MatchSelections.c.match_id == match_id)
+            .order_by(User.id)
+        ).scalars().all()
+        if result_type == ResultType.DICT:
+            players = [player.get_dict() for player in players]
+
+    return players
+
+
 def player_selected_criteria(match_id: int, user_id: int):
     """
     Criteria to filter matches based on match and user ids.
@@ -370,7 +599,7 @@ def is_selected(match_id: int, user_id: int):
     :param user_id: id of user
     :return:
     """
-    with db_session() as session:
+    with db_read_session() as session:
         count = session.execute(
             MatchSelections.select().filter(
                 player_selected_criteria(match_id, user_id)
@@ -390,7 +619,7 @@ def is_selected_and_confirmed(match_id: int, user_id: int):
     """
     selected = False
     confirmed = False
-    with db_session() as session:
+    with db_read_session() as session:
         query = MatchSelections.select().filter(
             player_selected_criteria(match_id, user_id)
         )
@@ -403,18 +632,56 @@ def is_selected_and_confirmed(match_id: int, user_id: int):
     return selected, confirmed
 
 
+def get_selection_roster(match_id: int, role_id: int,
+                         team_id: int) -> list[dict]:
+    """
+    Get the users with the specified role & team, along with their selection
+    and confirmation status for a match, in a single query.
+    :param match_id: id of match
+    :param role_id:  role id of users to get
+    :param team_id:  team id of users to get
+    :return: list of user dicts, with "selected" and "confirmed" entries
+    """
+    with db_read_session() as session:
+        query = \
+            select(User.id, User.name, User.surname,
+                   MatchSelections.c.user_id.is_not(None).label(M_SELECTED),
+                   MatchSelections.c.confirmed) \
+            .select_from(User) \
+            .outerjoin(MatchSelections,
+                       and_(MatchSelections.c.user_id == User.id,
+                            MatchSelections.c.match_id == match_id)) \
+            .filter(and_(User.role_id == role_id, User.team_id == team_id)) \
+            .order_by(User.id)
+
+        roster = []
+        for player in session.execute(query).all():
+            player = player._asdict()
+            if not player[M_SELECTED]:
+                player[M_CONFIRMED] = False
+            roster.append(player)
+
+    return roster
+
+
 def get_selected_and_unconfirmed(user_id: int):
     """
     Get the list of matches for which a user is selected but has not yet
     confirmed availability.
     :param user_id: id of user
-    :return: tuple of selected status & confirmed status
+    :return: list of matches, including home and away team names
     """
-    with db_session() as session:
+    with db_read_session() as session:
         # Need final filter statement to resolve cartesian products.
+        home = aliased(Team)
+        away = aliased(Team)
         query = \
-            select(Match.id, Match.start_time, Match.home_id, Match.away_id) \
+            select(Match.id, Match.start_time, Match.home_id, Match.away_id,
+                   home.name.label(M_HOME_NAME),
+                   away.name.label(M_AWAY_NAME)) \
             .select_from(Match)\
+            .join(home, Match.home_id == home.id)\
+            .join(away, Match.away_id == away.id)\
             .filter(
                 and_(MatchSelections.c.user_id == user_id,
                      or_(MatchSelections.c.confirmed == NO_STATUS,
@@ -456,6 +723,19 @@ class SelectChoice(IntEnum):
                 break
         return choice
 
+    @staticmethod
+    def from_value(value: str):
+        """
+        Get value from a query argument or choice name.
+        :param value: query argument (e.g. 'y') or choice name (e.g. 'yes')
+        :return: choice or None if not valid
+        """
+        value = value.lower() if isinstance(value, str) else ''
+        for chk_arg, chk_choice in SELECT_CHOICE_OPTIONS:
+            if value == chk_arg or value == chk_choice.name.lower():
+                return chk_choice
+        return None
+
 
 SELECT_CHOICE_OPTIONS = [
     (YES_ARG, SelectChoice.YES),
@@ -465,65 +745,200 @@ SELECT_CHOICE_OPTIONS = [
 ]
 
 
+# Dialect specific inserts which support ignoring conflicts.
+_INSERT_IGNORE_DIALECTS_ = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def _insert_selection(session: scoped_session, match_id: int,
+                      user_id: int) -> int:
+    """
+    Add a match selection, if the user is not already selected.
+    :param session:  current session
+    :param match_id: id of match
+    :param user_id:  id of user
+    :return: number of selections added
+    """
+    values = {M_MATCH_ID: match_id, M_USER_ID: user_id, M_CONFIRMED: NO_STATUS}
+    dialect_insert = _INSERT_IGNORE_DIALECTS_.get(
+        session.get_bind().dialect.name, None)
+    if dialect_insert is not None:
+        query = dialect_insert(MatchSelections).values(**values) \
+            .on_conflict_do_nothing()
+    else:
+        query = MatchSelections.insert().from_select(
+            list(values.keys()),
+            select(*[literal(v) for v in values.values()]).where(
+                ~exists().where(player_selected_criteria(match_id, user_id)))
+        )
+    return session.execute(query).rowcount
+
+
 def set_selection(match_id: int, user_id: int,
-                  choice: SelectChoice = SelectChoice.TOGGLE):
+                  choice: SelectChoice = SelectChoice.TOGGLE) -> bool:
     """
     Set a user's selection status for a match
     :param match_id: id of match
     :param user_id: id of user
     :param choice:
+    :return: True if user is selected after the update
     """
-    add = False
-    remove = False
-    selected = is_selected(match_id, user_id)
-    if choice == SelectChoice.TOGGLE:
-        if selected:
-            remove = True
-        else:
-            add = True
-    elif choice == SelectChoice.YES:
-        if not selected:
-            add = True
-    elif choice == SelectChoice.NO:
-        if selected:
-            remove = True
-    else:
+    if choice not in [SelectChoice.YES, SelectChoice.NO, SelectChoice.TOGGLE]:
         raise ValueError(f"Invalid choice option: {choice}")
 
-    if add:
-        add_selections(match_id, [user_id])
-    elif remove:
-        remove_selections(
-            player_selected_criteria(match_id, user_id)
-        )
+    with db_session() as session:
+        selected = False
+        if choice != SelectChoice.YES:
+            removed = session.execute(
+                MatchSelections.delete().filter(
+                    player_selected_criteria(match_id, user_id))
+            ).rowcount
+            # Toggle selects if there was nothing to remove.
+            selected = (choice == SelectChoice.TOGGLE and removed == 0)
+
+        if choice == SelectChoice.YES or selected:
+            _insert_selection(session, match_id, user_id)
+            selected = True
 
+    return selected
 
-def set_confirmation(match_id: int, user_id: int,
-                     choice: SelectChoice = SelectChoice.MAYBE):
+
+def selection_choices(choices: dict) -> dict[int, SelectChoice]:
     """
-    Set a user's confirmation status for a match
+    Convert a dict of requested selection choices.
+    :param choices: dict of selection choice, one of 'yes', 'no' or 'toggle'
+                    (or the corresponding query arguments), by user id
+    :return: dict of SelectChoice by user id
+    :raise ModelError if choices are invalid
+    """
+    if not isinstance(choices, dict) or len(choices) == 0:
+        raise ModelError(HTTPStatus.UNPROCESSABLE_ENTITY,
+                         "Invalid selections value")
+
+    valid_choices = {}
+    for user_id, value in choices.items():
+        try:
+            user_id = int(user_id)
+        except ValueError:
+            raise ModelError(HTTPStatus.UNPROCESSABLE_ENTITY,
+                             f"Invalid user id: {user_id}")
+        choice = SelectChoice.from_value(value)
+        if choice not in [SelectChoice.YES, SelectChoice.NO,
+                          SelectChoice.TOGGLE]:
+            raise ModelError(HTTPStatus.UNPROCESSABLE_ENTITY,
+                             f"Invalid selection for user {user_id}: {value}")
+        valid_choices[user_id] = choice
+
+    return valid_choices
+
+
+def set_selections(match_id: int, choices: dict[int, SelectChoice],
+                   team_id: int = None) -> tuple[int, int]:
+    """
+    Set the selection status of multiple users for a match, in a single
+    transaction.
     :param match_id: id of match
-    :param user_id: id of user
-    :param choice:
+    :param choices:  dict of SelectChoice by user id
+    :param team_id:  id of team whose players may be selected, or None for
+                     the players of either match team
+    :return: tuple of number of removed and number of added selections
+    :raise ModelError if any user is not a player of a match team
     """
-    with db_session() as session:
-        if is_selected(match_id, user_id):
+    team_criteria = or_(User.team_id == Match.home_id,
+                        User.team_id == Match.away_id)
+    if team_id is not None:
+        team_criteria = and_(team_criteria, User.team_id == team_id)
 
-            if choice == SelectChoice.NO:
-                confirmed = NOT_AVAILABLE_STATUS
-            elif choice == SelectChoice.MAYBE:
-                confirmed = MAYBE_STATUS
+    with db_session() as session:
+        # Read the selection status of the users who may be selected, in the
+        # same transaction as the updates.
+        players = session.execute(
+            select(User.id,
+                   MatchSelections.c.user_id.is_not(None).label(M_SELECTED))
+            .select_from(User)
+            .join(Match, Match.id == match_id)
+            .outerjoin(MatchSelections,
+                       and_(MatchSelections.c.user_id == User.id,
+                            MatchSelections.c.match_id == match_id))
+            .filter(and_(User.id.in_(choices.keys()),
+                         User.role_id == get_role_id(PLAYER_ROLE),
+                         team_criteria))
+        ).all()
+
+        invalid = set(choices.keys()) - {player.id for player in players}
+        if len(invalid) > 0:
+            raise ModelError(
+                HTTPStatus.UNPROCESSABLE_ENTITY,
+                f"Invalid user id(s): "
+                f"{', '.join(str(uid) for uid in sorted(invalid))}")
+
+        selected = {player.id for player in players if player.selected}
+
+        removed = set()
+        added = set()
+        for user_id, choice in choices.items():
+            if choice == SelectChoice.TOGGLE:
+                (removed if user_id in selected else added).add(user_id)
             elif choice == SelectChoice.YES:
-                confirmed = CONFIRMED_STATUS
+                if user_id not in selected:
+                    added.add(user_id)
+            elif choice == SelectChoice.NO:
+                if user_id in selected:
+                    removed.add(user_id)
             else:
                 raise ValueError(f"Invalid choice option: {choice}")
 
-            updated = session.execute(
-                MatchSelections.update().filter(
-                    player_selected_criteria(match_id, user_id)
-                ).values(confirmed=confirmed)
-            )
+        _apply_selections(session, match_id, removed, added)
+
+    return len(removed), len(added)
+
+
+def get_match_selections(match_id: int) -> list[dict]:
+    """
+    Get the selections for a match.
+    :param match_id: id of match
+    :return: list of selection dicts, with "user_id" and "confirmed" entries
+    """
+    with db_read_session() as session:
+        selections = [
+            selection._asdict() for selection in session.execute(
+                select(MatchSelections.c.user_id, MatchSelections.c.confirmed)
+                .filter(MatchSelections.c.match_id == match_id)
+                .order_by(MatchSelections.c.user_id)
+            ).all()
+        ]
+
+    return selections
+
+
+def set_confirmation(match_id: int, user_id: int,
+                     choice: SelectChoice = SelectChoice.MAYBE) \
+        -> Optional[int]:
+    """
+    Set a user's confirmation status for a match
+    :param match_id: id of match
+    :param user_id: id of user
+    :param choice:
+    :return: confirmation status after the update, or None if user is not
+             selected
+    """
+    if choice == SelectChoice.NO:
+        confirmed = NOT_AVAILABLE_STATUS
+    elif choice == SelectChoice.MAYBE:
+        confirmed = MAYBE_STATUS
+    elif choice == SelectChoice.YES:
+        confirmed = CONFIRMED_STATUS
+    else:
+        raise ValueError(f"Invalid choice option: {choice}")
+
+    with db_session() as session:
+        updated = session.execute(
+            MatchSelections.update().filter(
+                player_selected_criteria(match_id, user_id)
+            ).values(confirmed=confirmed)
+        ).rowcount
 
-            if updated is not None:
-                pass
+    return confirmed if updated > 0 else None
 
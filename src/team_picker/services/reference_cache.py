@@ -0,0 +1,80 @@
+import abc
+import threading
+import time
+from typing import Any, Optional
+
+MISS_RELOAD_INTERVAL = 30   # Min time in seconds between reloads on a miss.
+
+
+class ReferenceCache(abc.ABC):
+    """
+    In-process cache of reference data, which rarely changes.
+    The data is loaded on first use and lookups are answered from memory.
+    As the data may be changed by another process, a lookup miss triggers a
+    reload, which is throttled by a minimum reload interval. Optionally, the
+    data may also be reloaded after a maximum age.
+    """
+
+    def __init__(self, reload_interval: float = MISS_RELOAD_INTERVAL,
+                 ttl: Optional[float] = None):
+        """
+        Constructor
+        :param reload_interval: minimum time in seconds between reloads on a
+                                lookup miss
+        :param ttl: max time in seconds before the data is reloaded, or None
+                    for no limit
+        """
+        self._reload_interval = reload_interval
+        self._ttl = ttl
+        self._data = None           # Loaded data.
+        self._loaded = None         # Monotonic time of last load.
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def _fetch(self) -> Any:
+        """
+        Fetch the data from the database.
+        :return: data
+        """
+
+    def data(self, miss: bool = False) -> Any:
+        """
+        Get the data, loading it if required.
+        :param miss: lookup miss flag; reload if interval has elapsed
+        :return: data
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._data is None or \
+                    (miss and now - self._loaded >= self._reload_interval) or \
+                    (self._ttl is not None and now - self._loaded >= self._ttl):
+                self._data = self._fetch()
+                self._loaded = now
+            return self._data
+
+    def lookup(self, name: str, key: Any) -> Any:
+        """
+        Lookup a value in a dict in the data, reloading on a miss.
+        :param name: name of dict in data
+        :param key: key of value
+        :return: value or None if not found
+        """
+        value = self.data()[name].get(key, None)
+        if value is None:
+            value = self.data(miss=True)[name].get(key, None)
+        return value
+
+    def invalidate(self):
+        """
+        Invalidate the cache, so the data is reloaded on next use.
+        """
+        with self._lock:
+            self._data = None
+
+    def reload(self):
+        """
+        Reload the data from the database.
+        """
+        with self._lock:
+            self._data = self._fetch()
+            self._loaded = time.monotonic()
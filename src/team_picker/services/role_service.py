@@ -1,9 +1,86 @@
+from typing import Optional
+
 from sqlalchemy import func
 
-from ..constants import MANAGER_ROLE, PLAYER_ROLE, RESULT_ONE_ROLE
-from ..models import ResultType, Role, M_ID
+from ..constants import (MANAGER_ROLE, PLAYER_ROLE, RESULT_ONE_ROLE,
+                         RESULT_CREATED_COUNT
+                         )
+from ..models import ResultType, Role, M_ID, M_ROLE
 from .base_service import get_all, get_by_id, exists_by_id, get_one, \
     create_entity
+from .reference_cache import ReferenceCache
+
+ROLES_BY_ID = 'by_id'       # Role names by id.
+ROLES_BY_NAME = 'by_name'   # Role ids by lowercase name.
+
+
+class RoleRegistry(ReferenceCache):
+    """
+    In-process registry of roles.
+    """
+
+    def _fetch(self) -> dict:
+        """
+        Fetch the roles from the database.
+        :return: role lookups
+        """
+        roles = get_all(Role, order_by=Role.id)
+        return {
+            ROLES_BY_ID: {r[M_ID]: r[M_ROLE] for r in roles},
+            ROLES_BY_NAME: {r[M_ROLE].lower(): r[M_ID] for r in roles},
+        }
+
+    def role_id(self, role: str) -> Optional[int]:
+        """
+        Get the id of a role.
+        :param role: role name, case insensitive
+        :return: role id or None if not found
+        """
+        return self.lookup(ROLES_BY_NAME, role.lower())
+
+    def role_name(self, role_id: int) -> Optional[str]:
+        """
+        Get the name of a role.
+        :param role_id: role id
+        :return: role name or None if not found
+        """
+        return self.lookup(ROLES_BY_ID, role_id)
+
+
+role_registry = RoleRegistry()
+
+
+def invalidate_roles():
+    """
+    Invalidate the role registry, so roles are reloaded on next use.
+    """
+    role_registry.invalidate()
+
+
+def reload_roles():
+    """
+    Reload the role registry from the database. Hook for processes to pick up
+    roles created by other processes.
+    """
+    role_registry.reload()
+
+
+def get_role_id(role: str) -> Optional[int]:
+    """
+    Get the id of a role.
+    :param role: role name, case insensitive
+    :return: role id or None if not found
+    """
+    return role_registry.role_id(role)
+
+
+def get_role_name(role_id: int) -> Optional[str]:
+    """
+    Get the name of a role.
+    :param role_id: role id
+    :return: role name or None if not found
+    """
+    return role_registry.role_name(role_id)
 
 
 def get_all_roles(result_type: ResultType = ResultType.DICT):
@@ -52,8 +129,7 @@ def _is_role(role_id: int, role: str) -> bool:
     :param role: role to get
     :return: team
     """
-    role_info = get_role_by_role(role)
-    return role_id == role_info[M_ID]
+    return role_id == get_role_id(role)
 
 
 def is_manager_role(role_id: int) -> bool:
@@ -85,7 +161,11 @@ def create_role(entity: dict, result_type: ResultType = ResultType.DICT):
         "role": <new entity>
     }
     """
-    return create_entity(Role.from_dict, entity, RESULT_ONE_ROLE,
-                         result_type=result_type)
+    created = create_entity(Role.from_dict, entity, RESULT_ONE_ROLE,
+                            result_type=result_type)
+    if created[RESULT_CREATED_COUNT] > 0:
+        invalidate_roles()
+
+    return created
 
 
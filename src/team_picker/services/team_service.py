@@ -1,10 +1,92 @@
+from typing import Optional, Iterator
+
 from ..constants import (
-    RESULT_ONE_TEAM, RESULT_UPDATED_COUNT, UNASSIGNED_TEAM_NAME
+    RESULT_ONE_TEAM, RESULT_UPDATED_COUNT, UNASSIGNED_TEAM_NAME,
+    RESULT_CREATED_COUNT, RESULT_DELETED_COUNT
 )
-from ..models import ResultType, Team, M_ID, M_NAME, entity_to_dict
+from ..models import ResultType, Team, M_ID, M_NAME
 from .base_service import (get_all, get_by_id, create_entity, delete_by_id,
-                           exists_by_id, update_entity, get_one
+                           exists_by_id, update_entity, get_one, get_page,
+                           stream_all
                            )
+from .reference_cache import ReferenceCache
+
+TEAM_CACHE_TTL = 60     # Max time in seconds before team data is reloaded.
+
+TEAMS_BY_ID = 'by_id'           # Team names by id.
+TEAM_CHOICES = 'choices'        # List of (id, name) tuples.
+UNASSIGNED_TEAM_ID = 'unassigned'   # Unassigned team id.
+
+
+class TeamCache(ReferenceCache):
+    """
+    In-process cache of team reference data.
+    """
+
+    def _fetch(self) -> dict:
+        """
+        Fetch the teams from the database.
+        :return: team lookups
+        """
+        teams = get_all(Team, order_by=Team.id)
+        unassigned = [t[M_ID] for t in teams
+                      if t[M_NAME] == UNASSIGNED_TEAM_NAME]
+        return {
+            TEAMS_BY_ID: {t[M_ID]: t[M_NAME] for t in teams},
+            TEAM_CHOICES: [(t[M_ID], t[M_NAME]) for t in teams],
+            UNASSIGNED_TEAM_ID: unassigned[0] if len(unassigned) else None,
+        }
+
+    def team_name(self, team_id: int) -> Optional[str]:
+        """
+        Get the name of a team.
+        :param team_id: team id
+        :return: team name or None if not found
+        """
+        return self.lookup(TEAMS_BY_ID, team_id)
+
+    def choices(self) -> list[tuple[int, str]]:
+        """
+        Get the team choices.
+        :return: list of (id, name) tuples
+        """
+        return self.data()[TEAM_CHOICES]
+
+    def unassigned_team_id(self) -> Optional[int]:
+        """
+        Get team id of the unassigned team.
+        :return: team id
+        """
+        team_id = self.data()[UNASSIGNED_TEAM_ID]
+        if team_id is None:
+            team_id = self.data(miss=True)[UNASSIGNED_TEAM_ID]
+        return team_id
+
+
+team_cache = TeamCache(ttl=TEAM_CACHE_TTL)
+
+
+def invalidate_teams():
+    """
+    Invalidate the team cache, so teams are reloaded on next use.
+    """
+    team_cache.invalidate()
+
+
+def reload_teams():
+    """
+    Reload the team cache from the database. Hook for processes to pick up
+    team changes made by other processes.
+    """
+    team_cache.reload()
+
+
+def get_team_choices() -> list[tuple[int, str]]:
+    """
+    Get the team choices.
+    :return: list of (id, name) tuples
+    """
+    return team_cache.choices()
 
 
 def get_all_teams(result_type: ResultType = ResultType.DICT):
@@ -16,13 +98,35 @@ def get_all_teams(result_type: ResultType = ResultType.DICT):
     return get_all(Team, result_type=result_type)
 
 
+def stream_teams(result_type: ResultType = ResultType.DICT) -> Iterator:
+    """
+    Stream all teams, in id order.
+    :param result_type: type of result required, one of ResultType
+    :return: iterator of all teams.
+    """
+    return stream_all(Team, order_by=Team.id, result_type=result_type)
+
+
+def get_teams_page(limit: int, cursor: Optional[str] = None,
+                   result_type: ResultType = ResultType.DICT) \
+        -> tuple[list, Optional[str]]:
+    """
+    Get a page of teams, in id order.
+    :param limit:       max number of teams in page
+    :param cursor:      cursor from previous page, or None for first page
+    :param result_type: type of result required, one of ResultType
+    :return: tuple of list of teams and cursor for next page or None
+    """
+    return get_page(Team, [Team.id], limit, cursor=cursor,
+                    result_type=result_type)
+
+
 def get_all_team_names():
     """
     Get all team names.
     :return: list of all team names.
     """
-    return [entity_to_dict(t)[M_NAME] for t in get_all(
-        Team, with_entities=Team.name, result_type=ResultType.MODEL)]
+    return [name for _, name in team_cache.choices()]
 
 
 def get_team_by_id(team_id: int, result_type: ResultType = ResultType.DICT):
@@ -65,8 +169,12 @@ def create_team(entity: dict, result_type: ResultType = ResultType.DICT):
         "team": <new entity>
     }
     """
-    return create_entity(Team.from_dict, entity, RESULT_ONE_TEAM,
-                         result_type=result_type)
+    created = create_entity(Team.from_dict, entity, RESULT_ONE_TEAM,
+                            result_type=result_type)
+    if created[RESULT_CREATED_COUNT] > 0:
+        invalidate_teams()
+
+    return created
 
 
 def delete_team_by_id(team_id: int):
@@ -77,7 +185,11 @@ def delete_team_by_id(team_id: int):
         "deleted": <number of affected entities>
     }
     """
-    return delete_by_id(Team, team_id)
+    deleted = delete_by_id(Team, team_id)
+    if deleted[RESULT_DELETED_COUNT] > 0:
+        invalidate_teams()
+
+    return deleted
 
 
 def update_team(team_id: int, updates: dict,
@@ -93,10 +205,10 @@ def update_team(team_id: int, updates: dict,
     }
     """
     result = update_entity(Team, Team.is_valid_entity(updates),
-                           criteria=Team.id == team_id)
+                           criteria=Team.id == team_id, key=RESULT_ONE_TEAM,
+                           result_type=result_type)
     if result[RESULT_UPDATED_COUNT] > 0:
-        result[RESULT_ONE_TEAM] = get_team_by_id(
-            team_id, result_type=result_type)
+        invalidate_teams()
 
     return result
 
@@ -106,8 +218,7 @@ def get_unassigned_team_id() -> int:
     Get team id of the unassigned team.
     :return: team id
     """
-    unassigned = get_team_by_name(UNASSIGNED_TEAM_NAME)
-    return unassigned[M_ID]
+    return team_cache.unassigned_team_id()
 
 
 def is_unassigned_team(team_id: int) -> bool:
@@ -125,9 +236,7 @@ def get_team_name(team_id: int):
     :param team_id:     id of team to get
     :return: team name
     """
-    team = get_one(Team, with_entities=Team.name, criteria=Team.id == team_id,
-                   result_type=ResultType.DICT)
-    return team[M_NAME] if team is not None else None
+    return team_cache.team_name(team_id)
 
 
 
@@ -1,10 +1,13 @@
+from typing import Optional, Iterator
+
 from sqlalchemy import and_
 from sqlalchemy.orm import scoped_session
 
-from ..constants import RESULT_UPDATED_COUNT, RESULT_ONE_USER
+from ..constants import RESULT_ONE_USER
 from ..models import db_session, ResultType, User
 from .base_service import get_all, get_by_id, exists_by_id, create_entity, \
-    delete_by_id, update_entity, get_by_id_raw, get_one
+    delete_by_id, update_entity, get_by_id_raw, get_one, get_page, \
+    stream_all
 
 
 def get_all_users(result_type: ResultType = ResultType.DICT):
@@ -16,6 +19,29 @@ def get_all_users(result_type: ResultType = ResultType.DICT):
     return get_all(User, result_type=result_type)
 
 
+def stream_users(result_type: ResultType = ResultType.DICT) -> Iterator:
+    """
+    Stream all users, in id order.
+    :param result_type: type of result required, one of ResultType
+    :return: iterator of all users.
+    """
+    return stream_all(User, order_by=User.id, result_type=result_type)
+
+
+def get_users_page(limit: int, cursor: Optional[str] = None,
+                   result_type: ResultType = ResultType.DICT) \
+        -> tuple[list, Optional[str]]:
+    """
+    Get a page of users, in id order.
+    :param limit:       max number of users in page
+    :param cursor:      cursor from previous page, or None for first page
+    :param result_type: type of result required, one of ResultType
+    :return: tuple of list of users and cursor for next page or None
+    """
+    return get_page(User, [User.id], limit, cursor=cursor,
+                    result_type=result_type)
+
+
 def get_user_by_id(user_id: int, result_type: ResultType = ResultType.DICT):
     """
     Get a user.
@@ -110,12 +136,8 @@ def update_user(user_id: int, updates: dict,
         "user": <updated entity>
     }
     """
-    result = update_entity(User,
-                           User.is_valid_entity(updates,
-                                                attribs=updates.keys()),
-                           criteria=User.id == user_id)
-    if result[RESULT_UPDATED_COUNT] > 0:
-        result[RESULT_ONE_USER] = get_user_by_id(
-            user_id, result_type=result_type)
-
-    return result
+    return update_entity(User,
+                         User.is_valid_entity(updates,
+                                              attribs=updates.keys()),
+                         criteria=User.id == user_id, key=RESULT_ONE_USER,
+                         result_type=result_type)
@@ -1,6 +1,7 @@
-from .misc import (success_result, error_result, http_error_result,
-                   print_exc_info, eval_environ_var_truthy,
-                   eval_environ_var_none, current_datetime,
+from .misc import (success_result, stream_type, stream_result, error_result,
+                   http_error_result, print_exc_info, eval_environ_var_truthy,
+                   eval_environ_var_none, config_value,
+                   current_datetime,
                    local_datetime
                    )
 from .HTTPHeader import HTTPHeader
@@ -12,11 +13,14 @@ from .forms_misc import *
 
 __all__ = [
     'success_result',
+    'stream_type',
+    'stream_result',
     'error_result',
     'http_error_result',
     'print_exc_info',
     'eval_environ_var_truthy',
     'eval_environ_var_none',
+    'config_value',
     'current_datetime',
     'local_datetime',
 
@@ -5,13 +5,18 @@ from datetime import datetime
 from dateutil import tz
 from dateutil.parser import parse
 from http import HTTPStatus
-from typing import Any, Optional
+from typing import Any, Optional, Iterable
 
-from flask import jsonify, Response
+from flask import (jsonify, Response, request, current_app,
+                   stream_with_context
+                   )
 
 from .forms_misc import HOME_VENUE
 
 from ..auth.exception import AuthError
+from ..constants import (STREAM_QUERY, YES_ARG, APPLICATION_JSON,
+                         APPLICATION_NDJSON
+                         )
 from ..util.exception import AppError
 
 
@@ -46,6 +51,61 @@ def success_result(**kwargs):
     return _make_result(True, **kwargs)
 
 
+def stream_type() -> Optional[str]:
+    """
+    Get the type of streamed result requested.
+    A streamed json result is requested via the 'stream' query, and a
+    streamed newline delimited json result via the 'Accept' header.
+    :return: APPLICATION_JSON, APPLICATION_NDJSON or None if a streamed
+             result was not requested
+    """
+    if request.accept_mimetypes.best_match(
+            [APPLICATION_JSON, APPLICATION_NDJSON]) == APPLICATION_NDJSON:
+        mimetype = APPLICATION_NDJSON
+    elif request.args.get(STREAM_QUERY, '', type=str).lower() == YES_ARG:
+        mimetype = APPLICATION_JSON
+    else:
+        mimetype = None
+    return mimetype
+
+
+def stream_result(key: str, entities: Iterable, mimetype: str,
+                  **kwargs) -> Response:
+    """
+    Make a streamed success json result, where each entity is serialised and
+    sent as it is read, rather than serialising the whole result first.
+    :param key:      key for entities in result
+    :param entities: iterable of entities
+    :param mimetype: APPLICATION_JSON for a result with the entities as a
+                     json array, or APPLICATION_NDJSON for newline
+                     delimited json entities
+    :param kwargs:   additional result data as key/value pairs, ignored for
+                     newline delimited json
+    :return: Response
+    """
+    dumps = current_app.json.dumps
+
+    def generate_ndjson():
+        for entity in entities:
+            yield f"{dumps(entity)}\n"
+
+    def generate_json():
+        result = dumps({'success': True, **kwargs})
+        # Open the entities array in place of the closing brace.
+        yield f"{result[:-1]}, {dumps(key)}: ["
+        separator = ''
+        for entity in entities:
+            yield f"{separator}{dumps(entity)}"
+            separator = ', '
+        yield "]}"
+
+    return Response(
+        stream_with_context(
+            generate_ndjson() if mimetype == APPLICATION_NDJSON
+            else generate_json()),
+        mimetype=mimetype)
+
+
 def error_result(error: int, message: str, **kwargs) -> Response:
     """
     Make a fail json result.
@@ -125,6 +185,18 @@ def eval_environ_var_none(environ_var: str) -> Optional[str]:
     return value
 
 
+def config_value(cfg: dict, key: str, dflt_val):
+    """
+    Get an optional configuration value.
+    :param cfg: configuration
+    :param key: configuration key
+    :param dflt_val: default value if not configured
+    :return: value
+    """
+    value = cfg.get(key, None)
+    return dflt_val if value is None else value
+
+
 def current_datetime():
     """ Current datetime to minute accuracy """
     return datetime.today().replace(second=0, microsecond=0)
@@ -93,6 +93,10 @@ class BaseTestCase(unittest.TestCase):
         """ Get the application database instance """
         return self.app.extensions.get("sqlalchemy")
 
+    def app_config(self) -> dict:
+        """ Get additional application configuration for the test case """
+        return {}
+
     def setUp(self):
         # Start patching 'auth' functions.
         self.mocker = {
@@ -131,7 +135,9 @@ class BaseTestCase(unittest.TestCase):
                 NON_INTERACTIVE_CLIENT_ID: 'm2m_app_id',
                 NON_INTERACTIVE_CLIENT_SECRET: 'm2m_app_secret',
                 TEAM_PLAYER_ROLE_ID: 'auth0_player_role_id',
-                TEAM_MANAGER_ROLE_ID: 'auth0_manager_role_id'
+                TEAM_MANAGER_ROLE_ID: 'auth0_manager_role_id',
+
+                **self.app_config()
             })
         self.app.testing = True
         self.client = self.app.test_client()
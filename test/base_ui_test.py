@@ -3,6 +3,7 @@ from typing import Optional, List
 from base_test import BaseTestCase, AUTH_PATH, PERMISSIONS_BY_ROLE, \
     SERVER_SESSION_PATH
 from misc import MatchParam, UserType
+from team_picker.auth.auth import SETUP_QUERY
 from team_picker.constants import *
 from team_picker.models import M_ROLE, M_ROLE_ID, M_NAME, M_AUTH0_ID, M_TEAM_ID
 
@@ -108,8 +109,15 @@ class UiBaseTestCase(BaseTestCase):
                     DB_ID: 0,
                     M_TEAM_ID: 0
                 }
-            mock_profile.update(profile)
+            # The setup complete flag isn't held in the session, it's
+            # derived from the setup state.
             setup_complete = profile[SETUP_COMPLETE]
+            mock_profile.update({
+                k: v for k, v in profile.items() if k != SETUP_COMPLETE
+            })
+            mock_profile[SETUP_STATE] = {
+                SETUP_QUERY: None if setup_complete else NEW_USER_QUERY
+            }
         self.mocker.get(SESSION_PROFILE).return_value = mock_profile
         self.mocker.get(CHECK_SETUP_COMPLETE).return_value = setup_complete
 
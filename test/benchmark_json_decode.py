@@ -0,0 +1,90 @@
+"""
+Micro-benchmark of JSON decoding, comparing decoding of the known date/time
+fields with decoding of all string values matching the ISO 8601 pattern.
+
+Usage: python benchmark_json_decode.py [entries]
+"""
+import json
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from team_picker.models.JsonDeEncoder import TPDefaultJSONProvider
+
+NUM_ENTRIES = 10000         # Default number of entries in body.
+REPEAT = 5                  # Number of timing repeats.
+
+
+class AllStringsJSONProvider(TPDefaultJSONProvider):
+    """ Provider decoding all string values matching ISO 8601 """
+    datetime_fields = None
+
+
+def make_body(num_entries: int) -> str:
+    """
+    Make a large request body, of matches and Auth0 style user profiles.
+    :param num_entries: number of matches & users
+    :return: json string
+    """
+    kick_off = datetime(2023, 1, 7, 14, 0)
+    body = {
+        "matches": [{
+            "home_id": 2,
+            "away_id": 3,
+            "start_time": (kick_off + timedelta(days=index)).isoformat(),
+            "result": False,
+            "score_home": 0,
+            "score_away": 0,
+            "selections": list(range(1, 16)),
+        } for index in range(num_entries)],
+        "users": [{
+            "user_id": f"auth0|{index:012d}",
+            "name": f"Name{index} Surname{index}",
+            "email": f"user{index}@example.com",
+            "created_at": "2021-05-25T15:53:25.531Z",
+            "updated_at": "2021-05-25T17:33:55.526Z",
+            "last_login": "2021-05-25T17:33:55.526Z",
+            "logins_count": index,
+            "notes": "Free text notes about the player, which are not dates.",
+        } for index in range(num_entries)],
+    }
+    return json.dumps(body)
+
+
+def best_time(func, number: int = 1) -> float:
+    """
+    Get the best time of a function.
+    :param func:   function to time
+    :param number: number of executions per repeat
+    :return: best time in seconds
+    """
+    return min(timeit.repeat(func, number=number, repeat=REPEAT))
+
+
+def main(num_entries: int = NUM_ENTRIES):
+    app = Flask(__name__)
+    body = make_body(num_entries)
+    all_strings = AllStringsJSONProvider(app)
+    datetime_fields = TPDefaultJSONProvider(app)
+
+    # Both modes must produce the same result for this body.
+    assert all_strings.loads(body) == datetime_fields.loads(body), \
+        "Mismatch between decode modes"
+
+    results = [
+        ("json.loads", best_time(lambda: json.loads(body))),
+        ("all strings", best_time(lambda: all_strings.loads(body))),
+        ("datetime fields", best_time(lambda: datetime_fields.loads(body))),
+    ]
+
+    print(f"{len(body) / 1024 / 1024:.1f} MB body, best of {REPEAT}")
+    baseline = results[1][1]
+    for name, elapsed in results:
+        print(f"  {name:<16} {elapsed * 1000:9.1f} ms  "
+              f"x{baseline / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,141 @@
+"""
+Benchmark of the dashboard reminder query, which gets the matches a player
+is selected for but has not confirmed, with and without the selection and
+user indexes.
+
+Usage: python benchmark_selection_indexes.py [selections] [lookups]
+"""
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import insert
+
+from team_picker.models import (db, Role, User, Team, Match, MatchSelections,
+                                M_ID, M_ROLE_ID, M_TEAM_ID, M_NAME,
+                                M_SURNAME, M_AUTH0_ID, M_HOME_ID, M_AWAY_ID,
+                                M_START_TIME, M_MATCH_ID, M_USER_ID,
+                                M_CONFIRMED
+                                )
+from team_picker.services import (get_selected_and_unconfirmed,
+                                  get_users_by_role_and_team
+                                  )
+from team_picker.util import (NO_STATUS, CONFIRMED_STATUS, MAYBE_STATUS,
+                              NOT_AVAILABLE_STATUS
+                              )
+
+NUM_SELECTIONS = 100000     # Default number of selections.
+NUM_LOOKUPS = 200           # Default number of lookups per timing.
+NUM_TEAMS = 50              # Number of teams.
+PLAYERS_PER_TEAM = 20       # Number of players per team.
+SELECTED_PER_MATCH = 15     # Number of selections per team per match.
+REPEAT = 5                  # Number of timing repeats.
+
+INDEXES = [
+    index for table in [MatchSelections, User.__table__]
+    for index in table.indexes
+    if index.name in ['ix_selections_user_confirmed', 'ix_users_role_team']
+]
+
+
+def seed(num_selections: int):
+    """
+    Seed the database.
+    :param num_selections: number of selections
+    """
+    random.seed(1)
+    db.session.execute(insert(Role), [{M_ID: 1, 'role': 'player'}])
+    db.session.execute(insert(Team), [
+        {M_ID: team, M_NAME: f"Team {team}"}
+        for team in range(1, NUM_TEAMS + 1)
+    ])
+    db.session.execute(insert(User), [
+        {M_ID: player, M_NAME: f"Name{player}", M_SURNAME: f"Surname{player}",
+         M_AUTH0_ID: f"auth0|{player:012d}", M_ROLE_ID: 1,
+         M_TEAM_ID: (player - 1) // PLAYERS_PER_TEAM + 1}
+        for player in range(1, NUM_TEAMS * PLAYERS_PER_TEAM + 1)
+    ])
+
+    num_matches = num_selections // SELECTED_PER_MATCH
+    kick_off = datetime(2020, 1, 4, 14, 0)
+    matches = []
+    selections = []
+    statuses = [NO_STATUS, CONFIRMED_STATUS, MAYBE_STATUS,
+                NOT_AVAILABLE_STATUS]
+    for match_id in range(1, num_matches + 1):
+        home_id, away_id = random.sample(range(1, NUM_TEAMS + 1), 2)
+        matches.append({
+            M_ID: match_id, M_HOME_ID: home_id, M_AWAY_ID: away_id,
+            M_START_TIME: kick_off + timedelta(hours=match_id)
+        })
+        first = (home_id - 1) * PLAYERS_PER_TEAM + 1
+        selections.extend([
+            {M_MATCH_ID: match_id, M_USER_ID: player,
+             M_CONFIRMED: random.choice(statuses)}
+            for player in random.sample(
+                range(first, first + PLAYERS_PER_TEAM), SELECTED_PER_MATCH)
+        ])
+    db.session.execute(insert(Match), matches)
+    db.session.execute(insert(MatchSelections), selections)
+    db.session.commit()
+
+
+def best_time(func, number: int = 1) -> float:
+    """
+    Get the best time of a function.
+    :param func:   function to time
+    :param number: number of executions per repeat
+    :return: best time in seconds
+    """
+    return min(timeit.repeat(func, number=number, repeat=REPEAT))
+
+
+def time_lookups(num_lookups: int) -> tuple[float, float]:
+    """
+    Time the lookups.
+    :param num_lookups: number of lookups
+    :return: tuple of avg reminder and avg team players times in seconds
+    """
+    players = random.sample(range(1, NUM_TEAMS * PLAYERS_PER_TEAM + 1),
+                            num_lookups)
+    teams = [random.randint(1, NUM_TEAMS) for _ in range(num_lookups)]
+
+    reminders = best_time(
+        lambda: [get_selected_and_unconfirmed(player) for player in players])
+    team_players = best_time(
+        lambda: [get_users_by_role_and_team(1, team) for team in teams])
+    return reminders / num_lookups, team_players / num_lookups
+
+
+def main(num_selections: int = NUM_SELECTIONS,
+         num_lookups: int = NUM_LOOKUPS):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        seed(num_selections)
+        engine = db.engine
+
+        for index in INDEXES:
+            index.drop(engine)
+        without_indexes = time_lookups(num_lookups)
+        for index in INDEXES:
+            index.create(engine)
+        with_indexes = time_lookups(num_lookups)
+
+    print(f"{num_selections} selections, {num_lookups} lookups, "
+          f"best of {REPEAT}")
+    for name, before, after in [
+        ("reminders", without_indexes[0], with_indexes[0]),
+        ("team players", without_indexes[1], with_indexes[1]),
+    ]:
+        print(f"  {name:<14} {before * 1e6:9.1f} us -> {after * 1e6:9.1f} us"
+              f"  x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,81 @@
+"""
+Micro-benchmark of model serialisation, comparing the compiled per-model
+serialiser used by MultiDictMixin.get_dict() with the reflective
+MultiDictMixin.reflect_dict().
+
+Usage: python benchmark_serialise.py [matches] [players per match]
+"""
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from team_picker.models import Match, User, serialiser
+
+NUM_MATCHES = 10000         # Default number of matches.
+NUM_PLAYERS = 15            # Default number of selections per match.
+REPEAT = 5                  # Number of timing repeats.
+
+
+def make_matches(num_matches: int, num_players: int) -> list[Match]:
+    """
+    Make matches with selections.
+    :param num_matches: number of matches
+    :param num_players: number of selections per match
+    :return: list of matches
+    """
+    players = []
+    for index in range(num_players):
+        player = User(name=f"Name{index}", surname=f"Surname{index}",
+                      auth0_id=f"auth0|{index:012d}", role_id=2, team_id=2)
+        player.id = index + 1
+        players.append(player)
+
+    kick_off = datetime(2023, 1, 7, 14, 0)
+    matches = []
+    for index in range(num_matches):
+        match = Match(home_id=2, away_id=3,
+                      start_time=kick_off + timedelta(days=index),
+                      selections=players)
+        match.id = index + 1
+        matches.append(match)
+    return matches
+
+
+def best_time(func, number: int = 1) -> float:
+    """
+    Get the best time of a function.
+    :param func:   function to time
+    :param number: number of executions per repeat
+    :return: best time in seconds
+    """
+    return min(timeit.repeat(func, number=number, repeat=REPEAT))
+
+
+def main(num_matches: int = NUM_MATCHES, num_players: int = NUM_PLAYERS):
+    matches = make_matches(num_matches, num_players)
+
+    # Both paths must produce the same dicts.
+    for match in matches[:10]:
+        assert match.get_dict() == match.reflect_dict(), \
+            f"Mismatch for match {match.id}"
+
+    to_dict = serialiser(Match)
+    results = [
+        ("reflect_dict", best_time(
+            lambda: [m.reflect_dict() for m in matches])),
+        ("get_dict", best_time(
+            lambda: [m.get_dict() for m in matches])),
+        ("serialiser", best_time(
+            lambda: [to_dict(m) for m in matches])),
+    ]
+
+    print(f"{num_matches} matches with {num_players} selections, "
+          f"best of {REPEAT}")
+    baseline = results[0][1]
+    for name, elapsed in results:
+        print(f"  {name:<14} {elapsed * 1000:9.1f} ms  "
+              f"x{baseline / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
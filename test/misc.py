@@ -4,6 +4,8 @@ import urllib.parse
 from copy import deepcopy
 from enum import Enum
 
+from sqlalchemy import event, text
+
 # Regex to match parameters in url templates.
 __REGEX_CONVERTER__ = re.compile(r'.?(<(string|int|float):(\w+)>)',
                                  re.IGNORECASE)
@@ -28,6 +30,73 @@ def make_url(base_url: str, **kwargs):
     return f'{url}?{params}' if args is not None and len(args) > 0 else url
 
 
+class QueryCounter:
+    """
+    Context manager to count the SQL statements executed by an engine.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self.statements = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters,
+                               context, executemany):
+        self.count = self.count + 1
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute',
+                     self._before_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        event.remove(self.engine, 'before_cursor_execute',
+                     self._before_cursor_execute)
+
+
+# Database dialects supported by explain().
+EXPLAIN_DIALECTS = ['sqlite', 'postgresql']
+
+
+def explain(session, query) -> list[str]:
+    """
+    Get the query plan for a query.
+    Only the dialects in EXPLAIN_DIALECTS are supported.
+    :param session: database session
+    :param query:   query to explain
+    :return: list of query plan lines
+    """
+    dialect = session.get_bind().dialect
+    sql = query.compile(dialect=dialect,
+                        compile_kwargs={"literal_binds": True})
+    if dialect.name == 'postgresql':
+        # Small test tables would otherwise be scanned sequentially.
+        session.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = [row[0] for row in
+                session.execute(text(f"EXPLAIN {sql}")).all()]
+    else:
+        plan = [row[3] for row in
+                session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()]
+    return plan
+
+
+def uses_index(plan: list[str], table: str) -> bool:
+    """
+    Check if a query plan uses an index, rather than scanning a table.
+    :param plan:  query plan lines
+    :param table: name of table
+    :return: True if index used
+    """
+    scans = [line for line in plan
+             if line == f"SCAN {table}" or    # sqlite
+             f"Seq Scan on {table}" in line]  # postgresql
+    searches = [line for line in plan
+                if line.startswith(f"SEARCH {table} USING") or  # sqlite
+                "Index" in line]                                # postgresql
+    return len(scans) == 0 and len(searches) > 0
+
+
 class MatchParam(Enum):
     IGNORE = 1              # don't try to match
 
@@ -6,6 +6,9 @@ from test_users import UsersTestCase
 from test_matches import MatchesTestCase
 from test_user_setup_ui import UsersSetupTestCase
 from test_match_ui import TestMatchUiCase
+from test_auth_cache import AuthCacheTestCase
+from test_database import (DatabaseTestCase, ReplicaTestCase,
+                           UnitOfWorkTestCase, PerCallTestCase)
 
 # Make the tests conveniently executable
 if __name__ == "__main__":
@@ -0,0 +1,618 @@
+import json
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from unittest.mock import patch
+
+import requests
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+from base_test import BaseTestCase, NO_PERMISSIONS, PROFILE_IN_SESSION
+from team_picker.auth.auth import (verify_decode_jwt, get_setup_state,
+                                   invalidate_setup_state,
+                                   check_setup_complete,
+                                   get_profile_setup_complete
+                                   )
+from team_picker.auth.exception import AuthError
+from team_picker.auth.http_client import HttpClient
+from team_picker.auth.jwks import JwksKeyStore
+from team_picker.auth.management import MgmtTokenManager
+from team_picker.auth.misc import get_auth0_base_url
+from team_picker.auth.server_session import session_clear
+from team_picker.auth.token_cache import VerifiedTokenCache
+from team_picker.auth.user_cache import CoalescingTtlCache
+from team_picker.constants import (PROFILE_KEY, ACCESS_TOKEN, SETUP_STATE,
+                                  SET_TEAM_QUERY
+                                  )
+from team_picker.models import (M_ID, M_NAME, M_SURNAME, M_AUTH0_ID,
+                                M_ROLE_ID, M_TEAM_ID
+                                )
+
+TEST_KID = 'test-kid'
+ALGORITHM = 'RS256'
+AUDIENCE = 'dev'
+JWKS_MODULE = 'team_picker.auth.jwks'
+TOKEN_CACHE_MODULE = 'team_picker.auth.token_cache'
+SESSION_MODULE = 'team_picker.auth.server_session'
+AUTH_MODULE = 'team_picker.auth.auth'
+
+
+def make_rsa_key() -> tuple[str, dict]:
+    """
+    Make an RSA key pair.
+    :return: tuple of private key PEM and public JWK
+    """
+    private_key = rsa.generate_private_key(public_exponent=65537,
+                                           key_size=2048)
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    ).decode()
+    public_jwk = jwk.construct(private_pem, ALGORITHM).public_key().to_dict()
+    return private_pem, public_jwk
+
+
+class JwksFetcher:
+    """
+    Fake JSON Web Key Set endpoint, which counts fetches.
+    """
+
+    def __init__(self, public_jwk: dict, delay: float = 0):
+        self.jwks = {
+            'keys': [public_jwk | {'kid': TEST_KID, 'use': 'sig'}]
+        }
+        self.delay = delay
+        self.count = 0
+        self.fail = False
+        self._lock = threading.Lock()
+
+    def __call__(self) -> dict:
+        with self._lock:
+            self.count = self.count + 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("JWKS endpoint unavailable")
+        return self.jwks
+
+
+class MgmtTokenFetcher:
+    """
+    Fake client credentials endpoint, which counts fetches.
+    """
+
+    def __init__(self, expires_in: Optional[float], delay: float = 0):
+        self.expires_in = expires_in
+        self.delay = delay
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> dict:
+        with self._lock:
+            self.count = self.count + 1
+            count = self.count
+        if self.delay:
+            time.sleep(self.delay)
+        response = {'access_token': f'token{count}'}
+        if self.expires_in is not None:
+            response['expires_in'] = self.expires_in
+        return response
+
+
+class UserLoader:
+    """
+    Fake management api user lookup, which counts loads.
+    """
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.count = 0
+        self.fail = False
+        self._lock = threading.Lock()
+
+    def __call__(self) -> dict:
+        with self._lock:
+            self.count = self.count + 1
+            count = self.count
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("Management api unavailable")
+        return {'logins_count': count}
+
+
+class IdpRequestHandler(BaseHTTPRequestHandler):
+    """
+    Fake identity provider endpoint, which records client connections.
+    """
+    protocol_version = 'HTTP/1.1'   # Keep-alive connections.
+    connections = set()
+    failures = 0
+
+    def do_GET(self):
+        IdpRequestHandler.connections.add(self.client_address)
+        if IdpRequestHandler.failures > 0:
+            IdpRequestHandler.failures = IdpRequestHandler.failures - 1
+            status, body = 503, b''
+        else:
+            status, body = 200, json.dumps({'path': self.path}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass    # Suppress request logging.
+
+
+class AuthCacheTestCase(BaseTestCase):
+    """This class represents the test case for authentication caching."""
+
+    private_pem = None
+    public_jwk = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.private_pem, cls.public_jwk = make_rsa_key()
+
+    def setUp(self):
+        """
+        Method called to prepare the test fixture.
+        This is called immediately before calling the test method.
+        """
+        super().setUp()
+
+    def tearDown(self):
+        """
+        Method called immediately after the test method has been called
+        and the result recorded.
+        """
+        super().tearDown()
+
+    def make_token(self, payload: dict = None, kid: str = TEST_KID) -> str:
+        """
+        Make a signed access token.
+        :param payload: additional payload
+        :param kid: id of signing key
+        :return: token
+        """
+        if payload is None:
+            payload = {}
+        claims = {
+            'iss': f'{get_auth0_base_url()}/',
+            'aud': AUDIENCE,
+            'sub': 'auth0|test',
+            'exp': datetime.utcnow() + timedelta(hours=1),
+        } | NO_PERMISSIONS | payload
+        return jwt.encode(claims, self.private_pem, algorithm=ALGORITHM,
+                          headers={'kid': kid})
+
+    def test_jwks_cached(self):
+        """
+        Test the key set is only fetched once while valid.
+        """
+        fetcher = JwksFetcher(self.public_jwk)
+        store = JwksKeyStore(fetcher, ALGORITHM)
+
+        for _ in range(5):
+            self.assertIsNotNone(store.get_key(TEST_KID))
+        self.assertEqual(1, fetcher.count)
+
+    def test_jwks_expired(self):
+        """
+        Test the key set is refetched once expired.
+        """
+        fetcher = JwksFetcher(self.public_jwk)
+        store = JwksKeyStore(fetcher, ALGORITHM, ttl=0,
+                             min_refresh_interval=0)
+
+        for count in range(1, 4):
+            self.assertIsNotNone(store.get_key(TEST_KID))
+            self.assertEqual(count, fetcher.count)
+
+    def test_jwks_unknown_kid_throttled(self):
+        """
+        Test unknown key ids only trigger a throttled refetch.
+        """
+        fetcher = JwksFetcher(self.public_jwk)
+        store = JwksKeyStore(fetcher, ALGORITHM, min_refresh_interval=3600)
+
+        self.assertIsNotNone(store.get_key(TEST_KID))
+        for _ in range(5):
+            self.assertIsNone(store.get_key('forged-kid'))
+        self.assertEqual(1, fetcher.count)
+
+        store = JwksKeyStore(fetcher, ALGORITHM, min_refresh_interval=0)
+        fetcher.count = 0
+        self.assertIsNotNone(store.get_key(TEST_KID))
+        self.assertIsNone(store.get_key('forged-kid'))
+        self.assertEqual(2, fetcher.count)
+
+    def test_jwks_single_flight(self):
+        """
+        Test only one of a number of concurrent threads fetches the key set.
+        """
+        fetcher = JwksFetcher(self.public_jwk, delay=0.2)
+        store = JwksKeyStore(fetcher, ALGORITHM)
+
+        keys = []
+        threads = [
+            threading.Thread(target=lambda: keys.append(store.get_key(TEST_KID)))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, fetcher.count)
+        self.assertEqual(10, len(keys))
+        for key in keys:
+            self.assertIsNotNone(key)
+
+    def test_jwks_fetch_failure(self):
+        """
+        Test the existing keys are used if a refetch fails.
+        """
+        fetcher = JwksFetcher(self.public_jwk)
+        store = JwksKeyStore(fetcher, ALGORITHM, ttl=0,
+                             min_refresh_interval=0)
+
+        with self.app.app_context():
+            self.assertIsNotNone(store.get_key(TEST_KID))
+            fetcher.fail = True
+            self.assertIsNotNone(store.get_key(TEST_KID))
+            self.assertEqual(2, fetcher.count)
+
+            store.clear()
+            with self.assertRaises(ConnectionError):
+                store.get_key(TEST_KID)
+
+        # A failed initial fetch doesn't throttle the next fetch.
+        fetcher = JwksFetcher(self.public_jwk)
+        fetcher.fail = True
+        store = JwksKeyStore(fetcher, ALGORITHM, min_refresh_interval=3600)
+
+        with self.app.app_context():
+            with self.assertRaises(ConnectionError):
+                store.get_key(TEST_KID)
+            fetcher.fail = False
+            self.assertIsNotNone(store.get_key(TEST_KID))
+            self.assertEqual(2, fetcher.count)
+
+    def test_verify_decode_jwt(self):
+        """
+        Test token verification using the key store.
+        """
+        fetcher = JwksFetcher(self.public_jwk)
+        store = JwksKeyStore(fetcher, ALGORITHM)
+
+        with patch(f'{JWKS_MODULE}.jwks_store', store):
+            for _ in range(3):
+                payload = verify_decode_jwt(self.make_token())
+                self.assertEqual(NO_PERMISSIONS['permissions'],
+                                 payload['permissions'])
+            self.assertEqual(1, fetcher.count)
+
+            with self.assertRaises(AuthError):
+                verify_decode_jwt(self.make_token(kid='forged-kid'))
+
+    def test_token_cache(self):
+        """
+        Test the verified token cache.
+        """
+        now = time.time()
+        cache = VerifiedTokenCache(max_size=2)
+
+        self.assertIsNone(cache.get('token1'))
+        cache.put('token1', {'exp': now + 3600})
+        cache.put('token2', {'exp': now + 3600})
+        self.assertIsNotNone(cache.get('token1'))
+
+        # Least recently used entry is evicted.
+        cache.put('token3', {'exp': now + 3600})
+        self.assertIsNone(cache.get('token2'))
+        self.assertIsNotNone(cache.get('token1'))
+        self.assertIsNotNone(cache.get('token3'))
+
+        # Expired and unbounded entries aren't returned.
+        cache.put('token4', {'exp': now - 1})
+        self.assertIsNone(cache.get('token4'))
+        cache.put('token5', {})
+        self.assertIsNone(cache.get('token5'))
+
+        cache.evict('token1')
+        self.assertIsNone(cache.get('token1'))
+
+        self.assertEqual({'size': 1, 'hits': 3, 'misses': 5}, cache.stats())
+
+        # Caching disabled.
+        cache = VerifiedTokenCache(max_size=0)
+        cache.put('token1', {'exp': now + 3600})
+        self.assertIsNone(cache.get('token1'))
+
+    def test_verify_decode_jwt_cached(self):
+        """
+        Test repeated verification of a token uses the verified token cache.
+        """
+        fetcher = JwksFetcher(self.public_jwk)
+        store = JwksKeyStore(fetcher, ALGORITHM)
+        cache = VerifiedTokenCache()
+        token = self.make_token()
+
+        with patch(f'{JWKS_MODULE}.jwks_store', store), \
+                patch(f'{TOKEN_CACHE_MODULE}.token_cache', cache):
+            first = verify_decode_jwt(token)
+            with patch('team_picker.auth.auth.get_signing_key') as get_key:
+                for _ in range(3):
+                    self.assertEqual(first, verify_decode_jwt(token))
+                get_key.assert_not_called()
+            self.assertEqual({'size': 1, 'hits': 3, 'misses': 1},
+                             cache.stats())
+
+            # Logout evicts the session token.
+            with patch(f'{SESSION_MODULE}.session', {
+                PROFILE_KEY: {ACCESS_TOKEN: token}
+            }):
+                session_clear()
+            self.assertEqual(0, cache.stats()['size'])
+
+    def test_mgmt_token_lazy(self):
+        """
+        Test the management API token is fetched on first use, and the client
+        is shared.
+        """
+        fetcher = MgmtTokenFetcher(86400)
+        manager = MgmtTokenManager(fetcher, lambda token: {'token': token})
+        self.assertEqual(0, fetcher.count)
+
+        client = manager.get_client()
+        self.assertEqual({'token': 'token1'}, client)
+        for _ in range(3):
+            self.assertIs(client, manager.get_client())
+        self.assertEqual('token1', manager.get_token())
+        self.assertEqual(1, fetcher.count)
+
+        # Expired token is refetched on demand.
+        manager.invalidate()
+        self.assertEqual({'token': 'token2'}, manager.get_client())
+        self.assertEqual(2, fetcher.count)
+        manager.invalidate()
+
+    def test_mgmt_token_background_refresh(self):
+        """
+        Test the management API token is refreshed in the background before
+        it expires.
+        """
+        fetcher = MgmtTokenFetcher(60)
+        manager = MgmtTokenManager(fetcher, lambda token: {'token': token},
+                                   refresh_margin=59.9)
+
+        self.assertEqual({'token': 'token1'}, manager.get_client())
+        fetcher.expires_in = 86400
+        # Allow the refresh to be installed.
+        for _ in range(500):
+            if manager.get_token() != 'token1':
+                break
+            time.sleep(0.01)
+        self.assertEqual({'token': 'token2'}, manager.get_client())
+        manager.invalidate()
+
+    def test_mgmt_token_single_fetch(self):
+        """
+        Test the management API token is fetched by a single thread, and the
+        current token is served while a refresh is in progress.
+        """
+        # Token without an expiry uses the default lifetime.
+        fetcher = MgmtTokenFetcher(None, delay=0.2)
+        manager = MgmtTokenManager(fetcher, lambda token: {'token': token})
+
+        tokens = []
+        threads = [
+            threading.Thread(target=lambda: tokens.append(manager.get_token()))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(['token1'] * 10, tokens)
+        self.assertEqual(1, fetcher.count)
+
+        # Slow background refresh doesn't block requests for the token.
+        refresh = threading.Thread(target=manager._background_refresh)
+        refresh.start()
+        start = time.monotonic()
+        self.assertEqual('token1', manager.get_token())
+        self.assertLess(time.monotonic() - start, fetcher.delay)
+        refresh.join()
+        self.assertEqual('token2', manager.get_token())
+        self.assertEqual(2, fetcher.count)
+        manager.invalidate()
+
+    def test_user_cache(self):
+        """
+        Test management api user details are cached.
+        """
+        loader = UserLoader()
+        cache = CoalescingTtlCache(ttl=3600)
+
+        for _ in range(3):
+            self.assertEqual({'logins_count': 1}, cache.get('user', loader))
+        self.assertEqual(1, loader.count)
+
+        self.assertEqual({'logins_count': 2},
+                         cache.get('user', loader, refresh=True))
+        cache.evict('user')
+        self.assertEqual({'logins_count': 3}, cache.get('user', loader))
+
+        # Expired entries are reloaded.
+        cache = CoalescingTtlCache(ttl=0, stale_ttl=0)
+        self.assertEqual({'logins_count': 4}, cache.get('user', loader))
+        self.assertEqual({'logins_count': 5}, cache.get('user', loader))
+
+    def test_user_cache_coalesced(self):
+        """
+        Test concurrent lookups of the same user are coalesced.
+        """
+        loader = UserLoader(delay=0.2)
+        cache = CoalescingTtlCache()
+
+        users = []
+        threads = [
+            threading.Thread(
+                target=lambda: users.append(cache.get('user', loader)))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, loader.count)
+        self.assertEqual([{'logins_count': 1}] * 10, users)
+
+        # Failures are reported to all waiting threads, and not cached.
+        loader.fail = True
+        errors = []
+
+        def get_user():
+            try:
+                cache.get('other', loader)
+            except ConnectionError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=get_user) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(2, loader.count)
+        self.assertEqual(5, len(errors))
+
+    def test_user_cache_stale_while_revalidate(self):
+        """
+        Test stale user details are returned while they are reloaded.
+        """
+        loader = UserLoader(delay=0.2)
+        cache = CoalescingTtlCache(ttl=1, stale_ttl=3600)
+
+        self.assertEqual({'logins_count': 1}, cache.get('user', loader))
+        time.sleep(1)
+
+        start = time.monotonic()
+        for _ in range(3):
+            self.assertEqual({'logins_count': 1}, cache.get('user', loader))
+        self.assertLess(time.monotonic() - start, 0.2)
+
+        # Single background reload.
+        for _ in range(100):
+            if loader.count == 2:
+                break
+            time.sleep(0.01)
+        time.sleep(0.3)
+        self.assertEqual({'logins_count': 2}, cache.get('user', loader))
+        self.assertEqual(2, loader.count)
+    def test_http_client(self):
+        """
+        Test the http client reuses connections, retries and records latency.
+        """
+        server = ThreadingHTTPServer(('127.0.0.1', 0), IdpRequestHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f'http://127.0.0.1:{server.server_address[1]}'
+        client = HttpClient(retries=2)
+        try:
+            IdpRequestHandler.connections = set()
+            for _ in range(5):
+                self.assertEqual({'path': '/jwks'},
+                                 client.get_json('jwks', f'{url}/jwks'))
+            self.assertEqual(1, len(IdpRequestHandler.connections))
+
+            # Transient failures are retried.
+            IdpRequestHandler.failures = 2
+            self.assertEqual({'path': '/userinfo'},
+                             client.get_json('userinfo', f'{url}/userinfo'))
+
+            # Retries are bounded.
+            IdpRequestHandler.failures = 3
+            with self.assertRaises(requests.HTTPError):
+                client.get_json('userinfo', f'{url}/userinfo')
+
+            stats = client.stats()
+            self.assertEqual(5, stats['jwks']['count'])
+            self.assertEqual(0, stats['jwks']['errors'])
+            self.assertEqual(2, stats['userinfo']['count'])
+            self.assertEqual(1, stats['userinfo']['errors'])
+        finally:
+            IdpRequestHandler.failures = 0
+            client.close()
+            server.shutdown()
+            server.server_close()
+
+    def test_setup_state(self):
+        """
+        Test the setup state saved in the session is used until invalidated.
+        """
+        profile = {SETUP_STATE: None}
+        self.mocker.get(PROFILE_IN_SESSION).return_value = True
+
+        # The functions under test and the session accessors are patched
+        # explicitly, as other test cases may leave mocks of them in place.
+        with patch(f'{SESSION_MODULE}.session_profile',
+                   return_value=profile), \
+                patch(f'{AUTH_MODULE}.is_logged_in', return_value=True), \
+                patch(f'{AUTH_MODULE}.check_setup_complete',
+                      check_setup_complete), \
+                patch(f'{AUTH_MODULE}.get_profile_setup_complete',
+                      get_profile_setup_complete), \
+                patch(f'{AUTH_MODULE}.get_jwt_payload') as get_jwt_payload, \
+                patch(f'{AUTH_MODULE}.get_user_by_email') as get_user_by_email, \
+                patch(f'{AUTH_MODULE}.get_profile_auth0_id',
+                      return_value='auth0|unknown'), \
+                self.app.app_context():
+            get_jwt_payload.return_value = {'email': 'player@teampicker.com'}
+            get_user_by_email.return_value = {'logins_count': 1}
+
+            # New user, state saved in session.
+            self.assertIsNotNone(check_setup_complete())
+            self.assertEqual(1, get_user_by_email.call_count)
+            self.assertFalse(get_profile_setup_complete())
+            get_user_by_email.return_value = {'logins_count': 5}
+
+            with patch(f'{AUTH_MODULE}.check_setup_complete') as check:
+                for _ in range(3):
+                    self.assertIsNotNone(get_setup_state())
+                check.assert_not_called()
+
+                invalidate_setup_state()
+                check.return_value = SET_TEAM_QUERY
+                self.assertEqual(SET_TEAM_QUERY, get_setup_state())
+                check.assert_called_once()
+
+            # Setup complete flag is derived from the saved state.
+            profile[SETUP_STATE] = None
+            self.assertFalse(get_profile_setup_complete())
+            get_user_by_email.return_value = {'logins_count': 5}
+            with patch(f'{AUTH_MODULE}.get_user_by_auth0_id') as get_user, \
+                    patch(f'{AUTH_MODULE}.is_unassigned_team',
+                          return_value=False):
+                get_user.return_value = {
+                    M_ID: 1, M_NAME: 'Name', M_SURNAME: 'Surname',
+                    M_AUTH0_ID: 'auth0|player', M_ROLE_ID: 0, M_TEAM_ID: 1
+                }
+                self.assertIsNone(get_setup_state())
+            self.assertTrue(get_profile_setup_complete())
+            self.assertEqual({SETUP_STATE}, set(profile))
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
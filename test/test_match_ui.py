@@ -13,7 +13,7 @@ from base_test import BaseTestCase
 from base_ui_test import UiBaseTestCase, MENU_BASIC_ALL, MENU_MANAGER_ALL, \
     MENU_PLAYER_ALL, MENU_MANAGER_NA, MENU_PLAYER_NA, \
     MENU_BASIC_NA
-from misc import make_url, MatchParam, UserType, Expect
+from misc import make_url, MatchParam, UserType, Expect, QueryCounter
 from team_picker.constants import (LOGIN_URL, SETUP_COMPLETE,
                                    DASHBOARD_URL, YES_ARG, DB_ID,
                                    MATCHES_UI_URL,
@@ -27,14 +27,18 @@ from team_picker.constants import (LOGIN_URL, SETUP_COMPLETE,
                                    MATCH_SELECTIONS_UI_URL,
                                    MATCH_USER_SELECTION_UI_URL, USER_ID_PARAM,
                                    MATCH_USER_CONFIRM_UI_URL,
-                                   PATCH_OWN_MATCH_PERMISSION,
+                                   PATCH_OWN_MATCH_PERMISSION, TOGGLE_ARG,
+                                   RESULT_LIST_SELECTIONS
                                    )
 from team_picker.models import (M_ID, M_NAME, M_AUTH0_ID, M_TEAM_ID,
                                 M_START_TIME, M_RESULT, M_SCORE_AWAY,
                                 M_SCORE_HOME, M_AWAY_ID, M_HOME_ID,
-                                M_SELECTIONS, M_CONFIRMED
+                                M_SELECTIONS, M_CONFIRMED, M_SELECTED,
+                                entity_to_dict
                                 )
-from team_picker.services import get_all_matches
+from team_picker.services import (get_all_matches, get_selection_roster,
+                                  is_selected_and_confirmed, get_role_id
+                                  )
 from team_picker.util import HOME_VENUE, AWAY_VENUE, DateRange, \
     NO_OPTION_SELECTED, NO_STATUS, MAYBE_STATUS, NOT_AVAILABLE_STATUS, \
     CONFIRMED_STATUS
@@ -774,6 +778,71 @@ class TestMatchUiCase(UiBaseTestCase):
                         # Verify matches listed correctly.
                         self.assert_matches_list(user, user_type, test_matches)
 
+    # @unittest.skip
+    def test_list_matches_query_count(self):
+        """
+        Test the number of queries to list matches doesn't depend on the number
+        of matches.
+        """
+        with self.app.app_context():
+            engine = self.get_db().engine
+
+        manager = [user for user in self.users.values()
+                   if TestMatchUiCase.is_manager(user)][0]
+        role = get_role_from_id(manager.role_id)
+
+        counts = []
+        for _ in range(2):
+            # Add more matches each time.
+            test_matches, _ = self.generate_test_matches()
+
+            self.set_permissions_and_profile(
+                manager, UserType.MANAGER, role, GET_MATCH_PERMISSION)
+            with self.client as client:
+                # Initial request to load any cached reference data.
+                client.get(make_url(MATCHES_UI_URL))
+
+                with QueryCounter(engine) as counter:
+                    resp = client.get(
+                        make_url(MATCHES_UI_URL,
+                                 **{ORDER_QUERY: ORDER_DATE_ASC}))
+            self.assertEqual(HTTPStatus.OK, resp.status_code)
+            counts.append(counter.count)
+
+        self.assertEqual(counts[0], counts[1])
+
+    # @unittest.skip
+    def test_selection_roster(self):
+        """
+        Test the selection roster for a match is retrieved in a single query.
+        """
+        test_matches, players = self.generate_test_matches()
+
+        with self.app.app_context():
+            engine = self.get_db().engine
+            player_role_id = get_role_id(PLAYER_ROLE)
+
+            for match in test_matches:
+                selected = [entity_to_dict(player)[M_ID]
+                            for player in match.selections]
+                for team_id in [match.home_id, match.away_id]:
+                    with self.subTest(match=match, team_id=team_id):
+                        with QueryCounter(engine) as counter:
+                            roster = get_selection_roster(
+                                match.id, player_role_id, team_id)
+                        self.assertEqual(1, counter.count)
+
+                        self.assertEqual(sorted(players[team_id][M_ID]),
+                                         [p[M_ID] for p in roster])
+                        for player in roster:
+                            self.assertEqual(
+                                is_selected_and_confirmed(
+                                    match.id, player[M_ID]),
+                                (player[M_SELECTED], player[M_CONFIRMED]))
+                            self.assertEqual(
+                                player[M_ID] in selected,
+                                player[M_SELECTED])
+
     @staticmethod
     def team_is_playing(team: Union[int, UserData], match: MatchData):
         team_id = team.team_id if isinstance(team, UserData) else team
@@ -1257,6 +1326,151 @@ class TestMatchUiCase(UiBaseTestCase):
                                 self.assert_status_and_redirect(
                                     resp, http_status, url=url)
 
+    # @unittest.skip
+    def test_update_match_selections_batch(self):
+        """
+        Test managers can update the selections of multiple players at once.
+        """
+        # Create matches to test with.
+        test_matches, players = self.generate_test_matches()
+
+        manager = [user for user in self.users.values()
+                   if TestMatchUiCase.is_manager(user)][0]
+        role = get_role_from_id(manager.role_id)
+        match = [m for m in test_matches
+                 if TestMatchUiCase.team_is_playing(manager, m)][0]
+        with self.app.app_context():
+            before = {
+                player_id: is_selected_and_confirmed(match.id, player_id)[0]
+                for player_id in players[manager.team_id][M_ID]
+            }
+
+        self.set_permissions_and_profile(
+            manager, UserType.MANAGER, role, POST_MATCH_PERMISSION)
+        with self.client as client:
+            # Fields other than the per-user choices are ignored.
+            resp = client.post(
+                make_url(MATCH_SELECTIONS_UI_URL, **{MATCH_ID_PARAM: match.id}),
+                data={player_id: TOGGLE_ARG for player_id in before.keys()} |
+                {'csrf_token': 'abcdef123456ghijk'}
+            )
+
+        selections_url = make_url(MATCH_SELECTIONS_UI_URL,
+                                  **{MATCH_ID_PARAM: match.id})
+        self.assert_status_and_redirect(
+            resp, HTTPStatus.FOUND, url=selections_url)
+        with self.app.app_context():
+            for player_id, selected in before.items():
+                with self.subTest(player_id=player_id):
+                    self.assertEqual(
+                        not selected,
+                        is_selected_and_confirmed(match.id, player_id)[0])
+
+        with self.client as client:
+            resp = client.get(selections_url)
+        soup = self.assert_status_and_redirect(resp, HTTPStatus.OK)
+        self.assertEqual('Match selections', str(soup.title.string))
+        for choice in ['y', 'n']:
+            with self.subTest(choice=choice):
+                self.assertIsNotNone(
+                    soup.find('button', id=f'select-all-{choice}'))
+
+        # A json update returns the selection roster.
+        with self.client as client:
+            resp = client.post(selections_url,
+                               json={player_id: YES_ARG
+                                     for player_id in before.keys()})
+        self.assertEqual(HTTPStatus.OK, resp.status_code)
+        self.assertEqual(
+            {player_id: True for player_id in before.keys()},
+            {player[M_ID]: player[M_SELECTED]
+             for player in resp.get_json()[RESULT_LIST_SELECTIONS]})
+
+        # Only the players of the manager's team may be selected.
+        other_player = [
+            player_id for team_id, team_players in players.items()
+            if team_id != manager.team_id
+            for player_id in team_players[M_ID]
+        ][0]
+        with self.client as client:
+            resp = client.post(
+                make_url(MATCH_SELECTIONS_UI_URL, **{MATCH_ID_PARAM: match.id}),
+                json={other_player: YES_ARG}
+            )
+        self.assertEqual(HTTPStatus.UNPROCESSABLE_ENTITY, resp.status_code)
+
+    # @unittest.skip
+    def test_update_match_selections_csrf(self):
+        """
+        Test updates of the selections of multiple players require a CSRF
+        token.
+        """
+        # Create matches to test with.
+        test_matches, players = self.generate_test_matches()
+
+        manager = [user for user in self.users.values()
+                   if TestMatchUiCase.is_manager(user)][0]
+        role = get_role_from_id(manager.role_id)
+        match = [m for m in test_matches
+                 if TestMatchUiCase.team_is_playing(manager, m)][0]
+        choices = {player_id: YES_ARG
+                   for player_id in players[manager.team_id][M_ID]}
+        selections_url = make_url(MATCH_SELECTIONS_UI_URL,
+                                  **{MATCH_ID_PARAM: match.id})
+
+        self.set_permissions_and_profile(
+            manager, UserType.MANAGER, role, POST_MATCH_PERMISSION)
+        self.app.config['WTF_CSRF_ENABLED'] = True
+        with self.client as client:
+            resp = client.post(selections_url, json=choices)
+            self.assertEqual(HTTPStatus.BAD_REQUEST, resp.status_code)
+
+            soup = BeautifulSoup(client.get(selections_url).data,
+                                 'html.parser')
+            csrf_token = soup.find('input', id='csrf_token')['value']
+
+            resp = client.post(selections_url, json=choices,
+                               headers={'X-CSRFToken': csrf_token})
+            self.assertEqual(HTTPStatus.OK, resp.status_code)
+
+            resp = client.post(selections_url,
+                               data=choices | {'csrf_token': csrf_token})
+            self.assertEqual(HTTPStatus.FOUND, resp.status_code)
+
+    # @unittest.skip
+    def test_update_match_selection_json(self):
+        """
+        Test the new selection status is returned to requests accepting json.
+        """
+        # Create matches to test with.
+        test_matches, players = self.generate_test_matches()
+
+        manager = [user for user in self.users.values()
+                   if TestMatchUiCase.is_manager(user)][0]
+        role = get_role_from_id(manager.role_id)
+        match = [m for m in test_matches
+                 if TestMatchUiCase.team_is_playing(manager, m)][0]
+        player_id = players[manager.team_id][M_ID][0]
+        with self.app.app_context():
+            selected = is_selected_and_confirmed(match.id, player_id)[0]
+
+        self.set_permissions_and_profile(
+            manager, UserType.MANAGER, role, POST_MATCH_PERMISSION)
+        for _ in range(2):
+            selected = not selected
+            with self.client as client:
+                resp = client.post(
+                    make_url(MATCH_USER_SELECTION_UI_URL, **{
+                        MATCH_ID_PARAM: match.id,
+                        USER_ID_PARAM: player_id
+                    }),
+                    headers={'Accept': 'application/json'}
+                )
+
+            self.assertEqual(HTTPStatus.OK, resp.status_code)
+            self.assertTrue(resp.is_json)
+            self.assertEqual(selected, resp.get_json()[M_SELECTED])
+
     # @unittest.skip
     def test_update_match_confirmations(self):
         """
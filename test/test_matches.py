@@ -5,8 +5,11 @@ from datetime import datetime, timedelta
 from enum import IntEnum, auto
 from http import HTTPStatus
 from typing import Union, Optional
+from unittest.mock import patch
 
+from dateutil import tz
 from flask import Response
+from sqlalchemy import select
 
 from team_picker.constants import (MATCHES_URL, MATCH_BY_ID_URL,
                                    RESULT_ONE_MATCH, RESULT_LIST_MATCHES,
@@ -15,15 +18,40 @@ from team_picker.constants import (MATCHES_URL, MATCH_BY_ID_URL,
                                    POST_MATCH_PERMISSION, GET_MATCH_PERMISSION,
                                    DELETE_MATCH_PERMISSION,
                                    PATCH_MATCH_PERMISSION,
+                                   MATCH_SELECTIONS_URL, RESULT_LIST_SELECTIONS,
+                                   LIMIT_QUERY, CURSOR_QUERY, ORDER_QUERY,
+                                   ORDER_DATE_ASC, ORDER_DATE_DESC,
+                                   RESULT_NEXT_CURSOR, STREAM_QUERY, YES_ARG,
+                                   APPLICATION_NDJSON, APPLICATION_JSON,
+                                   DATE_RANGE, TEAM
                                    )
 from team_picker.models import (M_ID, M_START_TIME, M_SELECTIONS, User,
                                 M_HOME_ID, M_AWAY_ID, M_SCORE_HOME,
-                                M_SCORE_AWAY, M_RESULT
+                                M_SCORE_AWAY, M_RESULT, M_USER_ID, M_CONFIRMED,
+                                Loading, serialiser, M_AUTH0_ID, Match,
+                                db_session
                                 )
+from team_picker.models.exception import ModelError
+from team_picker.services import (get_fixture_conflicts, verify_match,
+                                  update_match, sync_selections,
+                                  set_confirmation, SelectChoice,
+                                  is_selected_and_confirmed, set_selections,
+                                  set_selection, get_match_by_id,
+                                  get_all_matches, get_match_selections
+                                  )
+from team_picker.services.base_service import loading_options
+from team_picker.services.match_service import _match_criteria
+from team_picker.util import (CONFIRMED_STATUS, NO_STATUS,
+                              NOT_AVAILABLE_STATUS, DateRange
+                              )
 
 from base_test import BaseTestCase
-from misc import make_url, MatchParam, UserType, Expect
-from test_data import EqualDataMixin, ROLES, UserData, MatchData, PLAYER_ROLE
+from misc import (make_url, MatchParam, UserType, Expect, QueryCounter,
+                  explain, uses_index, EXPLAIN_DIALECTS
+                  )
+from test_data import (EqualDataMixin, ROLES, UserData, MatchData, PLAYER_ROLE,
+                       MANAGER_ROLE
+                       )
 from test_teams import TEAM_1, TEAM_2, TEAM_3, TEAM_4, TEAM_5
 from test_users import UsersTestCase
 
@@ -295,6 +323,87 @@ class MatchesTestCase(BaseTestCase):
                     self.assert_matches_list_resp(expect, resp, expected_list,
                                                   http_status=http_status)
 
+    def test_get_matches_paginated(self):
+        """
+        Test get matches a page at a time.
+        """
+        self.set_permissions(UserType.MANAGER)
+
+        with self.client as client:
+            for order in [ORDER_DATE_ASC, ORDER_DATE_DESC]:
+                expected_list = sorted(
+                    [self.standardise_match(v) for v in self.matches.values()],
+                    key=lambda m: (m[M_START_TIME], m[M_ID]),
+                    reverse=order == ORDER_DATE_DESC)
+
+                with self.subTest(order=order):
+                    resp_list = []
+                    pages = 0
+                    kwargs = {LIMIT_QUERY: 2, ORDER_QUERY: order}
+                    while True:
+                        resp = client.get(make_url(MATCHES_URL, **kwargs))
+                        self.assert_ok(resp.status_code)
+                        resp_body = resp.get_json()
+                        self.assert_success_response(resp_body)
+                        self.assertLessEqual(
+                            len(resp_body[RESULT_LIST_MATCHES]), 2)
+                        resp_list.extend(resp_body[RESULT_LIST_MATCHES])
+                        pages = pages + 1
+
+                        cursor = resp_body[RESULT_NEXT_CURSOR]
+                        if cursor is None:
+                            break
+                        kwargs[CURSOR_QUERY] = cursor
+
+                    self.assertEqual((len(expected_list) + 1) // 2, pages)
+                    self.assertEqual(
+                        [m[M_ID] for m in expected_list],
+                        [m[M_ID] for m in resp_list])
+
+            # Invalid arguments.
+            for kwargs in [{LIMIT_QUERY: 0}, {LIMIT_QUERY: 'x'},
+                           {LIMIT_QUERY: 2, CURSOR_QUERY: 'invalid'}]:
+                with self.subTest(kwargs=kwargs):
+                    resp = client.get(make_url(MATCHES_URL, **kwargs))
+                    self.assert_response_status_code(HTTPStatus.BAD_REQUEST,
+                                                     resp.status_code)
+
+    def test_get_matches_streamed(self):
+        """
+        Test get all matches as a streamed result.
+        """
+        self.set_permissions(UserType.MANAGER)
+
+        with self.client as client:
+            for order in [ORDER_DATE_ASC, ORDER_DATE_DESC]:
+                resp = client.get(make_url(MATCHES_URL, **{ORDER_QUERY: order}))
+                self.assert_ok(resp.status_code)
+                expected_list = resp.get_json()[RESULT_LIST_MATCHES]
+                self.assertEqual(len(self.matches), len(expected_list))
+
+                with self.subTest(order=order, mimetype=APPLICATION_JSON):
+                    resp = client.get(make_url(
+                        MATCHES_URL, **{ORDER_QUERY: order,
+                                        STREAM_QUERY: YES_ARG}))
+                    self.assert_ok(resp.status_code)
+                    self.assertTrue(resp.is_streamed)
+                    resp_body = resp.get_json()
+                    self.assert_success_response(resp_body)
+                    self.assertEqual(expected_list,
+                                     resp_body[RESULT_LIST_MATCHES])
+
+                with self.subTest(order=order, mimetype=APPLICATION_NDJSON):
+                    resp = client.get(
+                        make_url(MATCHES_URL, **{ORDER_QUERY: order}),
+                        headers={'Accept': APPLICATION_NDJSON})
+                    self.assert_ok(resp.status_code)
+                    self.assertTrue(resp.is_streamed)
+                    self.assertEqual(APPLICATION_NDJSON, resp.mimetype)
+                    self.assertEqual(
+                        expected_list,
+                        [self.app.json.loads(line)
+                         for line in resp.get_data(as_text=True).splitlines()])
+
     def test_get_match_by_id(self):
         """
         Test get matches by id.
@@ -875,6 +984,374 @@ class MatchesTestCase(BaseTestCase):
                                    no_mod_match, mod_match, info,
                                    http_status=http_status)
 
+    def test_fixture_conflicts(self):
+        """ Test fixture conflicts are identified in a single query """
+        match = self.matches[f'1{MATCH_KEY}2']
+        team_1 = self.teams[TEAM_1][M_ID]
+        team_2 = self.teams[TEAM_2][M_ID]
+        team_3 = self.teams[TEAM_3][M_ID]
+        start_time = match[M_START_TIME]
+
+        with self.app.test_request_context():
+            for home_id, away_id, kick_off, match_id, expected in [
+                (team_1, team_2, start_time, None,
+                 ["home_home", "away_away"]),
+                (team_2, team_1, start_time, None,
+                 ["home_away", "away_home", "duplicate"]),
+                (team_2, team_3, start_time, None, ["home_away"]),
+                (team_3, team_1, start_time, None, ["away_home"]),
+                (team_1, team_3, start_time, None, ["home_home"]),
+                (team_3, team_2, start_time, None, ["away_away"]),
+                (team_1, team_2, start_time, match[M_ID], []),
+                (team_1, team_2, start_time + timedelta(hours=1), None,
+                 []),
+            ]:
+                with self.subTest(home_id=home_id, away_id=away_id,
+                                  start_time=kick_off, match_id=match_id):
+                    with QueryCounter(self.get_db().engine) as counter:
+                        conflicts = get_fixture_conflicts(
+                            kick_off, home_id, away_id, match_id=match_id)
+                    self.assertEqual(expected, conflicts)
+                    self.assertEqual(1, counter.count)
+
+            # Verification result is cached for the request.
+            entity = {
+                M_START_TIME: start_time,
+                M_HOME_ID: team_1,
+                M_AWAY_ID: team_2
+            }
+            with QueryCounter(self.get_db().engine) as counter:
+                for _ in range(3):
+                    with self.assertRaises(ModelError):
+                        verify_match(entity)
+            self.assertEqual(1, counter.count)
+
+            # Current fixture of a partial update is cached for the request.
+            with QueryCounter(self.get_db().engine) as counter:
+                for _ in range(3):
+                    verify_match({
+                        M_START_TIME: start_time + timedelta(hours=1)
+                    }, match_id=match[M_ID])
+            self.assertEqual(2, counter.count)
+
+    def test_sync_selections(self):
+        """ Test updating selections preserves confirmation status """
+        match_id = self.matches[f'1{MATCH_KEY}2'][M_ID]
+        player_1, player_2, player_3, player_4 = [
+            self.users[f'{PLAYER_ROLE}{k}'][M_ID]
+            for k in [TEAM_1, TEAM_2, TEAM_3, TEAM_4]
+        ]
+
+        with self.app.app_context():
+            set_confirmation(match_id, player_1, SelectChoice.YES)
+
+            result = update_match(match_id,
+                                  {M_SELECTIONS: [player_1, player_3]})
+            self.assertEqual(1, result[RESULT_UPDATED_COUNT])
+            for player_id, expected in [
+                (player_1, (True, CONFIRMED_STATUS)),
+                (player_2, (False, False)),
+                (player_3, (True, NO_STATUS)),
+            ]:
+                with self.subTest(player_id=player_id):
+                    self.assertEqual(
+                        expected,
+                        is_selected_and_confirmed(match_id, player_id))
+
+            # Unchanged selections.
+            self.assertEqual((0, 0),
+                             sync_selections(match_id, [player_3, player_1]))
+
+            # Existing selections are read, then removed and new selections
+            # are each handled in a single statement.
+            with QueryCounter(self.get_db().engine) as counter:
+                self.assertEqual(
+                    (1, 2),
+                    sync_selections(match_id,
+                                    [player_1, player_2, player_4]))
+            self.assertEqual(3, counter.count)
+            self.assertEqual((True, CONFIRMED_STATUS),
+                             is_selected_and_confirmed(match_id, player_1))
+
+    def test_selections_loading(self):
+        """ Test loading match selections per call """
+        match_id = self.matches[f'1{MATCH_KEY}2'][M_ID]
+        player_1, player_3 = [
+            self.users[f'{PLAYER_ROLE}{k}'][M_ID] for k in [TEAM_1, TEAM_3]
+        ]
+
+        with self.app.app_context():
+            sync_selections(match_id, [player_1, player_3])
+
+            for loading, queries in [
+                (Loading.NONE, 1),
+                (Loading.SELECTIN, 2),
+                (Loading.JOINED, 1),
+            ]:
+                with self.subTest(loading=loading):
+                    with QueryCounter(self.get_db().engine) as counter:
+                        match = get_match_by_id(match_id, selections=loading)
+                    self.assertEqual(queries, counter.count)
+                    joined = 'JOIN' in counter.statements[0].upper()
+                    self.assertEqual(loading == Loading.JOINED, joined)
+                    if loading == Loading.NONE:
+                        self.assertNotIn(M_SELECTIONS, match)
+                    else:
+                        self.assertEqual(
+                            [player_1, player_3],
+                            [p[M_ID] for p in match[M_SELECTIONS]])
+
+                    # Lists load the same selections.
+                    matches = {
+                        m[M_ID]: m for m in get_all_matches(
+                            selections=loading)
+                    }
+                    self.assertEqual(len(self.matches), len(matches))
+                    self.assertEqual(match, matches[match_id])
+
+    def test_serialiser(self):
+        """ Test compiled serialisers generate the same dicts as reflection """
+        match_id = self.matches[f'1{MATCH_KEY}2'][M_ID]
+        player_1, player_3 = [
+            self.users[f'{PLAYER_ROLE}{k}'][M_ID] for k in [TEAM_1, TEAM_3]
+        ]
+
+        with self.app.app_context():
+            sync_selections(match_id, [player_1, player_3])
+
+            with db_session() as session:
+                for loading in Loading:
+                    with self.subTest(loading=loading):
+                        match = session.query(Match).options(
+                            *loading_options(Match.selections, loading)
+                        ).filter(Match.id == match_id).first()
+                        self.assertEqual(match.reflect_dict(),
+                                         match.get_dict())
+                        session.expunge_all()
+
+                match = session.query(Match) \
+                    .filter(Match.id == match_id).first()
+                for include, exclude, expected in [
+                    ([M_ID, M_SELECTIONS], None,
+                     {M_ID: match_id, M_SELECTIONS: [
+                         p.get_dict() for p in match.selections]}),
+                    ([M_ID, f'{M_SELECTIONS}.{M_ID}'], None,
+                     {M_ID: match_id, M_SELECTIONS: [
+                         {M_ID: p.id} for p in match.selections]}),
+                    (None, [M_SELECTIONS],
+                     match.reflect_dict(ignore=[M_SELECTIONS])),
+                    (None, [f'{M_SELECTIONS}.{M_AUTH0_ID}'],
+                     match.reflect_dict() | {M_SELECTIONS: [
+                         p.reflect_dict(ignore=[M_AUTH0_ID])
+                         for p in match.selections]}),
+                ]:
+                    with self.subTest(include=include, exclude=exclude):
+                        to_dict = serialiser(Match, include=include,
+                                             exclude=exclude)
+                        self.assertEqual(expected, to_dict(match))
+                self.assertEqual({player_1, player_3},
+                                 {p.id for p in match.selections})
+                # Ignored fields are applied by the serialiser.
+                with patch.object(Match, 'reflect_dict') as reflect_dict:
+                    self.assertNotIn(M_SELECTIONS,
+                                     match.get_dict(ignore=[M_SELECTIONS]))
+                reflect_dict.assert_not_called()
+
+    def test_date_range_uses_index(self):
+        """ Test date range searches use an index on start_time """
+        team_id = self.teams[TEAM_1][M_ID]
+        kick_off = datetime(2021, 7, 3, 12, 30)
+
+        with self.app.app_context():
+            with db_session() as session:
+                dialect = session.get_bind().dialect.name
+                if dialect not in EXPLAIN_DIALECTS:
+                    self.skipTest(f"Query plans not supported for {dialect}")
+
+                for date_range in DateRange:
+                    if date_range == DateRange.IGNORE_DATE:
+                        continue
+                    for team in [None, team_id]:
+                        criteria = {
+                            DATE_RANGE: date_range,
+                            M_START_TIME: kick_off
+                        }
+                        if team is not None:
+                            criteria[TEAM] = team
+                        with self.subTest(date_range=date_range, team=team):
+                            plan = explain(
+                                session, select(Match.id).where(
+                                    _match_criteria(criteria)))
+                            self.assertTrue(
+                                uses_index(plan, Match.__tablename__),
+                                msg=f"{plan}")
+
+    def test_date_range_search(self):
+        """ Test date range searches match the date of the start time """
+        start_times = sorted(
+            {match[M_START_TIME] for match in self.matches.values()})
+        day = start_times[len(start_times) // 2]
+
+        with self.app.app_context():
+            for date_range, include in [
+                (DateRange.BEFORE_DATE, lambda d: d < day.date()),
+                (DateRange.BEFORE_OR_EQUAL_DATE, lambda d: d <= day.date()),
+                (DateRange.EQUAL_DATE, lambda d: d == day.date()),
+                (DateRange.AFTER_OR_EQUAL_DATE, lambda d: d >= day.date()),
+                (DateRange.AFTER_DATE, lambda d: d > day.date()),
+            ]:
+                with self.subTest(date_range=date_range):
+                    expected = sorted(
+                        match[M_ID] for match in self.matches.values()
+                        if include(match[M_START_TIME].date()))
+                    matches = get_all_matches(
+                        criteria={DATE_RANGE: date_range, M_START_TIME: day},
+                        selections=Loading.NONE)
+                    self.assertEqual(expected,
+                                     sorted(m[M_ID] for m in matches))
+
+    def test_json_decode(self):
+        """ Test only date/time fields are decoded as date/times """
+        utc = tz.tzutc()
+        for value, expected in [
+            ('"2021-07-03T09:00:00"', datetime(2021, 7, 3, 9)),
+            ('"2021-05-25T15:53:25.531Z"',
+             datetime(2021, 5, 25, 15, 53, 25, 531000, tzinfo=utc)),
+            ('"2021-05-25T15:53:25.5Z"',
+             datetime(2021, 5, 25, 15, 53, 25, 500000, tzinfo=utc)),
+            ('"2021-07-03"', '2021-07-03'),
+            ('"not a date"', 'not a date'),
+            ('5', 5),
+        ]:
+            with self.subTest(value=value):
+                decoded = self.app.json.loads(
+                    f'{{"{M_START_TIME}": {value}, "notes": {value}, '
+                    f'"nested": [{{"updated_at": {value}}}]}}')
+                self.assertEqual(expected, decoded[M_START_TIME])
+                self.assertEqual(expected, decoded["nested"][0]["updated_at"])
+                # Other fields are not decoded.
+                self.assertEqual(json.loads(value), decoded["notes"])
+
+    def test_update_match_selections(self):
+        """ Test updating the selections of multiple users for a match """
+        self.set_permissions(UserType.MANAGER)
+
+        match_id = self.matches[f'1{MATCH_KEY}2'][M_ID]
+        player_1, player_2, player_3 = [
+            self.users[f'{PLAYER_ROLE}{k}'][M_ID]
+            for k in [TEAM_1, TEAM_2, TEAM_3]
+        ]
+        manager_1 = self.users[f'{MANAGER_ROLE}{TEAM_1}'][M_ID]
+        with self.app.app_context():
+            set_confirmation(match_id, player_1, SelectChoice.YES)
+
+        with self.client as client:
+            resp = client.patch(
+                make_url(MATCH_SELECTIONS_URL, match_id=match_id), json={
+                    player_1: 'y',      # already selected
+                    player_2: 't',      # deselected
+                })
+
+            resp_body = json.loads(resp.data)
+            self.assert_ok(resp.status_code)
+            self.assert_success_response(resp_body)
+            self.assert_body_entry(resp_body, RESULT_UPDATED_COUNT,
+                                   MatchParam.EQUAL, value=1)
+            self.assert_body_entry(resp_body, RESULT_LIST_SELECTIONS,
+                                   MatchParam.EQUAL, value=[
+                                        {M_USER_ID: player_1,
+                                         M_CONFIRMED: CONFIRMED_STATUS},
+                                    ])
+
+            for choices in [{player_1: 'm'}, {'one': 'y'}, [player_1], {}]:
+                with self.subTest(choices=choices):
+                    resp = client.patch(
+                        make_url(MATCH_SELECTIONS_URL, match_id=match_id),
+                        json=choices)
+                    self.assertTrue(400 <= resp.status_code < 500)
+
+            # Only players of the match teams may be selected.
+            for user_id in [player_3, manager_1, 1000]:
+                with self.subTest(user_id=user_id):
+                    resp = client.patch(
+                        make_url(MATCH_SELECTIONS_URL, match_id=match_id),
+                        json={player_2: 'y', user_id: 'y'})
+                    self.assert_response_status_code(
+                        HTTPStatus.UNPROCESSABLE_ENTITY, resp.status_code)
+
+            resp = client.patch(
+                make_url(MATCH_SELECTIONS_URL, match_id=match_id + 100),
+                json={player_1: 'y'})
+            self.assert_response_status_code(HTTPStatus.NOT_FOUND,
+                                             resp.status_code)
+
+        with self.app.app_context():
+            self.assertEqual([player_1], [
+                selection[M_USER_ID]
+                for selection in get_match_selections(match_id)])
+
+            # Selections are read along with the validation of the users, and
+            # removed & added in a statement each.
+            with QueryCounter(self.get_db().engine) as counter:
+                self.assertEqual(
+                    (1, 1),
+                    set_selections(match_id, {
+                        player_1: SelectChoice.TOGGLE,
+                        player_2: SelectChoice.YES,
+                    }))
+            self.assertEqual(3, counter.count)
+
+            # Selections may be restricted to the players of one team.
+            with self.assertRaises(ModelError):
+                set_selections(match_id, {player_1: SelectChoice.YES},
+                               team_id=self.teams[TEAM_2][M_ID])
+
+    def test_set_selection(self):
+        """ Test setting selection and confirmation without a pre-read """
+        match_id = self.matches[f'1{MATCH_KEY}2'][M_ID]
+        player_1, player_3 = [
+            self.users[f'{PLAYER_ROLE}{k}'][M_ID] for k in [TEAM_1, TEAM_3]
+        ]
+
+        with self.app.app_context():
+            engine = self.get_db().engine
+            for user_id, choice, expected, statements in [
+                (player_1, SelectChoice.YES, True, 1),      # already selected
+                (player_3, SelectChoice.NO, False, 1),      # not selected
+                (player_3, SelectChoice.TOGGLE, True, 2),   # select
+                (player_3, SelectChoice.YES, True, 1),      # already selected
+                (player_3, SelectChoice.TOGGLE, False, 1),  # deselect
+                (player_3, SelectChoice.YES, True, 1),      # select
+                (player_3, SelectChoice.NO, False, 1),      # deselect
+            ]:
+                with self.subTest(user_id=user_id, choice=choice):
+                    with QueryCounter(engine) as counter:
+                        self.assertEqual(
+                            expected,
+                            set_selection(match_id, user_id, choice))
+                    self.assertEqual(statements, counter.count)
+                    self.assertEqual(
+                        expected, is_selected_and_confirmed(
+                            match_id, user_id)[0])
+
+            for user_id, choice, expected in [
+                (player_1, SelectChoice.YES, CONFIRMED_STATUS),
+                (player_1, SelectChoice.NO, NOT_AVAILABLE_STATUS),
+                (player_3, SelectChoice.YES, None),     # not selected
+            ]:
+                with self.subTest(user_id=user_id, choice=choice):
+                    with QueryCounter(engine) as counter:
+                        self.assertEqual(
+                            expected,
+                            set_confirmation(match_id, user_id, choice))
+                    self.assertEqual(1, counter.count)
+
+            # Selection is preserved when already selected.
+            self.assertTrue(set_selection(match_id, player_1,
+                                          SelectChoice.YES))
+            self.assertEqual((True, NOT_AVAILABLE_STATUS),
+                             is_selected_and_confirmed(match_id, player_1))
+
 
 # Make the tests conveniently executable
 if __name__ == "__main__":
@@ -4,11 +4,16 @@ from http import HTTPStatus
 from flask import Response
 
 from team_picker.constants import (ROLES_URL, RESULT_LIST_ROLES, ROLE_BY_ID_URL,
-                                   RESULT_ONE_ROLE, GET_ROLE_PERMISSION
+                                   RESULT_ONE_ROLE, GET_ROLE_PERMISSION,
+                                   MANAGER_ROLE, PLAYER_ROLE
                                    )
+from team_picker.services import (is_manager_role, is_player_role,
+                                  get_role_id, get_role_name, create_role,
+                                  invalidate_roles
+                                  )
 
 from base_test import BaseTestCase
-from misc import make_url, MatchParam, UserType
+from misc import make_url, MatchParam, UserType, QueryCounter
 from test_data import EqualDataMixin, ROLES
 
 
@@ -159,7 +164,29 @@ class RolesTestCase(BaseTestCase):
                                            MatchParam.CASE_INSENSITIVE,
                                            MatchParam.IN)
 
+    def test_role_registry(self):
+        """ Test role lookups are answered from the role registry """
+        with self.app.app_context():
+            invalidate_roles()
+            manager_id = ROLES[MANAGER_ROLE].id
+            player_id = ROLES[PLAYER_ROLE].id
+
+            with QueryCounter(self.get_db().engine) as counter:
+                for _ in range(5):
+                    self.assertTrue(is_manager_role(manager_id))
+                    self.assertFalse(is_manager_role(player_id))
+                    self.assertTrue(is_player_role(player_id))
+                    self.assertFalse(is_player_role(manager_id))
+                    self.assertEqual(manager_id, get_role_id('MANAGER'))
+                    self.assertEqual(ROLES[PLAYER_ROLE].role,
+                                     get_role_name(player_id))
+            self.assertEqual(1, counter.count)
+
+            # Registry is invalidated when a role is created.
+            created = create_role({'role': 'Coach'})
+            self.assertEqual(created['id'], get_role_id('coach'))
+            self.assertEqual('Coach', get_role_name(created['id']))
+
 
-# Make the tests conveniently executable
 if __name__ == "__main__":
     unittest.main()
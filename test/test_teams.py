@@ -11,11 +11,19 @@ from team_picker.constants import (TEAMS_URL, TEAM_BY_ID_URL,
                                    RESULT_CREATED_COUNT, RESULT_ONE_TEAM,
                                    RESULT_DELETED_COUNT, RESULT_UPDATED_COUNT,
                                    POST_TEAM_PERMISSION, GET_TEAM_PERMISSION,
+                                   LIMIT_QUERY, CURSOR_QUERY,
+                                   RESULT_NEXT_CURSOR
                                    )
 from team_picker.models import M_ID, M_NAME, Team
+from team_picker.services import (get_team_name, get_unassigned_team_id,
+                                  is_unassigned_team, get_team_choices,
+                                  create_team, update_team, delete_team_by_id,
+                                  invalidate_teams
+                                  )
+from team_picker.services.base_service import update_entity, delete_entity
 
 from base_test import BaseTestCase
-from misc import make_url, MatchParam, UserType, Expect
+from misc import make_url, MatchParam, UserType, Expect, QueryCounter
 from test_data import EqualDataMixin, TeamData, UNASSIGNED_TEAM
 
 TEAM_1 = '1'
@@ -206,6 +214,32 @@ class TeamsTestCase(BaseTestCase):
                         expect, resp, [v for v in self.teams.values()],
                         http_status=http_status, msg=f"{user}")
 
+    def test_get_teams_paginated(self):
+        """
+        Test get teams a page at a time.
+        """
+        self.set_permissions(UserType.MANAGER)
+
+        with self.client as client:
+            resp_list = []
+            kwargs = {LIMIT_QUERY: 2}
+            while True:
+                resp = client.get(make_url(TEAMS_URL, **kwargs))
+                self.assert_ok(resp.status_code)
+                resp_body = resp.get_json()
+                self.assertLessEqual(len(resp_body[RESULT_LIST_TEAMS]), 2)
+                resp_list.extend(resp_body[RESULT_LIST_TEAMS])
+
+                cursor = resp_body[RESULT_NEXT_CURSOR]
+                if cursor is None:
+                    break
+                kwargs[CURSOR_QUERY] = cursor
+
+            resp = client.get(make_url(TEAMS_URL))
+            self.assertEqual(
+                sorted([t[M_ID] for t in resp.get_json()[RESULT_LIST_TEAMS]]),
+                [t[M_ID] for t in resp_list])
+
     def test_get_team_by_id(self):
         """
         Test get teams by id.
@@ -510,6 +544,69 @@ class TeamsTestCase(BaseTestCase):
                                   old_team, new_team, tag,
                                   http_status=range(400, 500))
 
+    def test_single_statement_writes(self):
+        """ Test generic updates and deletes use a single statement """
+        with self.app.app_context():
+            created = create_team({M_NAME: 'New team'})
+            engine = self.get_db().engine
+
+            with QueryCounter(engine) as counter:
+                result = update_entity(Team, {M_NAME: 'Renamed team'},
+                                       criteria=Team.id == created[M_ID])
+            self.assertEqual({RESULT_UPDATED_COUNT: 1}, result)
+            self.assertEqual(1, counter.count)
+
+            with QueryCounter(engine) as counter:
+                result = update_entity(Team, {M_NAME: 'Updated team'},
+                                       criteria=Team.id == created[M_ID],
+                                       key=RESULT_ONE_TEAM)
+            self.assertEqual({
+                RESULT_UPDATED_COUNT: 1,
+                RESULT_ONE_TEAM: {M_ID: created[M_ID], M_NAME: 'Updated team'}
+            }, result)
+            self.assertEqual(1, counter.count)
+
+            # No match.
+            result = update_entity(Team, {M_NAME: 'Missing team'},
+                                   criteria=Team.id == created[M_ID] + 100,
+                                   key=RESULT_ONE_TEAM)
+            self.assertEqual({RESULT_UPDATED_COUNT: 0}, result)
+
+            for count in [1, 0]:
+                with QueryCounter(engine) as counter:
+                    result = delete_entity(
+                        Team, criteria=Team.id == created[M_ID])
+                self.assertEqual({RESULT_DELETED_COUNT: count}, result)
+                self.assertEqual(1, counter.count)
+
+    def test_team_cache(self):
+        """ Test team lookups are answered from the team cache """
+        with self.app.app_context():
+            invalidate_teams()
+            team_1 = self.teams[TEAM_1]
+
+            with QueryCounter(self.get_db().engine) as counter:
+                for _ in range(5):
+                    self.assertEqual(UNASSIGNED_TEAM.id,
+                                     get_unassigned_team_id())
+                    self.assertTrue(is_unassigned_team(UNASSIGNED_TEAM.id))
+                    self.assertFalse(is_unassigned_team(team_1[M_ID]))
+                    self.assertEqual(team_1[M_NAME],
+                                     get_team_name(team_1[M_ID]))
+                    self.assertEqual(len(self.teams), len(get_team_choices()))
+            self.assertEqual(1, counter.count)
+
+            # Cache is invalidated when a team is created, updated or deleted.
+            created = create_team({M_NAME: 'New team'})
+            self.assertIn((created[M_ID], 'New team'), get_team_choices())
+
+            update_team(created[M_ID], {M_NAME: 'Renamed team'})
+            self.assertEqual('Renamed team', get_team_name(created[M_ID]))
+
+            delete_team_by_id(created[M_ID])
+            self.assertNotIn(created[M_ID],
+                             [team_id for team_id, _ in get_team_choices()])
+
 
 # Make the tests conveniently executable
 if __name__ == "__main__":